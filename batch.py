@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+
+from core.adapters import AUTO
+from core.batch import BatchRunner, read_course_list
+from main import add_engine_arguments, engine_options, load_platform_config, profiled, report_metrics
+
+
+def load_credentials(path):
+    """Lê o JSON de credenciais: {"adaptador": {"username": "...", "password": "..."}}."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {adapter: (entry["username"], entry["password"]) for adapter, entry in data.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Baixa vários cursos em uma única execução, com um login por plataforma.",
+        epilog="Exemplo de uso: python batch.py cursos.csv --credentials credenciais.json --workers 4 -o 'G:/Meu Drive/Cursos'"
+    )
+    parser.add_argument(
+        "course_list",
+        help="Arquivo CSV com uma linha por curso: URL da página do curso, nome da pasta e adaptador (separados por ',', ';' ou tab)."
+    )
+    parser.add_argument(
+        "--adapter",
+        default=None,
+        help="Adaptador usado nas linhas da lista que não informam a 3ª coluna ('auto' escolhe pelo endereço de cada curso)."
+    )
+    parser.add_argument(
+        "--credentials",
+        default=None,
+        help="Arquivo JSON com as credenciais por adaptador: {\"adaptador\": {\"username\": \"...\", \"password\": \"...\"}}."
+    )
+    parser.add_argument("-u", "--username", default=None, help="Usuário para os adaptadores sem entrada no arquivo de credenciais.")
+    parser.add_argument("-p", "--password", default=None, help="Senha para os adaptadores sem entrada no arquivo de credenciais.")
+    parser.add_argument(
+        "--parallel_courses",
+        type=int,
+        default=2,
+        help="Número de cursos processados ao mesmo tempo; todos dividem os limites de --workers/--video_workers (padrão: 2)."
+    )
+    add_engine_arguments(parser)
+
+    args = parser.parse_args()
+
+    try:
+        courses = read_course_list(args.course_list, default_adapter=args.adapter)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler a lista de cursos '{args.course_list}': {e}")
+        return
+    if not courses:
+        print("Nenhum curso na lista.")
+        return
+
+    # Todos os adaptadores são validados antes do primeiro download; 'auto' é resolvido pela URL de cada curso
+    platform_configs = {}
+    for position, course in enumerate(courses):
+        if course.adapter == AUTO or course.adapter not in platform_configs:
+            platform_config = load_platform_config(course.adapter, course.url)
+            if platform_config is None:
+                return
+            platform_configs[platform_config.name] = platform_config
+            courses[position] = course._replace(adapter=platform_config.name)
+
+    credentials = {}
+    if args.credentials:
+        try:
+            credentials = load_credentials(args.credentials)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Erro ao ler o arquivo de credenciais '{args.credentials}': {e}")
+            return
+    if args.username and args.password:
+        for adapter in platform_configs:
+            credentials.setdefault(adapter, (args.username, args.password))
+
+    absolute_output_base_dir = os.path.abspath(args.output_base_directory)
+    print(f"Diretório base para downloads: {absolute_output_base_dir}")
+    print(f"{len(courses)} cursos em {len(platform_configs)} plataformas.")
+
+    options = engine_options(args) # Uma única instância de Metrics, somando todos os cursos
+    runner = BatchRunner(
+        courses, platform_configs, credentials, absolute_output_base_dir,
+        engine_options=options,
+        parallel_courses=args.parallel_courses
+    )
+    try:
+        with profiled(args):
+            results = runner.run()
+    finally:
+        if options["parse_pool"]:
+            options["parse_pool"].close()
+        if options["course_index"]:
+            options["course_index"].close()
+
+    print("\n=== Resumo do lote ===")
+    for course, status in results:
+        print(f"  [{status}] {course.folder_name} ({course.url})")
+    report_metrics(options["metrics"], args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import contextlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.measure import StageMonitor, peak_rss
+from benchmarks.mock_platform import add_course_arguments, course_from_args
+from core.downloader_engine import DownloaderEngine
+from main import add_engine_arguments, engine_options, load_platform_config, profiled, report_metrics
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FAKE_YT_DLP = os.path.join(ROOT, "benchmarks", "fake_yt_dlp.py")
+COURSE_NAME = "Curso de benchmark"
+
+
+def start_mock_platform(args):
+    """Sobe a plataforma sintética em outro processo (CPU e memória dela fora da medição); devolve (processo, URL base)."""
+    command = [sys.executable, "-m", "benchmarks.mock_platform", "--port", str(args.port),
+               "--modules", str(args.modules), "--lessons", str(args.lessons), "--materials", str(args.materials),
+               "--material_size", str(args.material_size), "--video_size", str(args.video_size),
+               "--latency", str(args.latency), "--error_rate", str(args.error_rate), "--seed", str(args.seed),
+               "--page_size", str(args.page_size)]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    match = re.search(r"http://[\w.:-]+", process.stdout.readline())
+    if not match:
+        process.kill()
+        raise RuntimeError("a plataforma sintética não iniciou")
+    return process, match.group(0)
+
+
+def server_stats(base_url):
+    with urllib.request.urlopen(base_url + "/_stats", timeout=10) as response:
+        return json.load(response)
+
+
+def downloaded_files(course_folder):
+    """Quantidade e bytes dos arquivos baixados (ignora manifesto, caches e arquivos ocultos)."""
+    count = size = 0
+    for folder, subfolders, files in os.walk(course_folder):
+        subfolders[:] = [name for name in subfolders if not name.startswith(".")]
+        for name in files:
+            if not name.startswith("."):
+                count += 1
+                size += os.path.getsize(os.path.join(folder, name))
+    return count, size
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmark(args, base_url, output_dir):
+    os.environ["BENCHMARK_PLATFORM_URL"] = base_url
+    platform_config = load_platform_config(args.adapter)
+    if platform_config is None:
+        return None
+    args.output_base_directory = output_dir
+    engine = DownloaderEngine(
+        platform_config=platform_config,
+        base_output_path=output_dir,
+        course_url=base_url + "/curso",
+        course_name_for_folder=COURSE_NAME,
+        platform_key=platform_config.name,
+        **engine_options(args)
+    )
+    log_target = sys.stdout if args.verbose else open(os.devnull, "w", encoding="utf-8")
+    monitor = StageMonitor().start()
+    try:
+        with profiled(args), contextlib.redirect_stdout(log_target):
+            ok = engine.authenticate("benchmark", "benchmark") and engine.process_course()
+    finally:
+        if engine.parse_pool:
+            engine.parse_pool.close() # Antes da medição: a CPU dos processos de parsing entra na dos subprocessos
+        measured = monitor.stop()
+        engine.transport.close()
+        if engine.course_index:
+            engine.course_index.close()
+        if log_target is not sys.stdout:
+            log_target.close()
+    report_metrics(engine.metrics, args)
+    files, size = downloaded_files(os.path.join(output_dir, COURSE_NAME))
+    lessons = args.modules * args.lessons - len(engine.all_lessons_info)
+    rss, children_rss = peak_rss()
+    wall = measured["wall_seconds"]
+    return dict(
+        measured,
+        ok=bool(ok),
+        lessons=lessons,
+        lessons_per_second=lessons / wall,
+        files=files,
+        bytes=size,
+        megabytes_per_second=size / 1024 ** 2 / wall,
+        peak_rss_bytes=rss,
+        children_peak_rss_bytes=children_rss,
+        metrics=engine.metrics.summary(),
+    )
+
+
+def print_report(result, server):
+    megabytes = lambda value: f"{value / 1024 ** 2:.1f} MB" if value is not None else "?"
+    print(f"\n=== Benchmark ({'ok' if result['ok'] else 'FALHOU'}) ===")
+    print(f"  Tempo total: {result['wall_seconds']:.2f} s")
+    print(f"  Aulas: {result['lessons']} ({result['lessons_per_second']:.1f} aulas/s)")
+    print(f"  Arquivos: {result['files']}, {megabytes(result['bytes'])} ({result['megabytes_per_second']:.1f} MB/s)")
+    print(f"  Servidor: {server['requests']} requisições, {server['logins']} logins, {server['errors_injected']} erros injetados")
+    print(f"  Pico de RSS: motor {megabytes(result['peak_rss_bytes'])}, subprocessos {megabytes(result['children_peak_rss_bytes'])}")
+    print(f"  CPU: usuário {result['cpu_user_seconds']:.2f} s, sistema {result['cpu_system_seconds']:.2f} s, "
+          f"subprocessos (yt-dlp, parsing) {result['children_cpu_seconds']:.2f} s")
+    if result["stage_cpu_seconds"] is not None:
+        print("  CPU por estágio:")
+        for stage, seconds in result["stage_cpu_seconds"].items():
+            print(f"    {stage:<20} {seconds:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark offline do motor: baixa um curso sintético de uma plataforma local e mede o desempenho.",
+        epilog="Exemplo de uso: python benchmark.py --modules 10 --lessons 20 --latency 20 --error_rate 0.02 --workers 8 --history bench.jsonl"
+    )
+    add_course_arguments(parser)
+    parser.add_argument("--port", type=int, default=0, help="Porta da plataforma sintética (padrão: uma porta livre).")
+    parser.add_argument("--adapter", default="benchmark_platform", help="Adaptador usado no benchmark (padrão: benchmark_platform).")
+    parser.add_argument("--history", default=None, help="Arquivo JSONL ao qual o resultado é acrescentado, para acompanhar a evolução.")
+    parser.add_argument("--keep", action="store_true", help="Mantém a pasta de saída temporária (com -o, a saída nunca é apagada).")
+    parser.add_argument("--verbose", action="store_true", help="Mostra o log do motor durante a execução.")
+    add_engine_arguments(parser)
+    parser.set_defaults(output_base_directory=None, yt_dlp_path=FAKE_YT_DLP)
+
+    args = parser.parse_args()
+
+    keep_output = bool(args.output_base_directory or args.keep)
+    output_dir = os.path.abspath(args.output_base_directory or tempfile.mkdtemp(prefix="benchmark-cursos-"))
+    process, base_url = start_mock_platform(args)
+    try:
+        print(f"Plataforma sintética em {base_url}: {args.modules} módulos x {args.lessons} aulas, "
+              f"{args.materials} materiais de {args.material_size} KB e vídeo de {args.video_size} KB por aula.")
+        result = run_benchmark(args, base_url, output_dir)
+        if result is None:
+            return
+        server = server_stats(base_url)
+    finally:
+        process.terminate()
+        process.wait()
+        if not keep_output:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    print_report(result, server)
+    if args.history:
+        entry = {
+            "timestamp": int(time.time()),
+            "revision": git_revision(),
+            "course": course_from_args(args)._asdict(),
+            "options": {name: getattr(args, name) for name in
+                        ("workers", "material_workers", "video_workers", "http_backend", "video_backend",
+                         "download_segments", "parser", "page_cache_size")},
+            "server": server,
+            "result": result,
+        }
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"Resultado acrescentado a {os.path.abspath(args.history)}")
+
+
+if __name__ == '__main__':
+    main()
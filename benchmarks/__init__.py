@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Deixe este arquivo vazio para marcar a pasta 'benchmarks' como um pacote Python.
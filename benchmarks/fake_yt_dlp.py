@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Substituto mínimo do executável yt-dlp para os benchmarks (--yt_dlp_path).
+
+Entende só o que o SubprocessRunner envia: baixa a URL do vídeo da plataforma sintética
+para o '-o' informado (com %(ext)s = mp4), emitindo as linhas do --progress-template, e
+responde a --dump-single-json com os metadados (tamanho via HEAD). Respeita --limit-rate (em
+bytes/s). Sai com código 1 se o servidor responder com erro, como o yt-dlp real.
+"""
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+
+PROGRESS_PREFIX = "[progresso]"
+
+
+def _option(args, name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+
+
+def _request(url, referer, method="GET"):
+    headers = {"Referer": referer} if referer else {}
+    return urllib.request.urlopen(urllib.request.Request(url, headers=headers, method=method), timeout=60)
+
+
+def _progress(status, downloaded, total, speed):
+    print(f"{PROGRESS_PREFIX} {status}|{downloaded}|{total}|NA|{speed}|NA", flush=True)
+
+
+def main(args):
+    url = args[-1]
+    referer = _option(args, "--referer")
+    try:
+        if "--dump-single-json" in args:
+            with _request(url, referer, "HEAD") as response:
+                size = int(response.headers.get("Content-Length") or 0) or None
+            video_id = url.split("?")[0].rstrip("/").replace("/", "-")
+            print(json.dumps({"id": video_id, "title": video_id, "ext": "mp4", "format_id": "mock-720p",
+                              "resolution": "1280x720", "duration": 600, "filesize": size}))
+            return 0
+
+        output_path = _option(args, "-o", "%(id)s.%(ext)s").replace("%(ext)s", "mp4")
+        report = "--progress-template" in args
+        rate_limit = float(_option(args, "--limit-rate", 0))
+        started = time.monotonic()
+        downloaded = 0
+        with _request(url, referer) as response, open(output_path, "wb") as f:
+            total = response.headers.get("Content-Length") or "NA"
+            while True:
+                chunk = response.read(256 * 1024)
+                if not chunk:
+                    break
+                f.write(chunk)
+                downloaded += len(chunk)
+                if rate_limit:
+                    time.sleep(max(0.0, started + downloaded / rate_limit - time.monotonic()))
+                if report:
+                    _progress("downloading", downloaded, total, downloaded / max(time.monotonic() - started, 1e-6))
+        if report:
+            _progress("finished", downloaded, total, "NA")
+        return 0
+    except (urllib.error.URLError, OSError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
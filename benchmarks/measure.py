@@ -0,0 +1,95 @@
+import os
+import re
+import threading
+import time
+
+try:
+    import resource
+except ImportError: # Windows: sem pico de RSS via getrusage
+    resource = None
+
+# Tempo de CPU de outra thread (Linux/Unix); sem ele, só o total do processo é medido
+_THREAD_CPU = hasattr(time, "pthread_getcpuclockid")
+
+
+def stage_of(thread_name):
+    """Estágio de uma thread pelo nome: 'pagina_3' -> 'pagina'; a thread principal é a descoberta do curso."""
+    if thread_name == "MainThread":
+        return "principal"
+    return re.sub(r"_\d+$", "", thread_name)
+
+
+def peak_rss():
+    """
+    Pico de memória residente (bytes) do processo e do maior subprocesso já encerrado (yt-dlp).
+    No Linux, o pico dos subprocessos pode incluir a memória herdada do motor no fork.
+    """
+    if resource is None:
+        return None, None
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    unit = 1 if os.uname().sysname == "Darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit)
+
+
+class StageMonitor:
+    """
+    Mede o tempo de CPU por estágio do pipeline enquanto o benchmark roda.
+
+    Uma thread própria amostra, a cada 'interval' segundos, o relógio de CPU de cada thread
+    viva e agrupa pelo prefixo do nome (os estágios são ThreadPoolExecutors com
+    thread_name_prefix). Uma thread encerrada entre duas amostras perde só o trecho final,
+    no máximo 'interval' segundos de CPU.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self._cpu = {} # thread -> último tempo de CPU lido
+        self._baseline = {} # thread -> tempo de CPU já gasto antes do início (ex.: thread principal)
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        self._started = (time.perf_counter(), os.times())
+        if _THREAD_CPU:
+            self._sample()
+            self._baseline = dict(self._cpu)
+            self._thread = threading.Thread(target=self._run, name="monitor-benchmark", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        for thread in threading.enumerate():
+            if thread is self._thread or thread.ident is None:
+                continue
+            try:
+                self._cpu[thread] = time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+            except (OSError, ProcessLookupError):
+                pass # A thread terminou entre o enumerate e a leitura
+
+    def stop(self):
+        """Encerra a amostragem e devolve o tempo de parede, o uso de CPU do processo e por estágio."""
+        if self._thread:
+            self._sample()
+            self._stop.set()
+            self._thread.join()
+        started_wall, started_times = self._started
+        wall = time.perf_counter() - started_wall
+        times = os.times()
+        stages = {}
+        for thread, cpu in self._cpu.items():
+            stage = stage_of(thread.name)
+            stages[stage] = stages.get(stage, 0.0) + cpu - self._baseline.get(thread, 0.0)
+        return {
+            "wall_seconds": wall,
+            "cpu_user_seconds": times.user - started_times.user,
+            "cpu_system_seconds": times.system - started_times.system,
+            "children_cpu_seconds": (times.children_user - started_times.children_user
+                                     + times.children_system - started_times.children_system),
+            "stage_cpu_seconds": dict(sorted(stages.items(), key=lambda item: -item[1])) if _THREAD_CPU else None,
+        }
@@ -0,0 +1,265 @@
+"""
+Plataforma de cursos sintética para benchmarks (servidor HTTP local).
+
+Serve login, índice do curso, páginas de aula, materiais e vídeos no formato esperado
+pelo adaptador 'platforms/benchmark_platform.py'. O tamanho do curso, dos arquivos, a
+latência e a taxa de erros injetados são configuráveis; /_stats devolve os contadores
+do servidor em JSON.
+
+Uso isolado: python -m benchmarks.mock_platform --port 8765 --modules 5 --lessons 10
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SESSION_COOKIE = "sessao_benchmark"
+_CHUNK_SIZE = 64 * 1024
+
+SyntheticCourse = namedtuple(
+    "SyntheticCourse", "modules lessons materials material_size video_size latency error_rate seed page_size",
+    defaults=(5, 10, 2, 512 * 1024, 2 * 1024 * 1024, 0.0, 0.0, 0, 0)
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockCursos/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def course(self):
+        return self.server.course
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        self.server.count("bytes_sent", len(body) if self.command != "HEAD" else 0)
+
+    def _redirect(self, location, headers=None):
+        self._send(302, headers=dict(headers or {}, Location=location))
+
+    def _authenticated(self):
+        return f"{SESSION_COOKIE}={self.server.token}" in (self.headers.get("Cookie") or "")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.count("requests")
+        if urlparse(self.path).path != "/entrar":
+            return self._send(404, "não encontrado")
+        self.server.count("logins")
+        self._redirect("/painel", {"Set-Cookie": f"{SESSION_COOKIE}={self.server.token}; Path=/"})
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        self.server.count("requests")
+        url = urlparse(self.path)
+        path = url.path
+        if path == "/_stats":
+            return self._send(200, json.dumps(self.server.snapshot()), "application/json")
+        if self.course.latency:
+            time.sleep(self.course.latency)
+        if path == "/login":
+            return self._send(200, "<html><body><form action='/entrar' method='post'></form></body></html>")
+        if path == "/painel":
+            return self._send(200, "<html><body>Bem-vindo(a)</body></html>")
+        if path.startswith(("/curso", "/aula/", "/arquivos/")) and not self._authenticated():
+            return self._redirect("/login")
+        if path.startswith(("/aula/", "/arquivos/", "/video/")) and self.server.inject_error():
+            return self._send(503, "sobrecarregado")
+
+        if path == "/curso":
+            return self._send_page(self._course_index())
+        match = re.fullmatch(r"/aula/(\d+)/(\d+)", path)
+        if match:
+            return self._send_page(self._lesson_page(*map(int, match.groups())))
+        match = re.fullmatch(r"/arquivos/(\d+)/(\d+)/(\d+)\.pdf", path)
+        if match:
+            return self._send_file(path, self.course.material_size, "application/pdf")
+        match = re.fullmatch(r"/video/(\d+)/(\d+)", path)
+        if match:
+            size = int(parse_qs(url.query).get("size", [self.course.video_size])[0])
+            return self._send_file(path, size, "video/mp4")
+        self._send(404, "não encontrado")
+
+    def _send_page(self, html):
+        etag = '"' + hashlib.md5(html.encode("utf-8")).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers={"ETag": etag})
+        self._send(200, html, headers={"ETag": etag})
+
+    def _course_index(self):
+        parts = ["<html><body><h1>Curso de benchmark</h1>"]
+        for module in range(self.course.modules):
+            parts.append(f'<section class="modulo"><h2 class="modulo-titulo">Módulo {module + 1}</h2><ul class="aulas">')
+            for lesson in range(self.course.lessons):
+                parts.append(f'<li class="aula"><a class="aula-link" href="/aula/{module}/{lesson}">'
+                             f'<span class="aula-titulo">Aula {module + 1}.{lesson + 1}</span></a></li>')
+            parts.append("</ul></section>")
+        parts.append("</body></html>")
+        return "".join(parts)
+
+    def _lesson_page(self, module, lesson):
+        parts = [f"<html><body><h1>Aula {module + 1}.{lesson + 1}</h1><div class='conteudo'>",
+                 "<p>" + "Texto da aula. " * 200 + "</p>"]
+        # Marcação extra (blocos aninhados) até cerca de page_size bytes: páginas pesadas de analisar
+        block = "<div class='bloco'><h3>Seção</h3><p>Texto <b>da</b> aula.</p><ul><li>item</li><li>item</li></ul></div>"
+        parts.append(block * (self.course.page_size // len(block)))
+        for number in range(self.course.materials):
+            parts.append(f'<a class="material" href="/arquivos/{module}/{lesson}/{number}.pdf">'
+                         f'Material {number + 1} da aula {module + 1}.{lesson + 1}.pdf</a>')
+        if self.course.video_size:
+            video_url = f"http://{self.headers.get('Host')}/video/{module}/{lesson}?size={self.course.video_size}"
+            parts.append(f'<iframe class="player" src="{video_url}"></iframe>')
+        parts.append("</div></body></html>")
+        return "".join(parts)
+
+    def _send_file(self, path, size, content_type):
+        """Corpo determinístico e distinto por arquivo (cabeçalho com o caminho + bloco fixo), com suporte a Range."""
+        start, end = 0, size - 1
+        status = 200
+        headers = {"Accept-Ranges": "bytes", "ETag": f'"{hashlib.md5(path.encode()).hexdigest()}-{size}"'}
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range") or "")
+        if match and size:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size:
+                return self._send(416, headers={"Content-Range": f"bytes */{size}"})
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        length = end - start + 1 if size else 0
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command == "HEAD" or not length:
+            return
+        header = path.encode("utf-8").ljust(256, b"\0")
+        filler = self.server.filler
+        position = start
+        while position <= end:
+            if position < len(header):
+                chunk = header[position:min(end + 1, len(header))]
+            else:
+                offset = (position - len(header)) % len(filler)
+                chunk = filler[offset:offset + min(len(filler) - offset, end + 1 - position)]
+            self.wfile.write(chunk)
+            position += len(chunk)
+        self.server.count("bytes_sent", length)
+
+
+class MockCoursePlatform(ThreadingHTTPServer):
+    """Servidor da plataforma sintética; use como gerenciador de contexto ou com start()/stop()."""
+
+    daemon_threads = True
+
+    def __init__(self, course=SyntheticCourse(), host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.course = course
+        self.token = hashlib.sha256(str(time.time()).encode()).hexdigest()[:16]
+        # Bloco pseudoaleatório (incompressível) reaproveitado no corpo de todos os arquivos
+        self.filler = random.Random(0).randbytes(_CHUNK_SIZE)
+        self._random = random.Random(course.seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "logins": 0, "errors_injected": 0, "bytes_sent": 0}
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def inject_error(self):
+        """Sorteia (de forma reprodutível, pela semente) se a requisição recebe um 503."""
+        if not self.course.error_rate:
+            return False
+        with self._lock:
+            failed = self._random.random() < self.course.error_rate
+            self._stats["errors_injected"] += failed
+        return failed
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="servidor-benchmark", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def add_course_arguments(parser):
+    """Opções do curso sintético (tamanho, arquivos, latência e erros)."""
+    parser.add_argument("--modules", type=int, default=5, help="Número de módulos (padrão: 5).")
+    parser.add_argument("--lessons", type=int, default=10, help="Aulas por módulo (padrão: 10).")
+    parser.add_argument("--materials", type=int, default=2, help="Materiais por aula (padrão: 2).")
+    parser.add_argument("--material_size", type=int, default=512, help="Tamanho de cada material, em KB (padrão: 512).")
+    parser.add_argument("--video_size", type=int, default=2048, help="Tamanho de cada vídeo, em KB; 0 para aulas sem vídeo (padrão: 2048).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência adicionada a cada resposta, em milissegundos (padrão: 0).")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Fração das requisições de aulas/arquivos respondidas com 503 (padrão: 0).")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do sorteio dos erros injetados (padrão: 0).")
+    parser.add_argument("--page_size", type=int, default=0,
+                        help="Marcação extra em cada página de aula, em KB, para medir o parsing (padrão: 0).")
+
+
+def course_from_args(args):
+    return SyntheticCourse(
+        modules=args.modules, lessons=args.lessons, materials=args.materials,
+        material_size=args.material_size * 1024, video_size=args.video_size * 1024,
+        latency=args.latency / 1000, error_rate=args.error_rate, seed=args.seed, page_size=args.page_size * 1024
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local da plataforma de cursos sintética usada nos benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_course_arguments(parser)
+    args = parser.parse_args()
+    server = MockCoursePlatform(course_from_args(args), args.host, args.port)
+    print(f"Plataforma sintética em {server.base_url} (curso: {server.base_url}/curso). Ctrl+C para encerrar.", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
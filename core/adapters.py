@@ -0,0 +1,322 @@
+import copy
+import difflib
+import importlib
+import numbers
+import os
+import re
+import threading
+from types import MappingProxyType
+from urllib.parse import urlparse
+
+import soupsieve
+
+ADAPTERS_PACKAGE = "platforms"
+CONFIG_VARIABLE = "PLATFORM_ADAPTER_CONFIG"
+AUTO = "auto" # Nome de adaptador que pede a escolha pela URL do curso
+
+HTML_PARSERS = ("auto", "selectolax", "lxml", "html.parser")
+# Tipos de indicador de login e o campo que cada um exige
+INDICATOR_FIELDS = {"url_contains": "value", "url_is_not": "value", "page_text_contains": "value", "element_exists": "selector"}
+
+# Seletores lidos pelo SelectorEngine (na raiz da config ou agrupados em "selectors") -> obrigatório
+SELECTOR_KEYS = {
+    "module_item_selector": True,
+    "module_title_selector_from_item": False,
+    "lesson_list_container_from_module": False,
+    "lesson_item_selector_from_list": True,
+    "lesson_title_selector_from_item": False,
+    "lesson_link_selector_from_item": False,
+    "course_next_page_selector": False,
+    "module_lessons_url_selector_from_item": False,
+}
+
+
+class AdapterError(Exception):
+    """Adaptador inexistente, que não importa ou cuja configuração não passa na validação."""
+
+
+# --- Validação ---
+
+def _is_url(value):
+    return isinstance(value, str) and urlparse(value).scheme in ("http", "https") and bool(urlparse(value).netloc)
+
+
+def _number(minimum, exclusive=False):
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, numbers.Real):
+            return "deve ser um número"
+        if value < minimum or (exclusive and value == minimum):
+            return f"deve ser {'maior que' if exclusive else 'pelo menos'} {minimum}"
+        return None
+    return check
+
+
+def _url(value):
+    return None if _is_url(value) else "deve ser uma URL http(s) completa"
+
+
+def _text(value):
+    return None if isinstance(value, str) and value.strip() else "deve ser um texto não vazio"
+
+
+def _payload_fields(value):
+    if not isinstance(value, dict):
+        return "deve ser um dicionário {\"username\": campo, \"password\": campo, ...}"
+    missing = [role for role in ("username", "password") if not isinstance(value.get(role), str) or not value[role]]
+    return f"faltam os nomes dos campos {', '.join(repr(role) for role in missing)}" if missing else None
+
+
+def _selector_problem(selector):
+    """Motivo de o seletor ser inválido, ou None."""
+    if isinstance(selector, str):
+        try:
+            soupsieve.compile(selector)
+        except Exception as e: # soupsieve.SelectorSyntaxError e afins
+            return f"seletor CSS inválido {selector!r}: {str(e).splitlines()[0]}"
+        return None
+    if not isinstance(selector, dict):
+        return f"seletor deve ser um dicionário {{\"tag\", \"attrs\"}} ou uma string CSS, não {type(selector).__name__}"
+    unknown = set(selector) - {"tag", "attrs"}
+    if unknown:
+        return f"chaves desconhecidas no seletor: {', '.join(sorted(unknown))}"
+    if selector.get("tag") is not None and not isinstance(selector["tag"], str):
+        return "'tag' do seletor deve ser um texto"
+    if selector.get("attrs") is not None and not isinstance(selector["attrs"], dict):
+        return "'attrs' do seletor deve ser um dicionário"
+    if not selector.get("tag") and not selector.get("attrs"):
+        return "seletor vazio (informe 'tag' e/ou 'attrs')"
+    return None
+
+
+def _selector_list(allow_pairs):
+    def check(value):
+        if not isinstance(value, (list, tuple)):
+            return "deve ser uma lista de seletores"
+        for position, selector in enumerate(value):
+            if allow_pairs and isinstance(selector, dict) and ("parent_selector" in selector or "item_selector" in selector):
+                problem = _selector_problem(selector.get("parent_selector")) or _selector_problem(selector.get("item_selector"))
+            else:
+                problem = _selector_problem(selector)
+            if problem:
+                return f"item {position}: {problem}"
+        return None
+    return check
+
+
+def _indicators(value):
+    if not isinstance(value, (list, tuple)):
+        return "deve ser uma lista de indicadores {\"type\", \"value\"}"
+    for position, indicator in enumerate(value):
+        if not isinstance(indicator, dict) or indicator.get("type") not in INDICATOR_FIELDS:
+            return f"item {position}: 'type' deve ser um de {', '.join(INDICATOR_FIELDS)}"
+        field = INDICATOR_FIELDS[indicator["type"]]
+        if field == "selector":
+            problem = _selector_problem(indicator.get("selector"))
+            if problem:
+                return f"item {position}: {problem}"
+        elif not isinstance(indicator.get(field), str) or not indicator[field]:
+            return f"item {position}: falta o texto em '{field}'"
+    return None
+
+
+def _patterns(value):
+    if not isinstance(value, (list, tuple)) or not value:
+        return "deve ser uma lista de expressões regulares"
+    for pattern in value:
+        try:
+            re.compile(pattern)
+        except (re.error, TypeError) as e:
+            return f"expressão regular inválida {pattern!r}: {e}"
+    return None
+
+
+# Chave -> (verificação, obrigatória)
+SCHEMA = {
+    "platform_name": (_text, False),
+    "login_page_url": (_url, True),
+    "login_form_action_url": (_url, False),
+    "login_payload_fields": (_payload_fields, True),
+    "login_success_indicators": (_indicators, True),
+    "login_failure_indicators": (_indicators, False),
+    "session_check_url": (_url, False),
+    "session_max_age": (_number(0, exclusive=True), False),
+    "delay_between_lesson_pages": (_number(0), False),
+    "max_requests_per_second": (_number(0, exclusive=True), False),
+    "html_parser": (lambda value: None if value in HTML_PARSERS else f"deve ser um de {', '.join(HTML_PARSERS)}", False),
+    "course_url_patterns": (_patterns, False),
+    "selectors": (lambda value: None if isinstance(value, dict) else "deve ser um dicionário de seletores", False),
+}
+SELECTOR_SCHEMA = dict(
+    {key: (_selector_problem, required) for key, required in SELECTOR_KEYS.items()},
+    video_iframe_selectors_on_lesson_page=(_selector_list(allow_pairs=False), False),
+    material_link_selectors_on_lesson_page=(_selector_list(allow_pairs=True), False),
+)
+
+
+def validate_config(raw):
+    """Lista de problemas da configuração do adaptador (vazia se ela é válida)."""
+    if not isinstance(raw, dict):
+        return [f"{CONFIG_VARIABLE} deve ser um dicionário, não {type(raw).__name__}"]
+    nested = isinstance(raw.get("selectors"), dict)
+    problems = []
+
+    def check(config, schema, where=""):
+        for key, value in config.items():
+            if key not in schema:
+                suggestion = difflib.get_close_matches(key, list(schema), n=1)
+                problems.append(f"{where}'{key}': chave desconhecida" + (f" (quis dizer '{suggestion[0]}'?)" if suggestion else ""))
+            elif value is not None:
+                problem = schema[key][0](value)
+                if problem:
+                    problems.append(f"{where}'{key}': {problem}")
+        for key, (_, required) in schema.items():
+            if required and config.get(key) is None:
+                problems.append(f"{where}'{key}': obrigatória")
+
+    if nested:
+        check(raw, SCHEMA)
+        check(raw["selectors"], SELECTOR_SCHEMA, where="selectors.")
+    else:
+        check(raw, dict(SCHEMA, **SELECTOR_SCHEMA))
+    return problems
+
+
+# --- Configuração compilada ---
+
+def _normalize_url(url):
+    return url.split('?')[0].rstrip('/')
+
+
+class PlatformConfig:
+    """
+    Configuração de um adaptador, validada e pré-processada uma única vez.
+
+    Imutável e com __slots__: o motor lê atributos (URLs de login normalizadas, indicadores
+    como tuplas, parâmetros de ritmo já com os padrões) em vez de consultar o dicionário
+    do adaptador com .get a cada requisição. 'selectors' é uma visão somente leitura dos
+    seletores, no formato que o SelectorEngine compila.
+    """
+    __slots__ = ("name", "platform_name", "login_page_url", "login_action_url", "login_urls", "username_field",
+                 "password_field", "extra_login_fields", "success_indicators", "failure_indicators", "session_check_url",
+                 "session_max_age", "delay_between_lesson_pages", "max_requests_per_second", "html_parser",
+                 "selectors", "url_patterns", "hosts")
+
+    def __init__(self, raw, name=None):
+        problems = validate_config(raw)
+        if problems:
+            where = f"platforms/{name}.py" if name else "Adaptador"
+            raise AdapterError(f"{where}: configuração inválida:\n" + "\n".join(f"  - {problem}" for problem in problems))
+        raw = copy.deepcopy(raw) # O módulo do adaptador não altera a config depois de carregada
+        set_ = super().__setattr__
+        set_("name", name)
+        set_("platform_name", raw.get("platform_name") or name or "plataforma")
+        set_("login_page_url", raw["login_page_url"])
+        set_("login_action_url", raw.get("login_form_action_url") or raw["login_page_url"])
+        set_("login_urls", frozenset(_normalize_url(url) for url in (self.login_page_url, self.login_action_url)))
+        fields = raw["login_payload_fields"]
+        set_("username_field", fields["username"])
+        set_("password_field", fields["password"])
+        set_("extra_login_fields", tuple((key, value) for key, value in fields.items() if key not in ("username", "password")))
+        set_("success_indicators", tuple((i["type"], i[INDICATOR_FIELDS[i["type"]]]) for i in raw["login_success_indicators"]))
+        set_("failure_indicators", tuple((i["type"], i[INDICATOR_FIELDS[i["type"]]])
+                                         for i in raw.get("login_failure_indicators") or ()))
+        set_("session_check_url", raw.get("session_check_url"))
+        set_("session_max_age", raw.get("session_max_age"))
+        set_("delay_between_lesson_pages", raw.get("delay_between_lesson_pages", 0.5))
+        set_("max_requests_per_second", raw.get("max_requests_per_second", 10.0))
+        set_("html_parser", raw.get("html_parser", "auto"))
+        set_("selectors", MappingProxyType(raw["selectors"] if isinstance(raw.get("selectors"), dict) else raw))
+        set_("url_patterns", tuple(re.compile(pattern) for pattern in raw.get("course_url_patterns") or ()))
+        # Sem padrões explícitos, o adaptador atende os hosts de login e de teste da sessão
+        set_("hosts", frozenset(urlparse(url).netloc.lower() for url in
+                                (self.login_page_url, self.login_action_url, self.session_check_url) if url))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"PlatformConfig é imutável (atributo '{name}')")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"PlatformConfig é imutável (atributo '{name}')")
+
+    def __repr__(self):
+        return f"PlatformConfig({self.name or self.platform_name!r})"
+
+    @classmethod
+    def coerce(cls, config, name=None):
+        """Aceita uma PlatformConfig pronta ou o dicionário do adaptador (validado aqui)."""
+        return config if isinstance(config, cls) else cls(config, name)
+
+    def matches_url(self, url):
+        """Indica se a URL do curso é desta plataforma ('course_url_patterns' ou, sem eles, os hosts do login)."""
+        if self.url_patterns:
+            return any(pattern.search(url) for pattern in self.url_patterns)
+        host = urlparse(url).netloc.lower()
+        return any(host == known or host.endswith("." + known) or known.endswith("." + host) for known in self.hosts)
+
+
+# --- Registro ---
+
+class AdapterRegistry:
+    """
+    Adaptadores disponíveis em platforms/*.py. A listagem só lê os nomes dos arquivos; cada
+    módulo é importado (e sua configuração validada) na primeira vez em que é pedido. A
+    escolha pela URL importa os adaptadores que ainda não foram carregados.
+    """
+
+    def __init__(self, package=ADAPTERS_PACKAGE):
+        self.package = package
+        self._lock = threading.Lock()
+        self._configs = {}
+
+    def names(self):
+        directories = importlib.import_module(self.package).__path__
+        return sorted({entry.name[:-3] for directory in directories for entry in os.scandir(directory)
+                       if entry.name.endswith(".py") and not entry.name.startswith("_")})
+
+    def load(self, name):
+        """PlatformConfig do adaptador; levanta AdapterError com o motivo se ele não existir ou for inválido."""
+        with self._lock:
+            config = self._configs.get(name)
+        if config is not None:
+            return config
+        available = self.names()
+        if name not in available:
+            suggestion = difflib.get_close_matches(name, available, n=1)
+            raise AdapterError(f"Adaptador '{name}' não encontrado em {self.package}/."
+                               + (f" Quis dizer '{suggestion[0]}'?" if suggestion else "")
+                               + f" Disponíveis: {', '.join(available) or 'nenhum'}.")
+        try:
+            module = importlib.import_module(f"{self.package}.{name}")
+        except Exception as e: # Erro de sintaxe ou de importação no arquivo do adaptador
+            raise AdapterError(f"Não foi possível importar '{self.package}/{name}.py': {type(e).__name__}: {e}") from e
+        if not hasattr(module, CONFIG_VARIABLE):
+            raise AdapterError(f"O arquivo adaptador '{self.package}/{name}.py' não define a variável '{CONFIG_VARIABLE}'.")
+        config = PlatformConfig(getattr(module, CONFIG_VARIABLE), name)
+        with self._lock:
+            return self._configs.setdefault(name, config)
+
+    def for_url(self, url):
+        """Escolhe o adaptador da URL do curso; levanta AdapterError se nenhum (ou mais de um) a atender."""
+        matches, broken = [], []
+        for name in self.names():
+            try:
+                config = self.load(name)
+            except AdapterError:
+                broken.append(name)
+                continue
+            if config.matches_url(url):
+                matches.append(config)
+        if len(matches) == 1:
+            return matches[0]
+        skipped = f" Adaptadores inválidos ignorados: {', '.join(broken)}." if broken else ""
+        if not matches:
+            raise AdapterError(f"Nenhum adaptador atende a URL '{url}'. Informe o adaptador pelo nome ou defina "
+                               f"'course_url_patterns' na configuração dele.{skipped}")
+        raise AdapterError(f"Mais de um adaptador atende a URL '{url}': {', '.join(config.name for config in matches)}. "
+                           f"Informe o adaptador pelo nome.")
+
+    def resolve(self, name, course_url=None):
+        """load(name), ou for_url(course_url) quando o nome é 'auto'."""
+        return self.for_url(course_url) if name == AUTO else self.load(name)
+
+
+registry = AdapterRegistry()
@@ -0,0 +1,100 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+_RATE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?(?:/s)?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_rate(text):
+    """Converte '500K', '10M', '1.5G' (bytes/s, como no --limit-rate do yt-dlp) em bytes por segundo."""
+    match = _RATE_RE.match(str(text))
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"taxa inválida: '{text}' (use, por exemplo, 500K, 10M ou 1G)")
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+class TokenBucket:
+    """
+    Balde de fichas em bytes/s: consume(n) espera até haver n fichas. Acumula no máximo
+    'burst' bytes (padrão: 1/4 de segundo da taxa), o que limita as rajadas após pausas.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = burst or max(64 * 1024, self.rate / 4)
+        self._leased = 0.0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        rate = max(self.rate - self._leased, self.rate * 0.01)
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+        return rate
+
+    def consume(self, amount):
+        while amount > 0:
+            piece = min(amount, self.burst)
+            with self._lock:
+                rate = self._refill(time.monotonic())
+                if self._tokens >= piece:
+                    self._tokens -= piece
+                    amount -= piece
+                    continue
+                wait = (piece - self._tokens) / rate
+            time.sleep(wait)
+
+    def lease(self, rate):
+        """Desconta 'rate' da taxa do balde (banda reservada a um consumidor externo) até release(rate)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._leased += rate
+
+    def release(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._leased = max(0.0, self._leased - rate)
+
+
+class BandwidthLimiter:
+    """
+    Limites de banda dos downloads (opções --max_bandwidth e --max_job_bandwidth).
+
+    Cada download de material consome de um balde próprio (limite por job) e do balde
+    global, compartilhado por todos os downloads (e cursos, no modo em lote). O yt-dlp
+    baixa em outro processo ou na própria biblioteca: cada vídeo recebe uma taxa fixa
+    (--limit-rate / 'ratelimit') — o limite por job, limitado a uma fração do global
+    com espaço para 'max_parallel' vídeos e os materiais — e essa taxa é descontada do
+    balde global enquanto ele roda.
+    """
+
+    def __init__(self, total_rate=None, job_rate=None):
+        self.total_rate = total_rate
+        self.job_rate = job_rate
+        self._total = TokenBucket(total_rate) if total_rate else None
+
+    def job(self):
+        """Função consume(n) de um novo download (os segmentos de um mesmo arquivo dividem o limite do job)."""
+        buckets = [bucket for bucket in (TokenBucket(self.job_rate) if self.job_rate else None, self._total) if bucket]
+
+        def consume(amount):
+            for bucket in buckets:
+                bucket.consume(amount)
+        return consume
+
+    @contextmanager
+    def lease(self, max_parallel=1):
+        """Taxa (bytes/s, ou None sem limite) para um download feito fora dos baldes, como o do yt-dlp."""
+        rate = self.job_rate
+        if self._total:
+            share = self.total_rate / (max_parallel + 1)
+            rate = min(rate or share, share)
+            self._total.lease(rate)
+        try:
+            yield rate
+        finally:
+            if self._total:
+                self._total.release(rate)
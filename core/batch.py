@@ -0,0 +1,152 @@
+import csv
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .adapters import PlatformConfig
+from .downloader_engine import DownloaderEngine
+from .pipeline import LessonPipeline
+from .rate_limit import HostRateLimiter
+from .transport import create_transport
+
+CourseSpec = namedtuple("CourseSpec", "url folder_name adapter")
+
+
+def read_course_list(path, default_adapter=None):
+    """
+    Lê a lista de cursos: CSV com URL, nome da pasta e adaptador (separador ',', ';' ou tab).
+    Linhas vazias, comentários (#) e um cabeçalho na primeira linha são ignorados; a coluna
+    do adaptador pode ser omitida quando há um adaptador padrão.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        lines = f.read().splitlines()
+    # O separador é o mais frequente na primeira linha útil
+    first_line = next((line for line in lines if line.strip() and not line.lstrip().startswith("#")), "")
+    delimiter = max(",;\t", key=first_line.count)
+    courses = []
+    for line_number, row in enumerate(csv.reader(lines, delimiter=delimiter), start=1):
+        row = [cell.strip() for cell in row]
+        if not row or not row[0] or row[0].startswith("#"):
+            continue
+        if not row[0].lower().startswith(("http://", "https://")):
+            if not courses:
+                continue # Cabeçalho
+            raise ValueError(f"Linha {line_number}: URL de curso inválida '{row[0]}'.")
+        if len(row) < 2 or not row[1]:
+            raise ValueError(f"Linha {line_number}: nome da pasta do curso não informado.")
+        adapter = row[2] if len(row) > 2 and row[2] else default_adapter
+        if not adapter:
+            raise ValueError(f"Linha {line_number}: adaptador não informado (use a 3ª coluna ou --adapter).")
+        courses.append(CourseSpec(row[0], row[1], adapter))
+    return courses
+
+
+class _PlatformSession:
+    """Transporte (cookies) e limitador de ritmo compartilhados por todos os cursos de um adaptador."""
+
+    def __init__(self, transport, rate_limiter):
+        self.transport = transport
+        self.rate_limiter = rate_limiter
+        self.lock = threading.Lock()
+        self.logged_in = None # None: ainda não autenticado nesta execução
+        self.engine = None # Motor que autenticou; salva os cookies ao final
+
+
+class BatchRunner:
+    """
+    Baixa vários cursos em uma única execução.
+
+    Cada plataforma (adaptador) tem um só transporte: a autenticação (sessão do cache
+    ou login) é feita uma vez, pelo primeiro curso que precisar dela, e os cookies são
+    reaproveitados pelos demais cursos. Todos os cursos dividem o mesmo
+    pipeline e o mesmo limite de processos yt-dlp, então 'workers' e 'video_workers'
+    são um orçamento global, e não por curso.
+    """
+
+    def __init__(self, courses, platform_configs, credentials, base_output_path, engine_options=None,
+                 parallel_courses=2):
+        self.courses = courses
+        self.platform_configs = {adapter: PlatformConfig.coerce(config, adapter) for adapter, config in platform_configs.items()}
+        self.credentials = credentials
+        self.base_output_path = base_output_path
+        self.parallel_courses = max(1, parallel_courses)
+        options = dict(engine_options or {})
+        self.http_backend = options.pop("http_backend", "requests")
+        self.engine_options = options
+
+        workers = max(1, options.get("workers", 1))
+        self.material_workers = options.get("material_workers") or workers
+        video_workers = options.get("video_workers") or workers
+        self.workers = workers
+        self.video_workers = video_workers
+        self.video_slots = threading.BoundedSemaphore(video_workers)
+        self.pipeline = None
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def run(self):
+        """Processa todos os cursos e devolve [(CourseSpec, status)], com status 'ok', 'login' ou 'erro'."""
+        try:
+            # Mesma folga de threads de vídeo do modo de curso único (o limite real é video_slots)
+            with LessonPipeline(self.workers, self.material_workers, 2 * self.video_workers) as pipeline:
+                self.pipeline = pipeline
+                with ThreadPoolExecutor(self.parallel_courses, thread_name_prefix="curso") as pool:
+                    return list(pool.map(self._run_course, self.courses))
+        finally:
+            self._close_sessions()
+
+    def _session(self, adapter):
+        with self._sessions_lock:
+            session = self._sessions.get(adapter)
+            if session is None:
+                session = _PlatformSession(
+                    create_transport(self.http_backend, max_connections_per_host=max(10, self.workers, self.material_workers)),
+                    HostRateLimiter.from_config(self.platform_configs[adapter])
+                )
+                self._sessions[adapter] = session
+            return session
+
+    def _run_course(self, spec):
+        session = self._session(spec.adapter)
+        try:
+            engine = DownloaderEngine(
+                platform_config=self.platform_configs[spec.adapter],
+                base_output_path=self.base_output_path,
+                course_url=spec.url,
+                course_name_for_folder=spec.folder_name,
+                platform_key=spec.adapter,
+                transport=session.transport,
+                rate_limiter=session.rate_limiter,
+                pipeline=self.pipeline,
+                video_slots=self.video_slots,
+                **self.engine_options
+            )
+            with session.lock: # Só o primeiro curso da plataforma autentica; os outros esperam por ele
+                if session.logged_in is None:
+                    session.logged_in = self._authenticate(spec.adapter, engine)
+                    session.engine = engine
+            if not session.logged_in:
+                return spec, "login"
+            if session.engine is not engine:
+                engine.adopt_session(*self.credentials[spec.adapter])
+            return spec, "ok" if engine.process_course() else "erro"
+        except Exception as e:
+            print(f"Erro inesperado no curso '{spec.folder_name}': {e}")
+            return spec, "erro"
+
+    def _authenticate(self, adapter, engine):
+        platform_name = engine.config.platform_name
+        credentials = self.credentials.get(adapter)
+        if not credentials:
+            print(f"Sem credenciais para {platform_name} ('{adapter}'). Cursos desta plataforma serão pulados.")
+            return False
+        if not engine.authenticate(*credentials):
+            print(f"Falha no login para {platform_name}. Cursos desta plataforma serão pulados.")
+            return False
+        return True
+
+    def _close_sessions(self):
+        for session in self._sessions.values():
+            if session.logged_in:
+                session.engine.save_session() # Cookies renovados durante a execução
+            session.transport.close()
@@ -0,0 +1,225 @@
+import errno
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError: # Windows: sem reflink
+    fcntl = None
+
+FICLONE = 0x40049409 # ioctl do Linux que clona um arquivo (btrfs, XFS, bcachefs...) sem copiar os dados
+
+# Erros que mostram que o modo não é suportado pelo sistema de arquivos (ou entre os dois volumes): o modo
+# é abandonado. Outros erros (ex.: EMLINK, EIO) são falhas só daquele arquivo.
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP}
+_UNSUPPORTED_REFLINK_ERRNOS = _UNSUPPORTED_ERRNOS | {errno.EINVAL, errno.ENOTTY} # ioctl desconhecido pelo sistema de arquivos
+
+# ETag que é um digest do conteúdo (MD5/SHA em hexadecimal, como em S3, GCS e vários CDNs; '-N' em uploads
+# multipart): só esse tipo identifica o mesmo conteúdo em URLs diferentes (ETags como o do nginx, tempo-tamanho, não)
+_DIGEST_ETAG_RE = re.compile(r'^"?[0-9a-fA-F]{32,}(-\d+)?"?$')
+
+LINK_MODES = {
+    "auto": ("reflink", "hardlink", "copy"),
+    "reflink": ("reflink", "copy"),
+    "hardlink": ("hardlink", "copy"),
+    "copy": ("copy",),
+}
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentStore:
+    """
+    Repositório de conteúdo endereçado por hash (SHA-256) para os materiais (opção --dedup).
+
+    Cada conteúdo distinto é guardado uma única vez em 'blobs/<2 primeiros>/<hash>' e as
+    pastas das aulas recebem um reflink (cópia sob demanda) ou um hardlink do blob. Se o
+    sistema de arquivos não suportar nenhum dos dois, não há blob: o primeiro arquivo
+    baixado com aquele conteúdo fica na aula e é registrado pelo caminho como a cópia
+    canônica, e as outras aulas recebem cópias dele só quando o conteúdo vem dos
+    cabeçalhos, sem download. Um índice append-only (JSONL) liga as URLs e os validadores
+    HTTP (ETag, tamanho) aos hashes: quando os cabeçalhos de uma resposta apontam para um
+    conteúdo conhecido, o corpo nem é baixado.
+
+    Com hardlinks, editar o arquivo de uma aula altera o blob e as outras cópias; o modo
+    'auto' prefere reflinks por isso.
+    """
+    INDEX_NAME = "index.jsonl"
+
+    def __init__(self, directory, mode="auto"):
+        if mode not in LINK_MODES:
+            raise ValueError(f"Modo de deduplicação desconhecido: '{mode}'. Opções: {', '.join(LINK_MODES)}")
+        self.directory = directory
+        self.modes = [m for m in LINK_MODES[mode] if m != "reflink" or fcntl is not None]
+        self.index_path = os.path.join(directory, self.INDEX_NAME)
+        self._lock = threading.Lock()
+        self._claims = {} # URL -> [lock, usuários]
+        self._by_url = {}
+        self._by_validator = {}
+        self._canonical = {} # hash -> entrada com o caminho da cópia canônica (modo de cópia, sem blob)
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._index(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue # Linha truncada por uma interrupção no meio da escrita
+        except OSError:
+            pass
+
+    def _index(self, entry):
+        self._by_url[entry["url"]] = entry
+        if entry.get("path"):
+            self._canonical[entry["hash"]] = entry
+        if _DIGEST_ETAG_RE.match(entry.get("etag") or "") and entry.get("size") is not None:
+            self._by_validator[(urlparse(entry["url"]).netloc, entry["etag"], entry["size"])] = entry["hash"]
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _source(self, digest):
+        """Arquivo com o conteúdo do hash: o blob ou a cópia canônica, se ainda não foi alterada; None se não houver."""
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            return blob
+        entry = self._canonical.get(digest)
+        if entry:
+            path = os.path.join(self.directory, entry["path"])
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if stat.st_size == entry["size"] and stat.st_mtime_ns == entry.get("mtime_ns"):
+                return path
+        return None
+
+    @contextmanager
+    def claim(self, key):
+        """
+        Lock por URL (downloads simultâneos do mesmo material esperam o primeiro e reaproveitam o blob)
+        ou por hash (um só vínculo/cópia por vez com o mesmo blob, fora do lock geral).
+        """
+        with self._lock:
+            claim = self._claims.setdefault(key, [threading.Lock(), 0])
+            claim[1] += 1
+        claim[0].acquire()
+        try:
+            yield
+        finally:
+            claim[0].release()
+            with self._lock:
+                claim[1] -= 1
+                if not claim[1]:
+                    del self._claims[key]
+
+    def match(self, url, headers):
+        """
+        Hash de um blob existente com o mesmo conteúdo da resposta, pelos cabeçalhos: ETag ou
+        Last-Modified e tamanho iguais aos da mesma URL, ou ETag-digest e tamanho iguais aos de
+        outra URL do mesmo host. None se não houver.
+        """
+        length = headers.get('Content-Length')
+        size = int(length) if length and length.isdigit() else None
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        with self._lock:
+            entry = self._by_url.get(url)
+            digest = None
+            if entry and (entry.get("size") == size or size is None) and (
+                    (etag and entry.get("etag") == etag) or (last_modified and entry.get("last_modified") == last_modified)):
+                digest = entry["hash"]
+            elif _DIGEST_ETAG_RE.match(etag or "") and size is not None:
+                digest = self._by_validator.get((urlparse(url).netloc, etag, size))
+            if digest and self._source(digest):
+                return digest
+        return None
+
+    def adopt(self, file_path, digest, url, size=None, etag=None, last_modified=None):
+        """
+        Registra um arquivo recém-baixado. Se o conteúdo do hash já existe, o arquivo é trocado
+        por um link para ele (devolve True: era uma cópia e o espaço foi recuperado); senão, vira
+        o blob do hash. Sem reflink nem hardlink, nada é copiado: o arquivo fica como está e, se
+        o conteúdo é novo, é registrado como a cópia canônica.
+        """
+        entry = {"url": url, "hash": digest, "size": size if size is not None else os.path.getsize(file_path),
+                 "etag": etag, "last_modified": last_modified, "stored_at": int(time.time())}
+        linked = False
+        with self.claim(digest): # O lock geral fica só para o índice: o vínculo/cópia é feito fora dele
+            with self._lock:
+                source = self._source(digest)
+            if source is not None:
+                if os.path.abspath(source) != os.path.abspath(file_path):
+                    linked = self._place(source, file_path, copy=False) is not None
+            else:
+                blob = self.blob_path(digest)
+                if self.modes != ["copy"]:
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                if self._place(file_path, blob, copy=False) is None:
+                    entry["path"] = os.path.relpath(file_path, self.directory)
+                    entry["mtime_ns"] = os.stat(file_path).st_mtime_ns
+            with self._lock:
+                self._record(entry)
+        return linked
+
+    def materialize(self, digest, file_path):
+        """Cria o arquivo da aula a partir do blob ou da cópia canônica (reflink, hardlink ou cópia)."""
+        with self.claim(digest):
+            with self._lock:
+                source = self._source(digest)
+            if source is None:
+                raise FileNotFoundError(errno.ENOENT, f"conteúdo {digest} não está mais no repositório")
+            self._place(source, file_path)
+
+    def _record(self, entry):
+        self._index(entry)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _place(self, source, destination, copy=True):
+        """
+        Cria 'destination' com o conteúdo de 'source' pelo primeiro modo suportado (chamado com o claim
+        do hash, sem o lock geral) e devolve o modo. Com copy=False, só vincula: devolve None se não houver reflink nem hardlink.
+        """
+        temp_path = f"{destination}.{threading.get_ident()}.dedup"
+        for mode in list(self.modes):
+            if mode == "copy" and not copy:
+                return None
+            try:
+                if mode == "reflink":
+                    with open(source, "rb") as src, open(temp_path, "wb") as dst:
+                        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                elif mode == "hardlink":
+                    os.link(source, temp_path)
+                else:
+                    shutil.copyfile(source, temp_path)
+                os.replace(temp_path, destination)
+                return mode
+            except OSError as e:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                unsupported = _UNSUPPORTED_REFLINK_ERRNOS if mode == "reflink" else _UNSUPPORTED_ERRNOS
+                if mode == "copy" or e.errno not in unsupported:
+                    raise
+                # Sistema de arquivos sem suporte (ou entre dispositivos): não tenta mais este modo
+                with self._lock:
+                    if mode in self.modes:
+                        self.modes.remove(mode)
+        if not copy:
+            return None
+        raise OSError(f"nenhum modo de deduplicação disponível para {destination}")
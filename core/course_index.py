@@ -0,0 +1,198 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from .pipeline import log
+
+INDEX_FILE_NAME = ".course_index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    platform TEXT,
+    folder TEXT NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lessons (
+    id INTEGER PRIMARY KEY,
+    course_id INTEGER NOT NULL REFERENCES courses(id),
+    position INTEGER,
+    module TEXT,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    folder TEXT,
+    video_url TEXT,
+    video_name TEXT,
+    updated_at INTEGER NOT NULL,
+    UNIQUE (course_id, url)
+);
+CREATE TABLE IF NOT EXISTS materials (
+    id INTEGER PRIMARY KEY,
+    lesson_id INTEGER NOT NULL REFERENCES lessons(id),
+    position INTEGER,
+    name TEXT,
+    url TEXT NOT NULL,
+    file TEXT
+);
+CREATE INDEX IF NOT EXISTS materials_by_lesson ON materials (lesson_id);
+-- Busca textual sem acentos em uma única tabela, para que aulas e materiais tenham notas BM25 comparáveis:
+-- rowid negativo = aula (-id), positivo = material (id); 'name' é o título da aula ou o nome do material
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5 (
+    name, lesson, module, course, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(text):
+    """Converte o texto digitado em uma consulta FTS5: todos os termos, cada um como prefixo ('slid' acha 'slides')."""
+    return " ".join(f'"{term}"*' for term in _TERM_RE.findall(text))
+
+
+class CourseIndex:
+    """
+    Índice local (SQLite) dos cursos baixados: módulos, aulas, materiais, vídeos e onde cada
+    arquivo ficou, com busca textual (FTS5) nos títulos das aulas e nomes dos materiais.
+
+    Um único arquivo em <saída>/.course_index.sqlite reúne todos os cursos baixados para
+    aquela pasta. Cada aula processada substitui o seu registro anterior (a URL da aula é
+    a chave); aulas puladas por já estarem concluídas mantêm o registro da execução em que
+    foram baixadas. Os caminhos são relativos à pasta do índice, que pode ser movida junto
+    com os cursos. Falhas ao gravar o índice só geram um aviso: nunca interrompem downloads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.base = os.path.dirname(os.path.abspath(path))
+        self._lock = threading.Lock()
+        os.makedirs(self.base, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL") # Consultas (search.py) durante a execução
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    @classmethod
+    def open_existing(cls, path):
+        """Abre um índice para consulta; levanta FileNotFoundError se ele ainda não existe."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return cls(path)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _relative(self, path, start=None):
+        return os.path.relpath(path, start or self.base).replace(os.sep, "/") if path else None
+
+    # --- Gravação ---
+
+    def record_course(self, url, name, platform, course_folder):
+        """Registra (ou atualiza) o curso e devolve o seu id, ou None se o índice não pôde ser gravado."""
+        try:
+            with self._lock, self._db:
+                row = self._db.execute("SELECT id, name FROM courses WHERE url = ?", (url,)).fetchone()
+                folder = self._relative(course_folder)
+                if row is None:
+                    return self._db.execute("INSERT INTO courses (url, name, platform, folder, updated_at) VALUES (?, ?, ?, ?, ?)",
+                                            (url, name, platform, folder, int(time.time()))).lastrowid
+                course_id, old_name = row
+                self._db.execute("UPDATE courses SET name = ?, platform = ?, folder = ?, updated_at = ? WHERE id = ?",
+                                 (name, platform, folder, int(time.time()), course_id))
+                if old_name != name:
+                    self._db.execute("UPDATE search SET course = ? WHERE rowid IN (SELECT -id FROM lessons WHERE course_id = ?) OR rowid IN "
+                                     "(SELECT m.id FROM materials m JOIN lessons l ON l.id = m.lesson_id WHERE l.course_id = ?)",
+                                     (name, course_id, course_id))
+                return course_id
+        except sqlite3.Error as e:
+            log(f"AVISO: Não foi possível gravar o curso no índice {self.path}: {e}")
+            return None
+
+    def record_lesson(self, course_id, course_name, lesson, materials, video_url, video_name):
+        """
+        Substitui o registro da aula. 'lesson' é o descritor do pipeline ({"index", "module",
+        "title", "url", "path"}); materials é uma lista de (nome, url, caminho do arquivo).
+        """
+        if course_id is None:
+            return
+        lesson_folder = lesson["path"]
+        try:
+            with self._lock, self._db:
+                db = self._db
+                row = db.execute("SELECT id FROM lessons WHERE course_id = ? AND url = ?", (course_id, lesson["url"])).fetchone()
+                values = (lesson["index"], lesson["module"], lesson["title"], self._relative(lesson_folder),
+                          video_url, video_name, int(time.time()))
+                if row is None:
+                    lesson_id = db.execute("INSERT INTO lessons (position, module, title, folder, video_url, video_name, updated_at, "
+                                           "course_id, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                           values + (course_id, lesson["url"])).lastrowid
+                else:
+                    lesson_id = row[0]
+                    db.execute("UPDATE lessons SET position = ?, module = ?, title = ?, folder = ?, video_url = ?, video_name = ?, "
+                               "updated_at = ? WHERE id = ?", values + (lesson_id,))
+                    db.execute("DELETE FROM search WHERE rowid IN (SELECT id FROM materials WHERE lesson_id = ?)", (lesson_id,))
+                    db.execute("DELETE FROM materials WHERE lesson_id = ?", (lesson_id,))
+                    db.execute("DELETE FROM search WHERE rowid = ?", (-lesson_id,))
+                db.execute("INSERT INTO search (rowid, name, lesson, module, course) VALUES (?, ?, NULL, ?, ?)",
+                           (-lesson_id, lesson["title"], lesson["module"], course_name))
+                for position, (name, url, file_path) in enumerate(materials, start=1):
+                    material_id = db.execute("INSERT INTO materials (lesson_id, position, name, url, file) VALUES (?, ?, ?, ?, ?)",
+                                             (lesson_id, position, name, url, self._relative(file_path, lesson_folder))).lastrowid
+                    db.execute("INSERT INTO search (rowid, name, lesson, module, course) VALUES (?, ?, ?, ?, ?)",
+                               (material_id, name, lesson["title"], lesson["module"], course_name))
+        except sqlite3.Error as e:
+            log(f"    AVISO: Não foi possível gravar a aula '{lesson['title']}' no índice: {e}")
+
+    # --- Consulta ---
+
+    def search(self, text, course=None, limit=20):
+        """
+        Aulas e materiais que contêm todos os termos (em títulos, nomes, módulo ou curso), dos mais
+        relevantes (BM25, com mais peso para o título/nome) aos menos. 'course' filtra pelo nome do curso.
+        """
+        expression = match_expression(text)
+        if not expression:
+            return []
+        course_filter = " AND c.name LIKE ?" if course else ""
+        parameters = (expression,) + ((f"%{course}%",) if course else ()) + (limit,)
+        query = f"""
+            SELECT search.rowid < 0 AS is_lesson, c.name, l.module, l.position, l.title, l.folder, l.url, l.video_url,
+                   l.video_name, m.name, m.url, m.file
+            FROM search LEFT JOIN materials m ON m.id = search.rowid
+            JOIN lessons l ON l.id = CASE WHEN search.rowid < 0 THEN -search.rowid ELSE m.lesson_id END
+            JOIN courses c ON c.id = l.course_id
+            WHERE search MATCH ?{course_filter} ORDER BY bm25(search, 10.0, 3.0, 1.5, 1.0) LIMIT ?"""
+        with self._lock:
+            rows = self._db.execute(query, parameters).fetchall()
+        results = []
+        for (is_lesson, course_name, module, position, title, lesson_folder, lesson_url, video_url, video_name,
+             material_name, material_url, material_file) in rows:
+            folder = os.path.join(self.base, lesson_folder) if lesson_folder else None
+            results.append({
+                "kind": "aula" if is_lesson else "material",
+                "course": course_name,
+                "module": module,
+                "lesson_index": position,
+                "lesson": title,
+                "lesson_url": lesson_url,
+                "folder": folder,
+                "video_url": video_url,
+                "video_name": video_name,
+                "material": material_name,
+                "material_url": material_url,
+                "file": os.path.normpath(os.path.join(folder, material_file)) if folder and material_file else None,
+            })
+        return results
+
+    def courses(self):
+        """Cursos do índice com as contagens de aulas e materiais: [(nome, plataforma, pasta, aulas, materiais, atualizado em)]."""
+        with self._lock:
+            return self._db.execute("""
+                SELECT c.name, c.platform, c.folder, COUNT(DISTINCT l.id), COUNT(m.id), c.updated_at
+                FROM courses c LEFT JOIN lessons l ON l.course_id = c.id LEFT JOIN materials m ON m.lesson_id = l.id
+                GROUP BY c.id ORDER BY c.name""").fetchall()
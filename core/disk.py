@@ -0,0 +1,126 @@
+import ctypes
+import errno
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from .pipeline import log
+
+FALLOC_FL_KEEP_SIZE = 0x01 # Reserva os blocos sem mudar o tamanho do arquivo
+
+_fallocate = None
+if os.name == "posix":
+    try:
+        _libc = ctypes.CDLL(None, use_errno=True)
+        _fallocate = getattr(_libc, "fallocate64", None) or _libc.fallocate # Linux (glibc/musl); ausente no macOS
+        _fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+        _fallocate.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _fallocate = None
+
+
+def preallocate(f, offset, length, keep_size=True):
+    """
+    Reserva no disco 'length' bytes do arquivo aberto 'f' a partir de 'offset' (fallocate), para
+    gravar em blocos contíguos e falhar cedo por falta de espaço. Com keep_size=True o tamanho do
+    arquivo não muda (o tamanho do .part continua indicando quanto já foi baixado). Devolve True
+    se reservou; False se o sistema de arquivos não suporta (NFS/SMB, macOS, Windows). Levanta
+    OSError(ENOSPC) se não houver espaço.
+    """
+    if _fallocate is None or length <= 0:
+        return False
+    if _fallocate(f.fileno(), FALLOC_FL_KEEP_SIZE if keep_size else 0, offset, length) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSPC, errno.EDQUOT):
+        raise OSError(error, os.strerror(error), getattr(f, "name", None))
+    return False
+
+
+def _existing(path):
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+class DiskSpaceGuard:
+    """
+    Mantém pelo menos 'min_free' bytes livres em cada sistema de arquivos de destino (opção --min_free_space).
+
+    Antes de gravar, cada download reserva o espaço que ainda vai ocupar (0 quando o tamanho
+    é desconhecido, como nos vídeos). Se o espaço livre, descontadas as reservas dos outros
+    downloads do mesmo volume, não comporta a reserva, o download espera — e com ele o estágio
+    do pipeline que o executa —, verificando de novo a cada 'poll_interval' segundos ou quando
+    outro download termina. Depois de 'max_wait' segundos sem espaço (None: sem limite), o
+    download falha com ENOSPC e o pipeline segue com os próximos itens. Um arquivo maior que
+    o volume inteiro falha na hora com ENOSPC.
+    """
+
+    def __init__(self, min_free, poll_interval=30.0, max_wait=None, metrics=None):
+        self.min_free = max(0, min_free)
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self._condition = threading.Condition()
+        self._reserved = {} # st_dev -> bytes reservados por downloads em andamento
+
+    def _fits(self, directory, device, size):
+        usage = shutil.disk_usage(directory)
+        if size and size + self.min_free > usage.total:
+            raise OSError(errno.ENOSPC, f"{size} bytes não cabem no volume de {directory} (reserva mínima de {self.min_free} bytes)")
+        return usage.free - self._reserved.get(device, 0) - size >= self.min_free
+
+    @staticmethod
+    def _location(path):
+        directory = _existing(os.path.dirname(os.path.abspath(path)))
+        return directory, os.stat(directory).st_dev
+
+    def try_reserve(self, path, size):
+        """Reserva 'size' bytes para 'path' se couberem agora; devolve True se reservou."""
+        directory, device = self._location(path)
+        with self._condition:
+            if not self._fits(directory, device, size):
+                return False
+            self._reserved[device] = self._reserved.get(device, 0) + size
+            return True
+
+    def release(self, path, size):
+        _, device = self._location(path)
+        with self._condition:
+            self._reserved[device] = max(0, self._reserved.get(device, 0) - size)
+            self._condition.notify_all()
+
+    def wait(self, path, size):
+        """Espera até 'size' bytes caberem em 'path' (sem reservá-los); levanta OSError(ENOSPC) após 'max_wait' segundos."""
+        directory, device = self._location(path)
+        with self._condition:
+            if self._fits(directory, device, size):
+                return
+            started = time.perf_counter()
+            log(f"        Pouco espaço livre para '{os.path.basename(path)}' ({size / 1024 ** 2:.1f} MB + reserva de "
+                f"{self.min_free / 1024 ** 2:.0f} MB). Aguardando espaço em disco...")
+            while not self._fits(directory, device, size):
+                remaining = None if self.max_wait is None else self.max_wait - (time.perf_counter() - started)
+                if remaining is not None and remaining <= 0:
+                    raise OSError(errno.ENOSPC, f"sem espaço livre para '{os.path.basename(path)}' após {self.max_wait / 60:.0f} min "
+                                                f"(reserva mínima de {self.min_free / 1024 ** 2:.0f} MB; ajuste --min_free_space "
+                                                f"ou --max_disk_wait, ou libere espaço)")
+                self._condition.wait(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+        log(f"        Espaço em disco disponível; retomando '{os.path.basename(path)}'.")
+        if self.metrics:
+            self.metrics.observe("disk_space_wait", time.perf_counter() - started)
+
+    @contextmanager
+    def reserve(self, path, size):
+        """Espera o espaço, reserva-o e libera a reserva ao sair."""
+        while not self.try_reserve(path, size):
+            self.wait(path, size)
+        try:
+            yield
+        finally:
+            self.release(path, size)
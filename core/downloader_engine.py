@@ -1,334 +1,790 @@
 
-import requests
-from bs4 import BeautifulSoup
+import contextlib
+import contextvars
 import os
+import sys
 import time
-import subprocess
-from .utils import sanitize_filename, create_folder_structure 
-from urllib.parse import urljoin 
+from urllib.parse import urlparse
+from .adapters import PlatformConfig
+from .utils import sanitize_filename
+from .pipeline import LessonPipeline, log
+from .transport import create_transport, TransportError
+from .rate_limit import HostRateLimiter, RetryPolicy, CircuitOpenError, RETRY_STATUSES
+from .metrics import Metrics
+from .parse_pool import PAGE_EXTRACTORS, lesson_page_data
+from .paths import PathPlanner
+from .content_store import hash_file
+from .manifest import DownloadManifest, STATUS_COMPLETE, STATUS_PARTIAL, STATUS_FAILED, STATUS_UNVERIFIED
+from .resumable import ResumableDownload
+from .selectors import SelectorEngine
+from .video_jobs import VideoJob, VideoJobScheduler, ProgressReporter, SubprocessRunner, LibraryRunner
 
 class DownloaderEngine:
-    def __init__(self, platform_config, base_output_path, course_url, course_name_for_folder, yt_dlp_path=None):
-        self.config = platform_config
+    def __init__(self, platform_config, base_output_path, course_url, course_name_for_folder, yt_dlp_path=None,
+                 workers=1, material_workers=None, video_workers=None, transport=None, http_backend="requests",
+                 sync=False, download_segments=1, segment_min_size=16 * 1024 * 1024, html_parser=None,
+                 video_retries=2, video_progress=None, video_backend="subprocess", pipeline=None, video_slots=None,
+                 session_cache=None, platform_key=None, page_cache=None, rate_limiter=None, http_retries=3,
+                 metrics=None, content_store=None, parse_pool=None, chunk_size=256 * 1024, write_buffer=1024 * 1024,
+                 disk_guard=None, bandwidth=None, course_index=None):
+        # Config do adaptador validada e pré-processada (um dict avulso é validado aqui)
+        self.config = platform_config = PlatformConfig.coerce(platform_config)
         self.base_output_path = base_output_path
         self.main_course_url = course_url 
+        # Hosts da plataforma (login, teste da sessão e o do curso): só eles sinalizam sessão expirada com 401
+        self._platform_hosts = platform_config.hosts | {urlparse(course_url).netloc.lower()}
         self.course_name_for_folder = course_name_for_folder
+        # Nomes de pastas/arquivos do curso: sanitização memoizada, pastas criadas uma vez, colisões e limites de caminho
+        self.paths = PathPlanner(base_output_path, course_name_for_folder)
         self.yt_dlp_path = yt_dlp_path if yt_dlp_path else 'yt-dlp'
+        # Os seletores podem vir agrupados em "selectors" ou direto na raiz da config (como no template)
+        self.selectors = platform_config.selectors
+        # Seletores compilados uma única vez; cada página é extraída em uma só travessia
+        self.selector_engine = SelectorEngine(self.selectors, html_parser or platform_config.html_parser)
+
+        self.workers = max(1, workers)
+        self.material_workers = material_workers or self.workers
+        self.video_workers = video_workers or self.workers
+        # Ritmo adaptativo por host (AIMD + circuit breaker) em todas as requisições, inclusive do yt-dlp;
+        # pode ser compartilhado entre motores da mesma plataforma
+        self.rate_limiter = rate_limiter or HostRateLimiter.from_config(platform_config)
+        self.retry_policy = RetryPolicy(max_retries=http_retries)
+        self.all_lessons_info = []
+        # Com sync=True, itens já concluídos no manifesto são revalidados no servidor (ETag/Last-Modified)
+        self.sync = sync
+        # Downloads de materiais grandes podem ser divididos em segmentos paralelos (Range)
+        self.download_segments = max(1, download_segments)
+        self.segment_min_size = segment_min_size
+        # Caminho de escrita: blocos lidos da rede, buffer do arquivo, espaço livre mínimo e limites de banda
+        self.chunk_size = chunk_size
+        self.write_buffer = write_buffer
+        self.disk_guard = disk_guard
+        self.bandwidth = bandwidth
+        self.manifest = None
+        # Índice local pesquisável dos cursos (search.py); compartilhável entre motores
+        self.course_index = course_index
+        self._course_index_id = None
+        # Cache em disco das páginas HTML e de suas extrações (revalidado com ETag/Last-Modified)
+        self.page_cache = page_cache
+        # Repositório de materiais endereçado por hash (--dedup): uma cópia por conteúdo, vínculos nas aulas
+        self.content_store = content_store
+        # Processos para a análise do HTML (--parse_processes); compartilhável entre motores
+        self.parse_pool = parse_pool
+        # Pipeline externo (modo em lote): os estágios e seus limites são compartilhados entre cursos
+        self.pipeline = pipeline
+        # Contadores e temporizadores (rede por host, parsing, disco, yt-dlp); compartilháveis entre motores
+        self.metrics = metrics or Metrics()
         
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.51 Safari/537.36'
-        })
+        # O transporte pode ser compartilhado entre motores; por padrão usa requests.Session
+        self.transport = transport or create_transport(
+            http_backend, max_connections_per_host=max(10, self.workers, self.material_workers)
+        )
+
+        # Vídeos: no máximo video_workers downloads yt-dlp simultâneos, com novas tentativas e progresso estruturado
+        if video_progress is None:
+            video_progress = ProgressReporter() if sys.stdout.isatty() else None
+        self.video_scheduler = VideoJobScheduler(self._create_video_runner(video_backend), max_parallel=self.video_workers,
+                                                 max_retries=video_retries, on_progress=video_progress, slots=video_slots,
+                                                 limiter=self.rate_limiter, metrics=self.metrics, bandwidth=self.bandwidth)
         self.logged_in = False
-        self.current_referer = None
-
-
-    def _make_request(self, url, method="GET", data=None, extra_headers=None, stream=False, timeout=30, allow_redirects=True):
-        request_headers = self.session.headers.copy()
+        # Sessões autenticadas salvas por plataforma/usuário; as credenciais ficam para re-logins no meio da execução
+        self.session_cache = session_cache
+        self.platform_key = platform_key or platform_config.platform_name
+        self._credentials = None
+        # Referer local a cada tarefa/thread (as tarefas do pipeline rodam em cópias do contexto)
+        self._referer = contextvars.ContextVar(f"referer_{id(self)}", default=None)
+
+    def _create_video_runner(self, video_backend):
+        """Runner do yt-dlp: 'subprocess' (executável externo) ou 'library' (em processo, com os cookies da sessão)."""
+        subprocess_runner = SubprocessRunner(self.yt_dlp_path)
+        if video_backend == "subprocess":
+            return subprocess_runner
+        if video_backend != "library":
+            raise ValueError(f"Backend de vídeo desconhecido: '{video_backend}'. Opções: subprocess, library")
+        try:
+            return LibraryRunner(cookies_provider=self.transport.export_cookies,
+                                 user_agent=self.transport.headers.get('User-Agent'), fallback=subprocess_runner)
+        except RuntimeError as e:
+            print(f"AVISO: {e} Usando o executável '{self.yt_dlp_path}'.")
+            return subprocess_runner
+
+    @property
+    def current_referer(self):
+        return self._referer.get()
+
+    @current_referer.setter
+    def current_referer(self, value):
+        self._referer.set(value)
+
+    def _make_request(self, url, method="GET", data=None, extra_headers=None, stream=False, timeout=30, allow_redirects=True,
+                      reauth=True):
+        request_headers = {}
         if self.current_referer: 
             request_headers['Referer'] = self.current_referer
         if extra_headers:
             request_headers.update(extra_headers)
         
-        try:
-            if method.upper() == "POST":
-                response = self.session.post(url, headers=request_headers, data=data, timeout=timeout, stream=stream, allow_redirects=allow_redirects)
-            else:
-                response = self.session.get(url, headers=request_headers, timeout=timeout, stream=stream, allow_redirects=allow_redirects)
+        # Só GET/HEAD são repetidos automaticamente; um POST (login) nunca é reenviado
+        idempotent = method.upper() in ("GET", "HEAD")
+        host = urlparse(url).netloc
+        attempt = 0
+        reauthenticated = False
+        while True:
+            attempt += 1
+            can_retry = idempotent and attempt <= self.retry_policy.max_retries
+            generation = self.transport.session_generation
+            try:
+                with self.metrics.timer("rate_limit_wait", host=host):
+                    self.rate_limiter.acquire(url)
+                # Com stream=True, mede até a chegada dos cabeçalhos (o corpo é lido por quem chamou)
+                with self.metrics.timer("http_request", host=host, method=method.upper()):
+                    response = self.transport.request(method, url, headers=request_headers, data=data, stream=stream,
+                                                      timeout=timeout, allow_redirects=allow_redirects)
+            except CircuitOpenError as e:
+                self.metrics.increment("http_circuit_open", host=host)
+                # Nada foi enviado: até um POST pode esperar o fim do bloqueio e tentar de novo
+                if attempt > self.retry_policy.max_retries:
+                    log(f"  Requisição para {url} não enviada: {e}")
+                    return None
+                log(f"  Requisição para {url} adiada: {e}")
+                time.sleep(e.retry_in)
+                continue
+            except TransportError as e:
+                self.rate_limiter.record_failure(url)
+                self.metrics.increment("http_errors", host=host)
+                if not can_retry:
+                    log(f"  Erro na requisição para {url}: {e}")
+                    return None
+                delay = self.retry_policy.delay(attempt)
+                self.metrics.increment("http_retries", host=host, reason="network")
+                log(f"  Erro na requisição para {url}: {e}. Nova tentativa em {delay:.1f}s...")
+                time.sleep(delay)
+                continue
 
+            retry_after = self.rate_limiter.record_response(url, response.status_code, response.headers.get('Retry-After'))
+            self.metrics.increment("http_requests", host=host, status=response.status_code)
+            if response.status_code in RETRY_STATUSES and can_retry:
+                response.close()
+                delay = self.retry_policy.delay(attempt, retry_after)
+                self.metrics.increment("http_retries", host=host, reason=response.status_code)
+                log(f"  {url} respondeu {response.status_code}. Nova tentativa em {delay:.1f}s...")
+                time.sleep(delay)
+                continue
+            if not reauthenticated and reauth and self._credentials and self._is_login_response(response):
+                # Sessão expirou no meio da execução: faz login de novo e repete a requisição uma vez
+                response.close()
+                self.metrics.increment("reauthentications")
+                if not self._reauthenticate(generation):
+                    return None
+                reauthenticated = True
+                continue
             self.current_referer = response.url 
             return response
-        except requests.exceptions.RequestException as e:
-            print(f"  Erro na requisição para {url}: {e}")
-            return None
+
+    def _is_login_response(self, response):
+        """
+        Indica se a resposta é a página de login (redirecionamento de uma sessão inválida) ou um 401
+        da própria plataforma. Um 401 de outro host (CDN, hospedagem dos materiais) é uma falha comum
+        daquele arquivo, não uma sessão expirada.
+        """
+        if response.url.split('?')[0].rstrip('/') in self.config.login_urls:
+            return True
+        return response.status_code == 401 and self._is_platform_url(response.url)
+
+    def _is_platform_url(self, url):
+        host = urlparse(url).netloc.lower()
+        return any(host == known or host.endswith("." + known) for known in self._platform_hosts)
+
+    def _reauthenticate(self, generation):
+        # O lock é do transporte: motores que compartilham os cookies (modo em lote) fazem um único re-login
+        with self.transport.auth_lock:
+            if self.transport.session_generation != generation:
+                return True # Outra thread já renovou a sessão enquanto esta esperava
+            log("    Sessão expirada. Fazendo login novamente...")
+            return self.login(*self._credentials)
+
+    def authenticate(self, username, password):
+        """
+        Autentica reaproveitando a sessão salva no cache, se ela passar por uma requisição
+        de teste leve; senão, faz o login completo. As credenciais ficam guardadas para
+        re-autenticar se a sessão expirar no meio da execução.
+        """
+        self._credentials = (username, password)
+        cookies = self.session_cache.load(self.platform_key, username) if self.session_cache else None
+        if cookies:
+            self.transport.import_cookies(cookies)
+            if self.session_is_valid():
+                log(f"Sessão salva reaproveitada para {self.config.platform_name}.")
+                return True
+            log("Sessão salva não é mais válida. Fazendo login...")
+            self.session_cache.discard(self.platform_key, username)
+        return self.login(username, password)
+
+    def adopt_session(self, username, password):
+        """Usa a sessão já autenticada no transporte compartilhado por outro motor (modo em lote)."""
+        self._credentials = (username, password)
+        self.logged_in = True
+
+    def save_session(self):
+        """Salva os cookies atuais no cache de sessões (chamado após o login e ao fim da execução)."""
+        if self.session_cache and self._credentials and self.logged_in:
+            self.session_cache.save(self.platform_key, self._credentials[0], self.transport.export_cookies(),
+                                    max_age=self.config.session_max_age)
 
     def login(self, username, password):
         cfg_login = self.config
-        login_page_url = cfg_login["login_page_url"]
-        login_action_url = cfg_login.get("login_form_action_url", login_page_url)
-        payload_fields = cfg_login["login_payload_fields"]
+        login_page_url = cfg_login.login_page_url
+        login_action_url = cfg_login.login_action_url
         
         payload = {
-            payload_fields["username"]: username,
-            payload_fields["password"]: password,
+            cfg_login.username_field: username,
+            cfg_login.password_field: password,
         }
+        payload.update(cfg_login.extra_login_fields)
 
-        for key, value in payload_fields.items():
-            if key not in ["username", "password"]:
-                payload[key] = value 
+        log(f"Tentando login em {login_action_url} (a partir de {login_page_url})")
 
-        print(f"Tentando login em {login_action_url} (a partir de {login_page_url})")
-
-        response = self._make_request(login_action_url, method="POST", data=payload, extra_headers={'Referer': login_page_url})
+        self._credentials = (username, password)
+        self.logged_in = False
+        with self.metrics.timer("login"):
+            response = self._make_request(login_action_url, method="POST", data=payload, extra_headers={'Referer': login_page_url},
+                                          reauth=False)
 
         if not response:
-            print("Login falhou: Sem resposta do servidor.")
+            log("Login falhou: Sem resposta do servidor.")
             return False
 
         # Verificar sucesso no login
-        for indicator in cfg_login.get("login_success_indicators", []):
-            if indicator["type"] == "url_contains" and indicator["value"] in response.url:
+        for indicator_type, value in cfg_login.success_indicators:
+            if indicator_type == "url_contains" and value in response.url:
                 self.logged_in = True
                 break
-            if indicator["type"] == "url_is_not" and indicator["value"] != response.url:
+            if indicator_type == "url_is_not" and value != response.url:
                  # Se a URL mudou E não é mais a de login, considera sucesso parcial (ajustar se necessário)
                 if login_page_url not in response.url and login_action_url not in response.url:
                     self.logged_in = True
                     break
-            if indicator["type"] == "page_text_contains" and indicator["value"] in response.text:
+            if indicator_type == "page_text_contains" and value in response.text:
                 self.logged_in = True
                 break
-            if indicator["type"] == "element_exists": # Requer parsing
-                soup_login_resp = BeautifulSoup(response.text, 'html.parser')
-                if soup_login_resp.find(indicator["selector"]["tag"], indicator["selector"].get("attrs")):
+            if indicator_type == "element_exists": # Requer parsing
+                if self.selector_engine.exists(response.text, value):
                     self.logged_in = True
                     break
         
+        self.metrics.increment("logins", result="success" if self.logged_in else "failure")
         if self.logged_in:
-            print("Login bem-sucedido!")
+            log("Login bem-sucedido!")
             self.current_referer = response.url
+            self.transport.session_generation += 1
+            self.save_session()
             return True
         else:
-            print("Login falhou. Verifique as credenciais e os indicadores de sucesso/falha na configuração da plataforma.")
+            log("Login falhou. Verifique as credenciais e os indicadores de sucesso/falha na configuração da plataforma.")
             # Tenta verificar indicadores de falha
-            for indicator in cfg_login.get("login_failure_indicators", []):
-                 if indicator["type"] == "page_text_contains" and indicator["value"] in response.text:
-                    print(f"  Indicação de falha no login encontrada: {indicator['value']}")
+            for indicator_type, value in cfg_login.failure_indicators:
+                 if indicator_type == "page_text_contains" and value in response.text:
+                    log(f"  Indicação de falha no login encontrada: {value}")
                     break
             # print(response.text[:1500]) # Para depuração
             return False
 
-    def _find_elements_from_soup(self, soup, selector_config):
-        tag = selector_config.get("tag")
-        attrs = selector_config.get("attrs", {})
-        if not tag: return []
-        return soup.find_all(tag, attrs)
-
-    def _get_text_from_element(self, element, selector_config=None, default_text="Desconhecido"):
-        if not element: return default_text
-        target_element = element
-        if selector_config and selector_config.get("tag"): # Se o seletor for para um sub-elemento
-            target_element = element.find(selector_config["tag"], selector_config.get("attrs", {}))
-        return target_element.get_text(strip=True) if target_element else default_text
-
-    def _get_href_from_element(self, element, selector_config=None, base_url=""):
-        if not element: return None
-        target_element = element
-        if selector_config and selector_config.get("tag"): # Se o seletor for para um sub-elemento
-            target_element = element.find(selector_config["tag"], selector_config.get("attrs", {}))
-        
-        href = target_element.get('href') if target_element else None
-        return urljoin(base_url, href) if href else None
-
-
-    def process_course(self):
+    def session_is_valid(self, probe_url=None):
+        """
+        Verifica se os cookies atuais do transporte ainda dão acesso à plataforma. A página
+        de teste ('session_check_url' do adaptador ou, por padrão, a do curso) precisa abrir
+        sem voltar ao login; só os cabeçalhos são lidos.
+        """
+        probe_url = probe_url or self.config.session_check_url or self.main_course_url
+        response = self._make_request(probe_url, stream=True, reauth=False)
+        if not response:
+            return False
+        response.close()
+        if response.status_code != 200 or self._is_login_response(response):
+            return False # Redirecionado para o login: sessão expirada
+        self.logged_in = True
+        return True
+
+    def process_course(self, plan=None):
+        """
+        Baixa o curso. Com 'plan' (gerado por CoursePlanner / --plan), usa as aulas, materiais
+        e vídeos do plano em vez de percorrer o site de novo.
+        """
         if not self.logged_in:
             print("ERRO: Não logado. Execute o login primeiro.")
-            return
+            return False
+
+        if plan is not None:
+            print(f"\nUsando o plano salvo do curso ({plan['totals']['lessons']} aulas); as páginas não serão analisadas de novo.")
+            lessons = self.lessons_from_plan(plan)
+        else:
+            first_page = self.fetch_course_index()
+            if first_page is None:
+                return False
+            # Gerador: as aulas entram no pipeline à medida que são descobertas (páginas seguintes
+            # do índice e listas de aulas sob demanda são buscadas enquanto as primeiras já baixam)
+            lessons = self.iter_lessons(first_page)
+
+        self.manifest = DownloadManifest(self.paths.ensure_folder(self.paths.course_folder))
+        if self.course_index is not None:
+            self._course_index_id = self.course_index.record_course(self.main_course_url, self.course_name_for_folder,
+                                                                    self.config.platform_name, self.paths.course_folder)
+        started = time.perf_counter()
+        try:
+            if self.pipeline is not None:
+                self.pipeline.run_lessons(lessons, self._process_lesson)
+            elif self.workers > 1 or self.video_workers > 1 or self.material_workers > 1:
+                print(f"\nProcessando as aulas com {self.workers} workers, à medida que são encontradas...")
+                # O estágio de vídeo tem threads de sobra: o limite real de processos fica no VideoJobScheduler,
+                # e uma thread em backoff não impede outro vídeo de ocupar a vaga
+                with LessonPipeline(self.workers, self.material_workers, 2 * self.video_workers) as pipeline:
+                    pipeline.run_lessons(lessons, self._process_lesson)
+            else:
+                run_inline = lambda fn, *args: fn(*args)
+                for lesson in lessons:
+                    self._process_lesson(lesson, run_inline, run_inline)
+        finally:
+            self.manifest.close()
+            self.metrics.observe("course", time.perf_counter() - started)
+
+        print(f"\n--- Processamento do curso '{self.course_name_for_folder}' concluído. ---")
+        return True
 
+    def fetch_course_index(self):
+        """Baixa e analisa a primeira página do índice do curso; None (com a mensagem de erro) se falhar."""
         print(f"\nAcessando página do curso: {self.main_course_url}")
-        response_course_page = self._make_request(self.main_course_url, extra_headers={'Referer': self.current_referer or self.main_course_url})
-        if not response_course_page or response_course_page.status_code != 200:
+        first_page = self._fetch_page(self.main_course_url, "course", self.selector_engine.extract_course,
+                                      extra_headers={'Referer': self.current_referer or self.main_course_url})
+        if first_page is None:
             print(f"Falha ao acessar a página principal do curso: {self.main_course_url}")
-            return
-
+            return None
         print("Página do curso acessada. Analisando estrutura...")
-        soup_course_page = BeautifulSoup(response_course_page.text, 'html.parser')
-        
-        cfg_selectors = self.config["selectors"]
-        overall_lesson_counter = 0
-        
-        # --- Encontrar Módulos ---
-        module_elements = self._find_elements_from_soup(soup_course_page, cfg_selectors["module_item_selector"])
-        print(f"Encontrados {len(module_elements)} módulos.")
-
-        for module_element in module_elements:
-            module_title = self._get_text_from_element(module_element, cfg_selectors["module_title_selector_from_item"], "Módulo Desconhecido")
-            print(f"\n--- Processando Módulo: {module_title} ---")
-
-            lesson_container_element = module_element # Por padrão, aulas estão dentro do item do módulo
-            if cfg_selectors.get("lesson_list_container_from_module"):
-                sel_tag = cfg_selectors["lesson_list_container_from_module"]["tag"]
-                sel_attrs = cfg_selectors["lesson_list_container_from_module"].get("attrs", {})
-                lesson_container_element = module_element.find(sel_tag, sel_attrs)
-            
-            if not lesson_container_element:
-                print(f"  AVISO: Container de aulas não encontrado para o módulo '{module_title}'.")
-                continue
+        return first_page
 
-            lesson_elements = self._find_elements_from_soup(lesson_container_element, cfg_selectors["lesson_item_selector_from_list"])
-            
-            for lesson_element in lesson_elements:
-                overall_lesson_counter += 1
-                lesson_title = self._get_text_from_element(lesson_element, cfg_selectors["lesson_title_selector_from_item"], f"Aula {overall_lesson_counter}")
-                lesson_page_url = self._get_href_from_element(lesson_element, cfg_selectors.get("lesson_link_selector_from_item"), base_url=self.main_course_url)
-
-                lesson_folder_name_with_prefix = f"{overall_lesson_counter:03d} - {lesson_title}"
-                lesson_download_path = create_folder_structure(
-                    self.base_output_path, self.course_name_for_folder, module_title, lesson_folder_name_with_prefix
-                )
-                if not lesson_download_path: continue # Pula se a pasta não pôde ser criada
-
-                print(f"  Processando Aula {overall_lesson_counter:03d}: {lesson_title}")
-                print(f"    Pasta: {lesson_download_path}")
+    def fetch_lesson_page(self, lesson_page_url):
+        """Materiais [(nome, url)] e URL do vídeo da página da aula, ou None se ela não abriu."""
+        lesson_page = self._fetch_page(lesson_page_url, "lesson", self._extract_lesson_page, extra_headers={'Referer': self.main_course_url})
+        if lesson_page is None:
+            return None
+        return [tuple(material) for material in lesson_page["materials"]], lesson_page["video"]
+
+    def lessons_from_plan(self, plan):
+        """Descritores das aulas de um plano salvo, com materiais e vídeo já resolvidos; cria as pastas."""
+        for module in plan["modules"]:
+            for lesson in module["lessons"]:
+                lesson_download_path = self.paths.ensure_folder(os.path.join(self.paths.course_folder, *lesson["folder"].split("/")))
+                yield {
+                    "index": lesson["index"],
+                    "module": module["title"],
+                    "title": lesson["title"],
+                    "url": lesson["url"],
+                    "path": lesson_download_path,
+                    "materials": [(material["name"], material["url"]) for material in lesson["materials"]],
+                    "video": lesson["video"]["url"] if lesson.get("video") else None,
+                }
+
+    def _fetch_page(self, url, kind, extract, extra_headers=None):
+        """
+        Baixa uma página HTML e devolve extract(html, url), ou None se a página não abriu.
+
+        Com o cache de páginas, a requisição é condicional (If-None-Match/If-Modified-Since):
+        um 304, ou um corpo idêntico ao salvo, reaproveita a extração anterior sem
+        analisar o HTML de novo. 'kind' identifica o tipo de extração guardado no cache.
+        """
+        cached = self.page_cache.get(url) if self.page_cache else None
+        headers = dict(extra_headers or {})
+        if cached:
+            headers.update(self.page_cache.validators(cached))
+        response = self._make_request(url, extra_headers=headers)
+        if not response:
+            return None
+        fingerprint = self.selector_engine.fingerprint
+
+        if cached and response.status_code == 304:
+            html = None
+            self.metrics.increment("page_cache", kind=kind, result="not_modified")
+        elif response.status_code == 200:
+            html = response.text
+            if not (cached and self.page_cache.body_hash(html) == cached.get("body_hash")):
+                self.metrics.increment("page_cache", kind=kind, result="miss")
+                with self.metrics.timer("page_parse", kind=kind):
+                    data = self._extract(kind, extract, html, url)
+                if self.page_cache:
+                    self.page_cache.store(url, html, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                                          kind, fingerprint, data)
+                return data
+            self.metrics.increment("page_cache", kind=kind, result="unchanged_body")
+        else:
+            return None
 
-                if not lesson_page_url:
-                    print("    AVISO: Link da página da aula não encontrado.")
-                    all_lessons_info.append({"title": lesson_title, "module": module_title, "error": "No lesson page URL"})
-                    continue
-                
-                print(f"    Acessando página da aula: {lesson_page_url} ...")
-                time.sleep(self.config.get("delay_between_lesson_pages", 0.5)) # Pausa configurável
-                
-                response_lesson_page = self._make_request(lesson_page_url, extra_headers={'Referer': self.main_course_url})
-                if not response_lesson_page or response_lesson_page.status_code != 200:
-                    print(f"    AVISO: Falha ao acessar a página da aula: {lesson_page_url}")
-                    all_lessons_info.append({"title": lesson_title, "module": module_title, "lesson_page_url": lesson_page_url, "error": "Failed to fetch lesson page"})
+        # Página sem alterações: usa a extração salva ou, se os seletores mudaram, o corpo salvo
+        data = self.page_cache.extracted(cached, kind, fingerprint)
+        if data is not None:
+            self.page_cache.touch(url)
+            return data
+        html = html if html is not None else self.page_cache.body(url)
+        if html is None:
+            self.page_cache.discard(url) # Corpo perdido: baixa a página inteira de novo
+            return self._fetch_page(url, kind, extract, extra_headers)
+        with self.metrics.timer("page_parse", kind=kind):
+            data = self._extract(kind, extract, html, url)
+        cached.setdefault("extracted", {})[kind] = {"fingerprint": fingerprint, "data": data}
+        self.page_cache.touch(url, cached)
+        return data
+
+    def _extract(self, kind, extract, html, url):
+        """extract(html, url) neste processo ou, com o pool de parsing, em um dos processos dele."""
+        if self.parse_pool is not None and kind in PAGE_EXTRACTORS:
+            return self.parse_pool.extract(self.selector_engine, kind, html, url)
+        return extract(html, url)
+
+    def iter_lessons(self, first_page=None, create_folders=True):
+        """
+        Gera os descritores das aulas ({"index", "module", "title", "url", "path"}) conforme
+        a estrutura do curso é descoberta, numerando as aulas e criando as pastas na ordem
+        da página (a numeração independe do paralelismo).
+
+        Segue a paginação do índice ('course_next_page_selector') e busca sob demanda as
+        listas de aulas de módulos carregados dinamicamente ('module_lessons_url_selector_from_item').
+        Com create_folders=False (modo --plan), só calcula os caminhos.
+        """
+        overall_lesson_counter = 0
+        page = first_page
+        page_url = self.main_course_url
+        seen_pages = {page_url}
+
+        while True:
+            if page is None:
+                page = self._fetch_page(page_url, "course", self.selector_engine.extract_course,
+                                        extra_headers={'Referer': self.main_course_url})
+                if page is None:
+                    print(f"  AVISO: Falha ao acessar a página do índice do curso: {page_url}")
+                    return
+
+            # --- Encontrar Módulos ---
+            print(f"Encontrados {len(page['modules'])} módulos.")
+
+            for module in page["modules"]:
+                module_title = module["title"] or "Módulo Desconhecido"
+                print(f"\n--- Processando Módulo: {module_title} ---")
+
+                module_lessons = module["lessons"]
+                if not module_lessons and module.get("lessons_url"):
+                    # Lista de aulas carregada sob demanda (ex.: via AJAX ao expandir o módulo)
+                    module_lessons = self._fetch_page(module["lessons_url"], "module", self.selector_engine.extract_module_lessons,
+                                                      extra_headers={'Referer': page_url})
+                    if module_lessons is None:
+                        print(f"  AVISO: Falha ao carregar as aulas do módulo '{module_title}': {module['lessons_url']}")
+                        continue
+                elif not module["container_found"]:
+                    print(f"  AVISO: Container de aulas não encontrado para o módulo '{module_title}'.")
                     continue
-                
-                soup_lesson_page = BeautifulSoup(response_lesson_page.text, 'html.parser')
-
-                # Baixar Materiais de Apoio
-                print("    Procurando materiais de apoio...")
-                found_materials_for_lesson = False
-                for mat_sel_config in cfg_selectors.get("material_link_selectors_on_lesson_page", []):
-                    # Lógica para lidar com diferentes tipos de seletores de material (direto ou parent>item)
-                    material_elements_to_search_in = soup_lesson_page
-                    current_material_item_selector = mat_sel_config
-                    
-                    if mat_sel_config.get("parent_selector") and mat_sel_config.get("item_selector"):
-                        parent_elements = self._find_elements_from_soup(soup_lesson_page, mat_sel_config["parent_selector"])
-                        for parent_el in parent_elements:
-                            material_elements_to_search_in = parent_el # Busca dentro do pai
-                            current_material_item_selector = mat_sel_config["item_selector"]
-                            material_links = self._find_elements_from_soup(material_elements_to_search_in, current_material_item_selector)
-                            for mat_link_tag in material_links:
-                                material_url = self._get_href_from_element(mat_link_tag, base_url=lesson_page_url)
-                                material_name = sanitize_filename(mat_link_tag.get_text(strip=True) or f"material_anexo_{time.time()}")
-                                if material_url:
-                                    self._download_file(material_url, material_name, lesson_download_path, file_type="Material")
-                                    found_materials_for_lesson = True
-                        continue # Próxima config de material
-                    
-                    # Se for um seletor direto de links de material
-                    material_links = self._find_elements_from_soup(material_elements_to_search_in, current_material_item_selector)
-                    for mat_link_tag in material_links:
-                        material_url = self._get_href_from_element(mat_link_tag, base_url=lesson_page_url) # href direto da tag
-                        material_name = sanitize_filename(mat_link_tag.get_text(strip=True) or f"material_anexo_{time.time()}")
-                        if material_url:
-                            self._download_file(material_url, material_name, lesson_download_path, file_type="Material")
-                            found_materials_for_lesson = True
-                
-                if not found_materials_for_lesson:
-                    print("    Nenhum material de apoio encontrado ou configurado para esta aula.")
-
-                # Encontrar e Baixar Vídeo
-                video_source_url = self._extract_video_url_from_lesson_page(soup_lesson_page, lesson_page_url)
-                if video_source_url:
-                    print(f"      URL de vídeo/player encontrada: {video_source_url}")
-                    self._download_video_with_yt_dlp(video_source_url, lesson_title, lesson_download_path, referer_url=lesson_page_url)
-                else:
-                    print("      AVISO: Nenhuma URL de vídeo/player encontrada para yt-dlp nesta página de aula.")
 
-        print(f"\n--- Processamento do curso '{self.course_name_for_folder}' concluído. ---")
+                for module_lesson in module_lessons:
+                    overall_lesson_counter += 1
+                    lesson_title = module_lesson["title"] or f"Aula {overall_lesson_counter}"
+                    lesson_page_url = module_lesson["url"]
+
+                    lesson_folder_name_with_prefix = f"{overall_lesson_counter:03d} - {lesson_title}"
+                    folder_for = self.paths.create_lesson_folder if create_folders else self.paths.lesson_folder
+                    lesson_download_path = folder_for(module_title, lesson_folder_name_with_prefix)
+                    if not lesson_download_path: continue # Pula se a pasta não pôde ser criada
+
+                    yield {
+                        "index": overall_lesson_counter,
+                        "module": module_title,
+                        "title": lesson_title,
+                        "url": lesson_page_url,
+                        "path": lesson_download_path,
+                    }
+
+            page_url = page["next_page"]
+            if not page_url or page_url in seen_pages:
+                return
+            seen_pages.add(page_url)
+            print(f"\nPróxima página do índice do curso: {page_url}")
+            page = None
+
+    def _process_lesson(self, lesson, run_material, run_video):
+        """
+        Baixa a página de uma aula e enfileira seus materiais e vídeo.
+        run_material/run_video executam (ou agendam) o download em seu estágio.
+        """
+        lesson_title = lesson["title"]
+        module_title = lesson["module"]
+        lesson_page_url = lesson["url"]
+        lesson_download_path = lesson["path"]
+
+        log(f"  Processando Aula {lesson['index']:03d}: {lesson_title}")
+        log(f"    Pasta: {lesson_download_path}")
+
+        if not lesson_page_url:
+            log("    AVISO: Link da página da aula não encontrado.")
+            self.all_lessons_info.append({"title": lesson_title, "module": module_title, "error": "No lesson page URL"})
+            return
 
+        if not self.sync and self.manifest.lesson_is_complete(lesson_page_url):
+            log("    Aula já concluída segundo o manifesto. Pulando.")
+            return
+        
+        if "materials" in lesson:
+            # Aula vinda de um plano (--from_plan): materiais e vídeo já resolvidos
+            materials, video_source_url = lesson["materials"], lesson["video"]
+        else:
+            log(f"    Acessando página da aula: {lesson_page_url} ...")
 
-    def _extract_video_url_from_lesson_page(self, soup_lesson_page, lesson_page_url):
-        """Tenta extrair a URL do vídeo da página da aula usando seletores da config."""
-        for iframe_sel_config in self.config["selectors"].get("video_iframe_selectors_on_lesson_page", []):
-            iframe_tag = soup_lesson_page.find(iframe_sel_config["tag"], iframe_sel_config.get("attrs", {}))
-            if iframe_tag:
-                video_src = iframe_tag.get("src")
-                if video_src:
-                    # Checagem especial para src_contains, se presente na config do seletor
-                    if iframe_sel_config.get("attrs", {}).get("src_contains"):
-                        if iframe_sel_config["attrs"]["src_contains"] in video_src:
-                            return urljoin(lesson_page_url, video_src)
-                    else: # Se não houver src_contains, retorna o src diretamente
-                        return urljoin(lesson_page_url, video_src)
-                
-                # Checagem especial para data attributes, se presente na config do seletor
-                vimeo_id_attr_name = iframe_sel_config.get("attrs", {}).get("vimeo_id_from_data_attr")
-                if vimeo_id_attr_name and iframe_tag.get(vimeo_id_attr_name):
-                    return f"https://player.vimeo.com/video/{iframe_tag.get(vimeo_id_attr_name)}"
-        return None
+            # Materiais e vídeo são extraídos em uma única travessia da página (ou vêm do cache de páginas)
+            lesson_page = self.fetch_lesson_page(lesson_page_url)
+            if lesson_page is None:
+                log(f"    AVISO: Falha ao acessar a página da aula: {lesson_page_url}")
+                self.all_lessons_info.append({"title": lesson_title, "module": module_title, "lesson_page_url": lesson_page_url, "error": "Failed to fetch lesson page"})
+                return
+            materials, video_source_url = lesson_page
+
+        # Baixar Materiais de Apoio
+        log("    Procurando materiais de apoio...")
+        lesson_items = [] # Itens (tipo, chave) desta aula, registrados no manifesto
+        indexed_materials = [] # (nome exibido, url, arquivo) para o índice de busca
+        seen_urls = set()
+        for material_number, (material_text, material_url) in enumerate(materials, start=1):
+            if material_url in seen_urls:
+                continue # Mesmo arquivo listado duas vezes na página
+            seen_urls.add(material_url)
+            material_name = sanitize_filename(material_text or f"material_anexo_{material_number}")
+            # O caminho é resolvido antes de agendar o download: nomes repetidos recebem sufixos na ordem da página
+            file_path, _ = self._material_file_path(material_url, material_name, lesson_download_path)
+            lesson_items.append(("material", self.manifest.key_for(file_path)))
+            indexed_materials.append((material_text or material_name, material_url, file_path))
+            run_material(self._download_file, material_url, material_name, lesson_download_path, "Material", lesson_page_url)
+        found_materials_for_lesson = bool(lesson_items)
+        
+        if not found_materials_for_lesson:
+            log("    Nenhum material de apoio encontrado ou configurado para esta aula.")
+
+        # Baixar Vídeo
+        if video_source_url:
+            log(f"      URL de vídeo/player encontrada: {video_source_url}")
+            run_video(self._download_video_with_yt_dlp, video_source_url, lesson_title, lesson_download_path, lesson_page_url)
+            video_name = self.paths.video_name(lesson_download_path, lesson_title)
+            lesson_items.append(("video", self.manifest.key_for(os.path.join(lesson_download_path, video_name))))
+        else:
+            log("      AVISO: Nenhuma URL de vídeo/player encontrada para yt-dlp nesta página de aula.")
+
+        self.metrics.increment("lessons")
+        self.manifest.record("lesson", lesson_page_url, title=lesson_title, module=module_title,
+                             index=lesson["index"], path=self.manifest.key_for(lesson_download_path), items=lesson_items)
+        if self.course_index is not None:
+            self.course_index.record_lesson(self._course_index_id, self.course_name_for_folder, lesson, indexed_materials,
+                                            video_source_url, video_name if video_source_url else None)
+
+
+    def _extract_lesson_page(self, html, url):
+        return lesson_page_data(self.selector_engine, html, url)
+
+    def _material_file_path(self, file_url, file_name_base, download_path):
+        """Define o caminho final de um material; devolve (caminho, nome com extensão)."""
+        # Tenta obter uma extensão mais precisa
+        _, guessed_ext = os.path.splitext(file_url.split('?')[0].split('#')[0])
+        if not guessed_ext or len(guessed_ext) > 5 or len(guessed_ext) < 2:
+             # Heurística para nome de material (ex: "Slides Aula 1.pdf")
+            base_name_for_ext, ext_from_name = os.path.splitext(file_name_base)
+            if ext_from_name and len(ext_from_name) > 1 and len(ext_from_name) < 6:
+                guessed_ext = ext_from_name
+                file_name_base = base_name_for_ext # Usa o nome sem a extensão original
+            else:
+                guessed_ext = ".dat" # Default
 
+        return self.paths.file_path(download_path, file_url, file_name_base, guessed_ext)
 
-    def _download_file(self, file_url, file_name_base, download_path, file_type="Arquivo"):
+    def _download_file(self, file_url, file_name_base, download_path, file_type="Arquivo", referer_url=None):
         """Baixa um arquivo genérico (usado para materiais)."""
         try:
-            # Tenta obter uma extensão mais precisa
-            _, guessed_ext = os.path.splitext(file_url.split('?')[0].split('#')[0])
-            if not guessed_ext or len(guessed_ext) > 5 or len(guessed_ext) < 2:
-                 # Heurística para nome de material (ex: "Slides Aula 1.pdf")
-                base_name_for_ext, ext_from_name = os.path.splitext(file_name_base)
-                if ext_from_name and len(ext_from_name) > 1 and len(ext_from_name) < 6:
-                    guessed_ext = ext_from_name
-                    file_name_base = base_name_for_ext # Usa o nome sem a extensão original
+            file_path, file_name_with_ext = self._material_file_path(file_url, file_name_base, download_path)
+
+            extra_headers = {'Referer': referer_url} if referer_url else {}
+            manifest_key = self.manifest.key_for(file_path) if self.manifest else None
+            entry = self.manifest.get("material", manifest_key) if self.manifest else None
+            # Download anterior incompleto, com falha ou não verificado: será retomado/refeito/verificado
+            known = entry if entry and entry.get("status") == STATUS_COMPLETE else None
+            if known:
+                if not self.sync:
+                    log(f"        {file_type} '{file_name_with_ext}' já baixado (manifesto). Pulando.")
+                    self.metrics.increment("skipped", kind="material", reason="manifest")
+                    return
+                # Modo sync: revalida com o servidor e só baixa de novo se o arquivo mudou
+                if known.get("etag"):
+                    extra_headers['If-None-Match'] = known["etag"]
+                if known.get("last_modified"):
+                    extra_headers['If-Modified-Since'] = known["last_modified"]
+            elif (not entry or entry.get("status") == STATUS_UNVERIFIED) and os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+                # Arquivo baixado antes da existência do manifesto: só é adotado se o tamanho bate com o do servidor
+                if self._adopt_existing_file(file_url, file_path, file_name_with_ext, file_type, manifest_key, extra_headers, referer_url):
+                    return
+
+            action = "Revalidando" if known else "Baixando"
+            log(f"        {action} {file_type}: {file_name_with_ext} de {file_url}")
+            store = self.content_store
+            # Com o repositório de deduplicação, downloads simultâneos da mesma URL esperam o primeiro
+            with store.claim(file_url) if store else contextlib.nullcontext():
+                matched = [] # Hash do blob apontado pelos cabeçalhos da resposta (ETag/tamanho)
+
+                def known_content(response):
+                    matched.append(store.match(file_url, response.headers))
+                    return matched[-1] is not None
+
+                # Baixa para '<arquivo>.part' (retomando com Range se houver um .part anterior) e renomeia ao concluir
+                download = ResumableDownload(
+                    lambda url, headers: self._make_request(url, extra_headers=headers, stream=True, timeout=60), # Aumenta timeout para arquivos
+                    file_url, file_path, headers=extra_headers, chunk_size=self.chunk_size, write_buffer=self.write_buffer,
+                    segments=self.download_segments, segment_min_size=self.segment_min_size, digest=store is not None,
+                    space=self.disk_guard, throttle=self.bandwidth.job() if self.bandwidth else None
+                )
+                with self.metrics.timer("material_download"):
+                    result = download.run(unchanged=(lambda response: self._is_unchanged(response, known)) if known else None,
+                                          known=known_content if store and not known else None)
+                self.metrics.increment("bytes_downloaded", download.bytes_written, kind="material")
+                self.metrics.observe("disk_write", download.write_seconds, kind="material")
+                self.metrics.increment("downloads", kind="material", status=result.status)
+
+                blob = None
+                size = result.size
+                if result.status == "unchanged":
+                    log(f"        {file_type} '{file_name_with_ext}' sem alterações no servidor.")
+                    self.metrics.increment("skipped", kind="material", reason="unchanged")
+                    return
+                if result.status == "known":
+                    # Conteúdo já no repositório (outra aula, outro curso ou execução anterior): só cria o vínculo
+                    blob = matched[-1]
+                    store.materialize(blob, file_path)
+                    size = os.path.getsize(file_path)
+                    log(f"        {file_type} '{file_name_with_ext}' já está no repositório de deduplicação; vinculado sem baixar.")
+                    self.metrics.increment("dedup_hits", source="headers")
+                    self.metrics.increment("dedup_bytes_saved", size)
+                    manifest_status = STATUS_COMPLETE
+                elif result.status == "complete":
+                    resumed = f" (retomado a partir de {result.resumed_from} bytes)" if result.resumed_from else ""
+                    log(f"        {file_type} '{file_name_with_ext}' baixado{resumed}.")
+                    manifest_status = STATUS_COMPLETE
+                    if store:
+                        blob = download.sha256 or hash_file(file_path)
+                        if store.adopt(file_path, blob, file_url, size, result.etag, result.last_modified):
+                            log(f"        Conteúdo idêntico a um material já baixado: '{file_name_with_ext}' agora é um vínculo para ele.")
+                            self.metrics.increment("dedup_hits", source="content")
+                            self.metrics.increment("dedup_disk_saved", size)
+                elif result.status == "partial":
+                    log(f"        AVISO: {file_type} '{file_name_with_ext}' incompleto ({result.size} de {result.expected_size} bytes). Será retomado na próxima execução.")
+                    manifest_status = STATUS_PARTIAL
                 else:
-                    guessed_ext = ".dat" # Default
-
-            file_name_with_ext = f"{sanitize_filename(file_name_base)}{guessed_ext}"
-            file_path = os.path.join(download_path, file_name_with_ext)
-
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                print(f"        {file_type} '{file_name_with_ext}' já existe. Pulando.")
-                return
-
-            print(f"        Baixando {file_type}: {file_name_with_ext} de {file_url}")
-            response = self._make_request(file_url, stream=True, timeout=60) # Aumenta timeout para arquivos
-            if response and response.status_code == 200 :
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=81920): # Chunk maior para arquivos
-                        f.write(chunk)
-                print(f"        {file_type} '{file_name_with_ext}' baixado.")
-            else:
-                print(f"        Falha ao baixar {file_type}: {file_name_base}. Status: {response.status_code if response else 'N/A'}")
+                    log(f"        Falha ao baixar {file_type}: {file_name_base}. Status: {result.http_status or 'N/A'}")
+                    manifest_status = STATUS_FAILED
+                if self.manifest:
+                    self.manifest.record("material", manifest_key, status=manifest_status, url=file_url, size=size,
+                                         etag=result.etag, last_modified=result.last_modified, lesson_url=referer_url,
+                                         **({"blob": blob} if blob else {}))
         except Exception as e:
-            print(f"        Erro ao baixar {file_type} '{file_name_base}': {e}")
+            log(f"        Erro ao baixar {file_type} '{file_name_base}': {e}")
+
+    def _adopt_existing_file(self, file_url, file_path, file_name_with_ext, file_type, manifest_key, extra_headers, referer_url):
+        """
+        Confere um arquivo já existente (sem registro concluído no manifesto) com um HEAD: com o mesmo
+        tamanho do servidor, é registrado como concluído; sem como confirmar (sem HEAD ou Content-Length),
+        é mantido e registrado como não verificado, e a conferência se repete na próxima execução.
+        Devolve False se o tamanho difere (arquivo truncado de uma execução antiga): deve ser baixado de novo.
+        """
+        size = os.path.getsize(file_path)
+        response = self._make_request(file_url, method="HEAD", extra_headers=extra_headers)
+        remote_size = etag = last_modified = None
+        if response is not None:
+            response.close()
+            length = response.headers.get('Content-Length')
+            if response.status_code == 200 and response.headers.get('Content-Encoding', 'identity') == 'identity' and length and length.isdigit():
+                remote_size = int(length)
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        if remote_size is not None and remote_size != size:
+            log(f"        {file_type} '{file_name_with_ext}' já existe, mas com {size} de {remote_size} bytes. Baixando de novo.")
+            return False
+        verified = remote_size is not None
+        log(f"        {file_type} '{file_name_with_ext}' já existe{'' if verified else ' (tamanho não confirmado pelo servidor)'}. Pulando.")
+        self.metrics.increment("skipped", kind="material", reason="exists" if verified else "exists_unverified")
+        if self.manifest:
+            self.manifest.record("material", manifest_key, status=STATUS_COMPLETE if verified else STATUS_UNVERIFIED, url=file_url,
+                                 size=size, lesson_url=referer_url,
+                                 **({"etag": etag, "last_modified": last_modified} if verified else {}))
+        return True
+
+    def _is_unchanged(self, response, known):
+        """Indica se a resposta de revalidação mostra que o arquivo conhecido não mudou."""
+        if response.status_code == 304:
+            return True
+        if response.status_code not in (200, 206):
+            return False
+        etag = response.headers.get('ETag')
+        if etag and known.get("etag"):
+            return etag == known["etag"]
+        last_modified = response.headers.get('Last-Modified')
+        if last_modified and known.get("last_modified"):
+            return last_modified == known["last_modified"]
+        return False
 
 
     def _download_video_with_yt_dlp(self, video_player_url, lesson_title, download_path, referer_url):
         """Chama o yt-dlp para baixar o vídeo."""
-        clean_lesson_title = sanitize_filename(lesson_title)
+        clean_lesson_title = self.paths.video_name(download_path, lesson_title)
         # yt-dlp determinará a extensão. Usamos um placeholder que ele entende.
         video_filepath_template = os.path.join(download_path, f"{clean_lesson_title}.%(ext)s")
 
-        # Checa se o vídeo já existe com extensões comuns (yt-dlp pode escolher mp4, mkv, webm etc.)
-        video_exists = False
-        possible_extensions = ['.mp4', '.mkv', '.webm', '.flv', '.avi', '.mov', '.ts']
-        for ext_check in possible_extensions:
-            # Verifica o nome do arquivo base sanitizado + extensão
-            if os.path.exists(os.path.join(download_path, f"{clean_lesson_title}{ext_check}")):
-                video_exists = True
-                print(f"        Vídeo '{clean_lesson_title}{ext_check}' parece já existir. Pulando.")
-                break
-        
-        if not video_exists:
-            print(f"        Iniciando download do vídeo: {clean_lesson_title} (de {video_player_url})")
+        manifest_key = self.manifest.key_for(os.path.join(download_path, clean_lesson_title)) if self.manifest else None
+        if self.manifest and self.manifest.is_complete("video", manifest_key):
+            log(f"        Vídeo '{clean_lesson_title}' já baixado (manifesto). Pulando.")
+            self.metrics.increment("skipped", kind="video", reason="manifest")
+            return
+
+        # Sem registro concluído no manifesto: checa se o vídeo já existe com extensões comuns (yt-dlp pode escolher
+        # mp4, mkv, webm etc.). Não há como conferir o tamanho sem o yt-dlp, e o arquivo pode ter ficado truncado
+        # (yt-dlp interrompido): ele é mantido como não verificado, a aula não conta como concluída e --sync o baixa de novo
+        existing_video = None
+        entry = self.manifest.get("video", manifest_key) if self.manifest else None
+        if not self.sync and (not entry or entry.get("status") == STATUS_UNVERIFIED):
+            existing_video = self._find_video_file(download_path, clean_lesson_title)
+        if existing_video:
+            log(f"        Vídeo '{os.path.basename(existing_video)}' parece já existir (não verificado; use --sync para baixá-lo de novo). Pulando.")
+            self.metrics.increment("skipped", kind="video", reason="exists_unverified")
+            if self.manifest and not entry:
+                self.manifest.record("video", manifest_key, status=STATUS_UNVERIFIED, url=video_player_url,
+                                     path=self.manifest.key_for(existing_video), lesson_url=referer_url)
+        else:
+            log(f"        Iniciando download do vídeo: {clean_lesson_title} (de {video_player_url})")
             try:
-                command = [
-                    self.yt_dlp_path,
-                    '--referer', referer_url,
-                    '-o', video_filepath_template,
-                    '--no-playlist',
-                    '--force-overwrites', # Se um download parcial falhou, tenta de novo
-                    '--retries', '3',
-                    '--fragment-retries', '3',
-                    '--socket-timeout', '60',
-                    '--progress',
-                    '--no-warnings',
-                    # Sem -f, deixa yt-dlp escolher o melhor.
-                    # Para forçar qualidade e formato (ex: melhor mp4 até 1080p):
-                    # '-f', 'bestvideo[height<=?1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=?1080][ext=mp4]/best[height<=?1080]',
-                    video_player_url
-                ]
-                print(f"        Executando: {' '.join(command)}")
-                subprocess.run(command, check=True) # check=True fará o script parar se yt-dlp retornar erro
-                print(f"        Download do vídeo '{clean_lesson_title}' concluído.")
-            except FileNotFoundError:
-                print(f"        ERRO CRÍTICO: '{self.yt_dlp_path}' não encontrado. Verifique a instalação e YT_DLP_PATH.")
-            except subprocess.CalledProcessError as e:
-                print(f"        ERRO no yt-dlp para '{clean_lesson_title}': {e.returncode}")
+                if self.disk_guard:
+                    # Tamanho do vídeo desconhecido antes do yt-dlp: só garante o espaço livre mínimo
+                    self.disk_guard.wait(os.path.join(download_path, clean_lesson_title), 0)
+                job = VideoJob(video_player_url, video_filepath_template, referer_url, clean_lesson_title)
+                log(f"        Executando: {self.video_scheduler.describe(job)}")
+                result = self.video_scheduler.run(job) # Espera uma vaga de processo; tenta de novo com backoff se falhar
+                self.metrics.increment("downloads", kind="video", status="complete" if result.ok else "failed")
+                if result.ok:
+                    retries = f" após {result.attempts} tentativas" if result.attempts > 1 else ""
+                    log(f"        Download do vídeo '{clean_lesson_title}' concluído{retries}.")
+                    video_file = result.path or self._find_video_file(download_path, clean_lesson_title)
+                    if video_file:
+                        self.metrics.increment("bytes_downloaded", os.path.getsize(video_file), kind="video")
+                    if self.manifest:
+                        self.manifest.record("video", manifest_key, url=video_player_url, lesson_url=referer_url,
+                                             path=self.manifest.key_for(video_file) if video_file else None)
+                elif result.returncode is None:
+                    log(f"        ERRO CRÍTICO: '{self.yt_dlp_path}' não encontrado. Verifique a instalação e YT_DLP_PATH.")
+                else:
+                    log(f"        ERRO no yt-dlp para '{clean_lesson_title}': {result.returncode} ({result.attempts} tentativas). {result.error or ''}".rstrip())
+                    if self.manifest:
+                        self.manifest.record("video", manifest_key, status=STATUS_FAILED, url=video_player_url, lesson_url=referer_url)
             except Exception as e:
-                print(f"        Erro inesperado no download do vídeo '{clean_lesson_title}': {e}")
\ No newline at end of file
+                log(f"        Erro inesperado no download do vídeo '{clean_lesson_title}': {e}")
+
+    @staticmethod
+    def _find_video_file(download_path, clean_lesson_title):
+        """Procura o vídeo da aula com as extensões que o yt-dlp costuma gerar."""
+        for ext_check in ['.mp4', '.mkv', '.webm', '.flv', '.avi', '.mov', '.ts']:
+            candidate = os.path.join(download_path, f"{clean_lesson_title}{ext_check}")
+            if os.path.exists(candidate):
+                return candidate
+        return None
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+
+STATUS_COMPLETE = "complete"
+STATUS_PARTIAL = "partial"
+STATUS_FAILED = "failed"
+STATUS_UNVERIFIED = "unverified" # Arquivo encontrado no disco cujo tamanho o servidor não confirmou
+
+
+class DownloadManifest:
+    """
+    Manifesto append-only (JSONL) dos downloads de um curso, salvo na pasta do curso.
+
+    Cada linha registra um item (aula, material ou vídeo) identificado por (tipo, chave);
+    a última linha de um item prevalece. Aulas usam a URL da página como chave e
+    arquivos usam o caminho relativo à pasta do curso (o mesmo material pode aparecer
+    em várias aulas). Assim, re-execuções sabem o que já foi concluído sem varrer o
+    sistema de arquivos.
+    """
+    FILE_NAME = ".manifest.jsonl"
+
+    def __init__(self, course_folder):
+        self.course_folder = course_folder
+        self.path = os.path.join(course_folder, self.FILE_NAME)
+        self._lock = threading.Lock()
+        self._entries = {}
+        lines_read = self._load()
+        # Compacta o arquivo quando há muitas linhas obsoletas (itens regravados)
+        if lines_read > 2 * len(self._entries) + 100:
+            self._rewrite()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        lines_read = 0
+        if not os.path.exists(self.path):
+            return lines_read
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                lines_read += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue # Linha truncada por uma interrupção no meio da escrita
+                self._entries[(entry["kind"], entry["key"])] = entry
+        return lines_read
+
+    def _rewrite(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(temp_path, self.path)
+
+    def key_for(self, path):
+        """Chave de um arquivo: caminho relativo à pasta do curso, com '/' em qualquer sistema."""
+        return os.path.relpath(path, self.course_folder).replace(os.sep, "/")
+
+    def get(self, kind, key):
+        return self._entries.get((kind, key))
+
+    def is_complete(self, kind, key):
+        entry = self._entries.get((kind, key))
+        return bool(entry) and entry.get("status") == STATUS_COMPLETE
+
+    def record(self, kind, key, status=STATUS_COMPLETE, **fields):
+        entry = {"kind": kind, "key": key, "status": status, "updated_at": int(time.time())}
+        entry.update(fields)
+        with self._lock:
+            self._entries[(kind, key)] = entry
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+        return entry
+
+    def lesson_is_complete(self, lesson_url):
+        """Uma aula está concluída quando ela e todos os itens registrados para ela estão concluídos."""
+        entry = self.get("lesson", lesson_url)
+        if not entry or entry.get("status") != STATUS_COMPLETE:
+            return False
+        return all(self.is_complete(kind, key) for kind, key in entry.get("items", []))
+
+    def close(self):
+        with self._lock:
+            self._file.close()
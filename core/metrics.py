@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Metrics:
+    """
+    Contadores e temporizadores do motor, seguros entre threads.
+
+    Cada série é identificada pelo nome e por rótulos (ex.: host, tipo de página). Os
+    temporizadores guardam quantidade, soma e máximo das durações em segundos. Ao fim da
+    execução, summary() devolve tudo em um dict (exportado em JSON por write_json) e
+    write_prometheus grava o formato de texto do Prometheus (para o textfile collector
+    do node_exporter). Contadores são exportados com o sufixo '_total' e temporizadores
+    como summaries com o sufixo '_seconds'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {} # (nome, rótulos) -> valor
+        self._timers = {} # (nome, rótulos) -> [quantidade, soma, máximo]
+        self.started_at = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                self._timers[key] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_total(self, name, **labels):
+        """Soma do contador em todas as séries que têm os rótulos informados."""
+        wanted = set(self._key(name, labels)[1])
+        with self._lock:
+            return sum(value for (key_name, key_labels), value in self._counters.items()
+                       if key_name == name and wanted <= set(key_labels))
+
+    def timer_total(self, name, **labels):
+        """(quantidade, soma em segundos) do temporizador em todas as séries com os rótulos informados."""
+        wanted = set(self._key(name, labels)[1])
+        count = total = 0
+        with self._lock:
+            for (key_name, key_labels), (timer_count, timer_sum, _) in self._timers.items():
+                if key_name == name and wanted <= set(key_labels):
+                    count += timer_count
+                    total += timer_sum
+        return count, total
+
+    def summary(self):
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            timers = [{"name": name, "labels": dict(labels), "count": count, "total_seconds": round(total, 6),
+                       "mean_seconds": round(total / count, 6), "max_seconds": round(maximum, 6)}
+                      for (name, labels), (count, total, maximum) in sorted(self._timers.items())]
+        return {
+            "started_at": int(self.started_at),
+            "duration_seconds": round(time.time() - self.started_at, 3),
+            "counters": counters,
+            "timers": timers,
+        }
+
+    def write_json(self, path):
+        self._write(path, json.dumps(self.summary(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path, prefix="organizador_cursos"):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted(self._timers.items())
+        lines = []
+
+        def series(name, labels, value):
+            label_text = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            series(metric, labels, value)
+        for name in dict.fromkeys(name for (name, _), _ in timers):
+            # Cada família fica contígua no arquivo: o summary (_count/_sum) e depois o gauge do máximo
+            metric = f"{prefix}_{name}_seconds"
+            family = [(labels, timer) for (timer_name, labels), timer in timers if timer_name == name]
+            lines.append(f"# TYPE {metric} summary")
+            for labels, (count, total, _) in family:
+                series(f"{metric}_count", labels, count)
+                series(f"{metric}_sum", labels, f"{total:.6f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            for labels, (_, _, maximum) in family:
+                series(f"{metric}_max", labels, f"{maximum:.6f}")
+        lines.append(f"# TYPE {prefix}_run_started_timestamp_seconds gauge")
+        series(f"{prefix}_run_started_timestamp_seconds", (), int(self.started_at))
+        self._write(path, "\n".join(lines) + "\n")
+
+    @staticmethod
+    def _write(path, text):
+        # Escrita atômica: o textfile collector nunca lê um arquivo pela metade
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+    def report_lines(self):
+        """Resumo legível de onde o tempo da execução foi gasto (rede, parsing, disco, yt-dlp)."""
+        requests, request_seconds = self.timer_total("http_request")
+        parses, parse_seconds = self.timer_total("page_parse")
+        _, disk_seconds = self.timer_total("disk_write")
+        videos, yt_dlp_seconds = self.timer_total("yt_dlp")
+        downloaded = self.counter_total("bytes_downloaded")
+        lines = [
+            f"  Rede: {requests} requisições, {request_seconds:.1f} s até os cabeçalhos; "
+            f"{self.counter_total('http_retries')} novas tentativas, {self.counter_total('http_errors')} erros de rede",
+            f"  Parsing: {parses} páginas, {parse_seconds:.2f} s; {self.counter_total('page_cache', result='not_modified')} "
+            f"páginas revalidadas pelo cache",
+            f"  Disco: {downloaded / 1024 ** 2:.1f} MB baixados, {disk_seconds:.2f} s de escrita",
+            f"  yt-dlp: {videos} execuções, {yt_dlp_seconds:.1f} s",
+            f"  Pulados: {self.counter_total('skipped')} itens já baixados",
+        ]
+        if self.counter_total("dedup_hits"):
+            lines.append(f"  Deduplicação: {self.counter_total('dedup_hits', source='headers')} materiais vinculados sem baixar "
+                         f"({self.counter_total('dedup_bytes_saved') / 1024 ** 2:.1f} MB), "
+                         f"{self.counter_total('dedup_hits', source='content')} cópias trocadas por vínculos "
+                         f"({self.counter_total('dedup_disk_saved') / 1024 ** 2:.1f} MB)")
+        return lines
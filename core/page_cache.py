@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class PageCache:
+    """
+    Cache em disco das páginas HTML (curso e aulas), limitado a 'max_size' bytes com
+    descarte LRU.
+
+    Cada página tem dois arquivos: '<chave>.html' com o corpo e '<chave>.json' com os
+    validadores (ETag/Last-Modified), o hash do corpo e os resultados da extração
+    (módulos, aulas, materiais e vídeo), marcados com a impressão digital dos seletores
+    que os produziram. Uma página revalidada com 304 (ou que voltou idêntica) não
+    precisa ser baixada nem analisada de novo. A data de modificação do '.json'
+    registra o último uso, para o LRU sobreviver entre execuções.
+    """
+
+    def __init__(self, directory, max_size=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._index = {} # chave -> [último uso, tamanho em bytes]
+        self._total_size = 0
+        os.makedirs(directory, exist_ok=True)
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json"):
+                key = entry.name[:-5]
+                size = entry.stat().st_size + self._size_of(key + ".html")
+                self._index[key] = [entry.stat().st_mtime, size]
+                self._total_size += size
+
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def _size_of(self, name):
+        try:
+            return os.path.getsize(os.path.join(self.directory, name))
+        except OSError:
+            return 0
+
+    def get(self, url):
+        """Devolve os metadados da página em cache (validadores, hash, extrações), ou None."""
+        key = self.key_for(url)
+        if key not in self._index:
+            return None
+        try:
+            with open(self._path(key, ".json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self._forget(key)
+            return None
+        return meta if meta.get("url") == url else None
+
+    def body(self, url):
+        try:
+            with open(self._path(self.key_for(url), ".html"), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def validators(meta):
+        """Cabeçalhos de requisição condicional para revalidar a página em cache."""
+        headers = {}
+        if meta.get("etag"):
+            headers['If-None-Match'] = meta["etag"]
+        if meta.get("last_modified"):
+            headers['If-Modified-Since'] = meta["last_modified"]
+        return headers
+
+    @staticmethod
+    def extracted(meta, kind, fingerprint):
+        """Resultado de extração salvo para a página, se produzido pelos mesmos seletores."""
+        saved = (meta.get("extracted") or {}).get(kind)
+        if saved and saved.get("fingerprint") == fingerprint:
+            return saved["data"]
+        return None
+
+    @staticmethod
+    def body_hash(html):
+        return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+    def store(self, url, html, etag=None, last_modified=None, kind=None, fingerprint=None, data=None):
+        """Grava (ou substitui) a página com seus validadores e o resultado da extração."""
+        key = self.key_for(url)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "body_hash": self.body_hash(html),
+                "extracted": {kind: {"fingerprint": fingerprint, "data": data}} if kind else {}}
+        self._write(key, ".html", html)
+        self._write(key, ".json", json.dumps(meta, ensure_ascii=False))
+        self._register(key)
+
+    def touch(self, url, meta=None):
+        """
+        Marca a página como usada agora (LRU). Com 'meta', regrava os metadados
+        (ex.: uma extração nova para um corpo que não mudou).
+        """
+        key = self.key_for(url)
+        if meta is not None:
+            self._write(key, ".json", json.dumps(meta, ensure_ascii=False))
+        else:
+            try:
+                os.utime(self._path(key, ".json"))
+            except OSError:
+                return
+        self._register(key)
+
+    def discard(self, url):
+        self._forget(self.key_for(url))
+
+    def _write(self, key, extension, text):
+        path = self._path(key, extension)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+    def _register(self, key):
+        size = self._size_of(key + ".html") + self._size_of(key + ".json")
+        with self._lock:
+            previous = self._index.get(key)
+            self._total_size += size - (previous[1] if previous else 0)
+            self._index[key] = [time.time(), size]
+            if self._total_size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        """Remove as páginas usadas há mais tempo até o cache caber no limite (chamado com o lock)."""
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][0]):
+            if self._total_size <= self.max_size:
+                break
+            self._forget(key, locked=True)
+
+    def _forget(self, key, locked=False):
+        if not locked:
+            with self._lock:
+                return self._forget(key, locked=True)
+        entry = self._index.pop(key, None)
+        if entry:
+            self._total_size -= entry[1]
+        for extension in (".html", ".json"):
+            try:
+                os.remove(self._path(key, extension))
+            except OSError:
+                pass
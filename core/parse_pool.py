@@ -0,0 +1,89 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .pipeline import log
+from .selectors import SelectorEngine
+
+
+def lesson_page_data(selector_engine, html, url):
+    """Descritor compacto da página da aula: {"materials": [[nome, url]], "video": url ou None}."""
+    materials, video_url = selector_engine.extract_lesson(html, url)
+    return {"materials": [list(material) for material in materials], "video": video_url}
+
+
+# Tipo de página (o 'kind' do cache de páginas) -> extração
+PAGE_EXTRACTORS = {
+    "course": lambda selector_engine, html, url: selector_engine.extract_course(html, url),
+    "module": lambda selector_engine, html, url: selector_engine.extract_module_lessons(html, url),
+    "lesson": lesson_page_data,
+}
+
+_worker_engines = {} # (impressão digital, parser) -> SelectorEngine, em cada processo do pool
+
+
+def _init_worker(configs):
+    """Inicializador de cada processo do pool: compila uma vez os seletores de cada adaptador."""
+    for (fingerprint, parser), selectors in configs.items():
+        _worker_engines[(fingerprint, parser)] = SelectorEngine(selectors, parser)
+
+
+def _extract_in_worker(key, kind, html, url):
+    return PAGE_EXTRACTORS[kind](_worker_engines[key], html, url)
+
+
+class ParsePool:
+    """
+    Processos dedicados à análise do HTML (opção --parse_processes).
+
+    A rede continua nas threads do processo principal; só o texto da página vai para um
+    processo do pool, que roda a extração do adaptador e devolve o descritor compacto
+    (títulos, URLs de aulas, materiais e vídeo), nunca a árvore do HTML. Os seletores vão
+    para os processos uma única vez, no inicializador, e cada processo guarda o
+    SelectorEngine compilado; um adaptador novo (modo em lote) recria o pool com os
+    seletores de todos os adaptadores já vistos. A análise escala com os núcleos em
+    vez de disputar o GIL; quantas páginas são analisadas ao mesmo tempo ainda depende
+    de quantas threads buscam páginas (--workers).
+
+    Os processos são criados na primeira página. Se o pool quebrar (ex.: um processo morto
+    pelo sistema), as páginas voltam a ser analisadas no próprio processo.
+    """
+
+    def __init__(self, processes):
+        self.processes = max(1, processes)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._configs = {} # (impressão digital, parser) -> seletores, enviados aos processos pelo inicializador
+        self._broken = False
+
+    def _submit(self, selector_engine, kind, html, url):
+        key = (selector_engine.fingerprint, selector_engine.backend.name)
+        with self._lock:
+            if key not in self._configs:
+                self._configs[key] = dict(selector_engine.config)
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False) # As páginas já enviadas terminam no pool antigo
+                    self._executor = None
+            if self._executor is None:
+                # 'spawn': 'fork' com threads ativas pode copiar locks travados, e os processos ficam como filhos
+                # diretos deste (o tempo de CPU deles entra no dos subprocessos)
+                self._executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_worker, initargs=(dict(self._configs),))
+            return self._executor.submit(_extract_in_worker, key, kind, html, url)
+
+    def extract(self, selector_engine, kind, html, url):
+        """Extrai a página em um processo do pool (ou localmente, se o pool quebrou)."""
+        if not self._broken:
+            try:
+                return self._submit(selector_engine, kind, html, url).result()
+            except BrokenProcessPool:
+                self._broken = True
+                log("    AVISO: O pool de processos de parsing parou; as páginas serão analisadas neste processo.")
+        return PAGE_EXTRACTORS[kind](selector_engine, html, url)
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,127 @@
+import os
+import threading
+
+from .utils import sanitize_filename
+
+# Limite do caminho completo: MAX_PATH do Windows (sem o suporte a caminhos longos) ou PATH_MAX do POSIX
+DEFAULT_MAX_PATH_LENGTH = 259 if os.name == "nt" else 4095
+MAX_COMPONENT_BYTES = 255 # NAME_MAX da maioria dos sistemas de arquivos (ext4, NTFS, APFS), em bytes UTF-8
+# Folga para os sufixos acrescentados depois: '.part.json', temporários da deduplicação, extensões do yt-dlp
+PATH_SUFFIX_RESERVE = 40
+MIN_COMPONENT_LENGTH = 12
+# Espaço garantido para cada nível abaixo da pasta do curso (módulo, aula, arquivo) ao limitar o nome do curso
+LEVEL_RESERVE = 40
+
+
+def fit_component(name, max_length, max_bytes=MAX_COMPONENT_BYTES):
+    """Corta o nome para caber em max_length caracteres e max_bytes bytes (UTF-8), sem terminar em ponto ou espaço."""
+    name = name[:max(1, max_length)]
+    while len(name.encode("utf-8")) > max_bytes:
+        name = name[:-1]
+    return name.rstrip(". ") or "_"
+
+
+class PathPlanner:
+    """
+    Planeja os caminhos de um curso: <saída>/<curso>/<módulo>/<aula>/<arquivo>.
+
+    - Nomes sanitizados são memoizados (sanitize_filename tem cache) e as pastas já
+      criadas ficam registradas em memória: cada pasta custa um mkdir, uma única vez.
+    - Materiais diferentes cujos nomes coincidem na mesma pasta (inclusive só na
+      caixa, por causa de Windows/macOS) recebem sufixos ' (2)', ' (3)'... na ordem em
+      que são planejados (a ordem da página da aula), de forma determinística entre
+      execuções. A mesma URL na mesma pasta sempre recebe o mesmo caminho.
+    - O caminho inteiro respeita 'max_path_length': com pouco espaço, módulo e aula
+      recebem orçamentos fixos por curso (o mesmo módulo sempre vira a mesma pasta) e o
+      nome do arquivo fica com o restante. Cada componente também é limitado a 255 bytes.
+    """
+
+    def __init__(self, base_output_path, course_name_for_folder, max_path_length=DEFAULT_MAX_PATH_LENGTH):
+        self.max_path_length = max_path_length
+        base_length = len(base_output_path) + 1
+        budget = max_path_length - base_length - PATH_SUFFIX_RESERVE
+        course_name = fit_component(sanitize_filename(course_name_for_folder), max(MIN_COMPONENT_LENGTH, budget - 3 * LEVEL_RESERVE))
+        self.course_folder = os.path.join(base_output_path, course_name)
+        # Orçamento restante dividido entre módulo, aula e arquivo
+        remaining = budget - len(course_name) - 1
+        self.folder_budget = max(MIN_COMPONENT_LENGTH, remaining // 3 - 1)
+        self._lock = threading.Lock()
+        self._created = set()
+        self._claims = {} # pasta -> {nome em minúsculas: URL}
+        self._resolved = {} # (pasta, URL) -> (caminho, nome do arquivo)
+
+    # --- Pastas ---
+
+    def lesson_folder(self, module_title, lesson_folder_name):
+        """Caminho da pasta da aula (sem criá-la); o mesmo módulo resulta sempre na mesma pasta."""
+        module_name = fit_component(sanitize_filename(module_title), self.folder_budget)
+        lesson_name = fit_component(sanitize_filename(lesson_folder_name), self.folder_budget)
+        return os.path.join(self.course_folder, module_name, lesson_name)
+
+    def ensure_folder(self, path):
+        """Cria a pasta (e as superiores) se ainda não foi criada nesta execução; levanta OSError se falhar."""
+        if path in self._created:
+            return path
+        parent = os.path.dirname(path)
+        if parent in self._created:
+            try:
+                os.mkdir(path)
+            except FileExistsError:
+                pass
+        else:
+            os.makedirs(path, exist_ok=True)
+        with self._lock:
+            # Todas as pastas acima também existem agora
+            folder = path
+            while folder and folder not in self._created and folder != os.path.dirname(folder):
+                self._created.add(folder)
+                folder = os.path.dirname(folder)
+        return path
+
+    def create_lesson_folder(self, module_title, lesson_folder_name):
+        """Cria a pasta da aula; se o nome não for aceito, tenta 'aula_<número>'. Devolve None se nada der certo."""
+        lesson_folder_path = self.lesson_folder(module_title, lesson_folder_name)
+        try:
+            return self.ensure_folder(lesson_folder_path)
+        except OSError as e:
+            print(f"Erro ao criar a estrutura de pastas '{lesson_folder_path}': {e}")
+        alternative = os.path.join(os.path.dirname(lesson_folder_path),
+                                   sanitize_filename(f"aula_{lesson_folder_name.split(' ')[0]}"))
+        try:
+            self.ensure_folder(alternative)
+            print(f"Usando caminho alternativo para aula: {alternative}")
+            return alternative
+        except OSError as e:
+            print(f"Erro ao criar caminho alternativo para aula: {e}. Pulando criação de pasta para esta aula.")
+            return None
+
+    # --- Arquivos ---
+
+    def file_path(self, folder, url, base_name, extension):
+        """
+        Caminho final de um arquivo da pasta; devolve (caminho, nome com extensão).
+        Nomes já usados por outra URL na mesma pasta ganham um sufixo numérico.
+        """
+        key = (folder, url)
+        with self._lock:
+            resolved = self._resolved.get(key)
+            if resolved:
+                return resolved
+            claims = self._claims.setdefault(folder, {})
+            budget = self.max_path_length - len(folder) - 1 - len(extension) - PATH_SUFFIX_RESERVE
+            base_name = fit_component(sanitize_filename(base_name), max(MIN_COMPONENT_LENGTH, budget),
+                                      MAX_COMPONENT_BYTES - len(extension.encode("utf-8")) - 8)
+            candidate, number = base_name, 1
+            while claims.get(f"{candidate}{extension}".casefold(), url) != url:
+                number += 1
+                suffix = f" ({number})"
+                candidate = fit_component(base_name, min(len(base_name), max(MIN_COMPONENT_LENGTH, budget) - len(suffix))) + suffix
+            file_name = f"{candidate}{extension}"
+            claims[file_name.casefold()] = url
+            resolved = self._resolved[key] = (os.path.join(folder, file_name), file_name)
+            return resolved
+
+    def video_name(self, folder, title):
+        """Nome-base do vídeo da aula (sem extensão: o yt-dlp escolhe), limitado ao espaço que resta no caminho."""
+        budget = self.max_path_length - len(folder) - 1 - PATH_SUFFIX_RESERVE
+        return fit_component(sanitize_filename(title), max(MIN_COMPONENT_LENGTH, budget), MAX_COMPONENT_BYTES - 24)
@@ -0,0 +1,109 @@
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_local = threading.local()
+
+
+def log(message):
+    """Imprime a mensagem ou a acumula no buffer da aula em processamento (modo concorrente)."""
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        print(message)
+    else:
+        buffer.append(message)
+
+
+def _run_with_buffer(buffer, fn, *args):
+    """Executa fn com o log redirecionado para o buffer informado."""
+    previous = getattr(_local, "buffer", None)
+    _local.buffer = buffer
+    try:
+        return fn(*args)
+    finally:
+        _local.buffer = previous
+
+
+class LessonPipeline:
+    """
+    Pool de workers limitado, com um estágio (e um limite) para cada tipo de trabalho:
+    páginas de aula, materiais de apoio e vídeos (yt-dlp).
+
+    run_lessons pode ser chamado por várias threads ao mesmo tempo: no modo em lote,
+    todos os cursos dividem os mesmos estágios (um orçamento global de concorrência).
+    """
+    def __init__(self, page_workers=1, material_workers=None, video_workers=None):
+        self.page_workers = max(1, page_workers)
+        self.material_workers = max(1, material_workers or self.page_workers)
+        self.video_workers = max(1, video_workers or self.page_workers)
+        self._pages = None
+        self._materials = None
+        self._videos = None
+
+    def __enter__(self):
+        self._pages = ThreadPoolExecutor(self.page_workers, thread_name_prefix="pagina")
+        self._materials = ThreadPoolExecutor(self.material_workers, thread_name_prefix="material")
+        self._videos = ThreadPoolExecutor(self.video_workers, thread_name_prefix="video")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for executor in (self._pages, self._materials, self._videos):
+            executor.shutdown(wait=True, cancel_futures=exc_type is not None)
+        return False
+
+    def run_lessons(self, lessons, process_lesson):
+        """
+        Processa as aulas em paralelo e imprime o log de cada uma, na ordem original,
+        assim que todos os estágios dela terminam.
+
+        'lessons' pode ser um gerador: cada aula é enfileirada assim que é produzida, e as
+        aulas já concluídas são impressas enquanto a descoberta das seguintes continua.
+        process_lesson(lesson, run_material, run_video) deve usar run_material/run_video
+        para enfileirar os downloads nos estágios correspondentes.
+        """
+        pending = deque()
+        for lesson in lessons:
+            buffer = []
+            children = []
+
+            def submit_to(executor, children=children):
+                def run(fn, *args):
+                    # Cada download tem seu próprio buffer, impresso na ordem em que foi enfileirado
+                    child_buffer = []
+                    context = contextvars.copy_context()
+                    children.append((executor.submit(context.run, _run_with_buffer, child_buffer, fn, *args), child_buffer))
+                return run
+
+            # Cada tarefa roda numa cópia do contexto de quem a criou (Referer local à tarefa)
+            page_future = self._pages.submit(
+                contextvars.copy_context().run, _run_with_buffer, buffer, process_lesson, lesson,
+                submit_to(self._materials), submit_to(self._videos)
+            )
+            pending.append((page_future, buffer, children))
+            while pending and self._is_done(*pending[0]):
+                self._finish(*pending.popleft())
+
+        while pending:
+            self._finish(*pending.popleft())
+
+    @staticmethod
+    def _is_done(page_future, buffer, children):
+        # Os estágios filhos são enfileirados pela própria página: com ela concluída, a lista está completa
+        return page_future.done() and all(child_future.done() for child_future, _ in children)
+
+    def _finish(self, page_future, buffer, children):
+        self._wait(page_future, buffer)
+        for child_future, child_buffer in children:
+            self._wait(child_future, child_buffer)
+            buffer.extend(child_buffer)
+        # Um único print: com vários cursos em paralelo, o bloco da aula não se mistura com outros
+        if buffer:
+            print("\n".join(buffer))
+
+    @staticmethod
+    def _wait(future, buffer):
+        try:
+            future.result()
+        except Exception as e:
+            buffer.append(f"    Erro inesperado no processamento da aula: {e}")
@@ -0,0 +1,181 @@
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .pipeline import log
+from .utils import sanitize_filename
+from .video_jobs import VideoJob
+
+PLAN_VERSION = 1
+
+
+def _video_summary(info):
+    """Resumo dos metadados do yt-dlp: tamanho (exato ou estimado), formato e duração."""
+    size = info.get("filesize") or info.get("filesize_approx")
+    if not size and info.get("requested_formats"):
+        # Vídeo e áudio separados (mesclados pelo ffmpeg): soma os dois
+        sizes = [f.get("filesize") or f.get("filesize_approx") for f in info["requested_formats"]]
+        size = sum(sizes) if all(sizes) else None
+    return {
+        "size": int(size) if size else None,
+        "format": info.get("format_id"),
+        "ext": info.get("ext"),
+        "resolution": info.get("resolution"),
+        "duration": info.get("duration"),
+    }
+
+
+def _totals(lessons):
+    totals = {"lessons": len(lessons), "materials": 0, "material_bytes": 0, "videos": 0, "video_bytes": 0,
+              "unknown_sizes": 0}
+    for lesson in lessons:
+        for material in lesson["materials"]:
+            totals["materials"] += 1
+            totals["material_bytes"] += material["size"] or 0
+            totals["unknown_sizes"] += material["size"] is None
+        if lesson["video"]:
+            totals["videos"] += 1
+            totals["video_bytes"] += lesson["video"]["size"] or 0
+            totals["unknown_sizes"] += lesson["video"]["size"] is None
+    totals["total_bytes"] = totals["material_bytes"] + totals["video_bytes"]
+    return totals
+
+
+class CoursePlanner:
+    """
+    Monta o plano de download de um curso sem baixar nada (modo --plan).
+
+    Percorre a estrutura do curso como o download faria, abre as páginas das aulas em
+    paralelo e, para cada material, faz um HEAD (tamanho, tipo, ETag); para cada vídeo,
+    consulta só os metadados no yt-dlp (formato e tamanho estimado). O plano é um JSON
+    com as aulas na ordem do curso e totais por módulo e do curso, que pode ser usado
+    depois em DownloaderEngine.process_course(plan=...) sem percorrer o site de novo.
+    """
+
+    def __init__(self, engine, workers=None, probe_videos=True):
+        self.engine = engine
+        self.workers = max(1, workers or max(engine.workers, engine.material_workers))
+        self.probe_videos = probe_videos
+
+    def build(self):
+        """Devolve o plano (dict) do curso, ou None se o índice do curso não abriu."""
+        engine = self.engine
+        first_page = engine.fetch_course_index()
+        if first_page is None:
+            return None
+        course_folder = engine.paths.course_folder
+
+        futures = []
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="plano") as pages, \
+                ThreadPoolExecutor(self.workers, thread_name_prefix="plano-head") as heads, \
+                ThreadPoolExecutor(engine.video_workers, thread_name_prefix="plano-video") as videos:
+            # As páginas das aulas são abertas à medida que a estrutura é descoberta
+            for lesson in engine.iter_lessons(first_page, create_folders=False):
+                futures.append(pages.submit(contextvars.copy_context().run, self._plan_lesson, lesson, course_folder, heads, videos))
+            planned = [future.result() for future in futures]
+
+        modules = []
+        for lesson in (entry for entry in planned if entry):
+            lesson = self._resolve(lesson)
+            module_title = lesson.pop("module")
+            if not modules or modules[-1]["title"] != module_title:
+                modules.append({"title": module_title, "lessons": []})
+            modules[-1]["lessons"].append(lesson)
+        for module in modules:
+            module["totals"] = _totals(module["lessons"])
+        return {
+            "version": PLAN_VERSION,
+            "created_at": int(time.time()),
+            "platform": engine.config.platform_name,
+            "course_url": engine.main_course_url,
+            "course_name": engine.course_name_for_folder,
+            "totals": _totals([lesson for module in modules for lesson in module["lessons"]]),
+            "modules": modules,
+        }
+
+    def _plan_lesson(self, lesson, course_folder, heads, videos):
+        engine = self.engine
+        if not lesson["url"]:
+            log(f"  AVISO: Aula {lesson['index']:03d} '{lesson['title']}' sem link; fora do plano.")
+            return None
+        lesson_page = engine.fetch_lesson_page(lesson["url"])
+        if lesson_page is None:
+            log(f"  AVISO: Falha ao acessar a página da aula: {lesson['url']}")
+            return None
+        materials, video_url = lesson_page
+
+        planned_materials = []
+        seen_urls = set()
+        for number, (name, url) in enumerate(materials, start=1):
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            material_name = sanitize_filename(name or f"material_anexo_{number}")
+            file_path, _ = engine._material_file_path(url, material_name, lesson["path"])
+            planned_materials.append(({"name": material_name, "url": url,
+                                       "file": os.path.relpath(file_path, course_folder).replace(os.sep, "/")},
+                                      heads.submit(contextvars.copy_context().run, self._head, url, lesson["url"])))
+        video = None
+        if video_url:
+            video_name = engine.paths.video_name(lesson["path"], lesson["title"])
+            job = VideoJob(video_url, os.path.join(lesson["path"], f"{video_name}.%(ext)s"), lesson["url"], video_name)
+            video = ({"url": video_url}, videos.submit(self._probe_video, job) if self.probe_videos else None)
+        return {
+            "module": lesson["module"],
+            "index": lesson["index"],
+            "title": lesson["title"],
+            "url": lesson["url"],
+            "folder": os.path.relpath(lesson["path"], course_folder).replace(os.sep, "/"),
+            "materials": planned_materials,
+            "video": video,
+        }
+
+    @staticmethod
+    def _resolve(lesson):
+        """Junta à aula os resultados dos HEADs e das consultas ao yt-dlp."""
+        lesson["materials"] = [dict(material, **future.result()) for material, future in lesson["materials"]]
+        if lesson["video"]:
+            video, future = lesson["video"]
+            lesson["video"] = dict(video, **(future.result() if future else {"size": None}))
+        return lesson
+
+    def _head(self, url, referer):
+        """Tamanho, tipo e validadores do material, via HEAD (ou GET só dos cabeçalhos se o HEAD não for aceito)."""
+        response = self.engine._make_request(url, method="HEAD", extra_headers={'Referer': referer, 'Accept-Encoding': 'identity'})
+        if response is not None and response.status_code in (405, 501):
+            response = self.engine._make_request(url, extra_headers={'Referer': referer, 'Accept-Encoding': 'identity'}, stream=True)
+            if response is not None:
+                response.close()
+        if response is None or response.status_code != 200:
+            return {"size": None, "error": f"HTTP {response.status_code}" if response is not None else "sem resposta"}
+        length = response.headers.get('Content-Length')
+        return {
+            "size": int(length) if length and length.isdigit() else None,
+            "content_type": response.headers.get('Content-Type'),
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified'),
+            "accept_ranges": response.headers.get('Accept-Ranges') == 'bytes',
+        }
+
+    def _probe_video(self, job):
+        info, error = self.engine.video_scheduler.probe(job)
+        if info is None:
+            return {"size": None, "error": error}
+        return _video_summary(info)
+
+
+def save_plan(plan, path):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def load_plan(path):
+    with open(path, encoding="utf-8") as f:
+        plan = json.load(f)
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"versão de plano não suportada: {plan.get('version')}")
+    return plan
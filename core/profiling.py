@@ -0,0 +1,76 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import tracemalloc
+
+
+class RunProfiler:
+    """
+    Envolve uma execução com cProfile e tracemalloc (opção --profile).
+
+    Até o Python 3.11, o cProfile só enxerga a thread que o ativou: as threads criadas
+    durante a execução (estágios do pipeline, segmentos) ganham cada uma o seu profiler,
+    somado ao principal no fim. Threads que ainda estão vivas ao final ficam de fora. Ao sair, imprime as funções mais custosas e os
+    pontos de maior alocação de memória e grava as estatísticas em 'output_path' (formato
+    pstats, para snakeviz/pstats).
+    """
+
+    def __init__(self, output_path=None, top=25):
+        self.output_path = output_path
+        self.top = top
+        self._profiler = cProfile.Profile()
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._original_run = None
+
+    def __enter__(self):
+        tracemalloc.start()
+        if sys.version_info < (3, 12):
+            self._patch_threads()
+        self._profiler.enable()
+        return self
+
+    def _patch_threads(self):
+        original_run = self._original_run = threading.Thread.run
+        profiles, lock = self._thread_profiles, self._lock
+
+        def profiled_run(thread):
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                original_run(thread)
+            finally:
+                profiler.disable()
+                with lock:
+                    profiles.append(profiler)
+
+        threading.Thread.run = profiled_run
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.disable()
+        if self._original_run is not None:
+            threading.Thread.run = self._original_run
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        with self._lock:
+            for profiler in self._thread_profiles:
+                stats.add(profiler)
+        if self.output_path:
+            stats.dump_stats(self.output_path)
+
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats("cumulative").print_stats(self.top)
+        print(f"\n=== Perfil da execução (cProfile, {len(self._thread_profiles)} threads + principal) ===")
+        print(text.getvalue().strip())
+        print(f"\n=== Memória (tracemalloc): pico {peak / 1024 ** 2:.1f} MB, ainda alocado {current / 1024 ** 2:.1f} MB ===")
+        for statistic in snapshot.statistics("lineno")[:10]:
+            print(f"  {statistic}")
+        if self.output_path:
+            print(f"Estatísticas do cProfile gravadas em {self.output_path}")
+        return False
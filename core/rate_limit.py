@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from .transport import TransportError
+
+# Respostas que indicam sobrecarga ou falha temporária: requisições idempotentes são repetidas
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+# Respostas em que o servidor pede para reduzir o ritmo
+THROTTLE_STATUSES = frozenset((429, 503))
+
+
+class CircuitOpenError(TransportError):
+    """
+    O host falhou seguidamente e está temporariamente bloqueado (circuito aberto). A requisição
+    não foi enviada; 'retry_in' é quanto falta, em segundos, para o host aceitar uma nova tentativa.
+    """
+
+    def __init__(self, message, retry_in):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value):
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos; None se ausente/inválido."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    __slots__ = ("rate", "tokens", "updated", "paused_until", "failures", "open_until")
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+
+
+class HostRateLimiter:
+    """
+    Token bucket por host, com taxa adaptativa (AIMD) e circuit breaker.
+
+    Cada requisição consome um token; a taxa começa em 'initial_rate' requisições/s,
+    cresce 'increase' a cada resposta bem-sucedida (até 'max_rate') e cai pela metade
+    quando o servidor responde 429/503, respeitando o Retry-After. Depois de
+    'failure_threshold' falhas seguidas (erros de rede, 5xx), o host fica bloqueado por
+    'open_seconds': acquire() levanta CircuitOpenError com o tempo restante do bloqueio, e
+    quem chama espera esse tempo e tenta de novo (contando como uma nova tentativa), até
+    que uma tentativa após o bloqueio dê certo. O circuito atrasa o trabalho, não o descarta.
+    """
+
+    def __init__(self, initial_rate=2.0, max_rate=10.0, min_rate=0.1, increase=0.25, decrease=0.5,
+                 failure_threshold=5, open_seconds=60.0):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.initial_rate = min(max(initial_rate, self.min_rate), max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    @classmethod
+    def from_config(cls, platform_config):
+        """Limiter com os parâmetros do adaptador ('delay_between_lesson_pages' define a taxa inicial)."""
+        max_rate = platform_config.max_requests_per_second
+        delay = platform_config.delay_between_lesson_pages
+        return cls(initial_rate=1.0 / delay if delay else max_rate, max_rate=max_rate)
+
+    def _host(self, url):
+        host = urlparse(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.initial_rate)
+        return host, state
+
+    def acquire(self, url):
+        """Espera um token do host da URL; levanta CircuitOpenError se o circuito dele estiver aberto."""
+        with self._lock:
+            host, state = self._host(url)
+            now = time.monotonic()
+            if state.open_until > now:
+                raise CircuitOpenError(f"host {host} bloqueado por falhas seguidas; nova tentativa em {state.open_until - now:.0f}s",
+                                       state.open_until - now)
+            # Reabastece o balde (capacidade: um segundo de requisições) e reserva um token
+            state.tokens = min(max(1.0, state.rate), state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+            state.tokens -= 1.0
+            wait = max(-state.tokens / state.rate, state.paused_until - now, 0.0)
+        if wait:
+            time.sleep(wait)
+
+    def record_response(self, url, status_code, retry_after_header=None):
+        """Ajusta o host conforme a resposta; devolve o Retry-After em segundos (ou None)."""
+        retry_after = parse_retry_after(retry_after_header)
+        with self._lock:
+            _, state = self._host(url)
+            if status_code in THROTTLE_STATUSES:
+                state.rate = max(self.min_rate, state.rate * self.decrease)
+                state.tokens = min(state.tokens, 0.0)
+                if retry_after:
+                    state.paused_until = max(state.paused_until, time.monotonic() + retry_after)
+            if status_code >= 500:
+                self._failure(state)
+            elif status_code not in THROTTLE_STATUSES:
+                state.rate = min(self.max_rate, state.rate + self.increase)
+                state.failures = 0
+        return retry_after
+
+    def record_success(self, url):
+        self.record_response(url, 200)
+
+    def record_failure(self, url):
+        """Registra uma falha sem resposta HTTP (erro de rede, timeout, yt-dlp que falhou)."""
+        with self._lock:
+            self._failure(self._host(url)[1])
+
+    def _failure(self, state):
+        state.failures += 1
+        if state.failures >= self.failure_threshold:
+            state.open_until = time.monotonic() + self.open_seconds
+
+
+class RetryPolicy:
+    """Novas tentativas com backoff exponencial e jitter ('full jitter'), respeitando o Retry-After."""
+
+    def __init__(self, max_retries=3, backoff=1.0, max_backoff=30.0):
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt, retry_after=None):
+        jittered = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        return max(jittered, retry_after or 0.0)
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .disk import preallocate
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+
+DownloadResult = namedtuple("DownloadResult", "status size expected_size etag last_modified resumed_from http_status",
+                            defaults=(0, None, None, None, 0, None))
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+
+class SegmentError(Exception):
+    """Um segmento não pôde ser baixado (o servidor ignorou o Range ou o arquivo mudou)."""
+
+
+def parse_content_range(value):
+    """Retorna (início, fim, total) de um cabeçalho Content-Range, ou None. Campos desconhecidos ('*') viram None."""
+    match = _CONTENT_RANGE_RE.match(value or "")
+    if not match:
+        return None
+    return tuple(None if value in (None, "*") else int(value) for value in match.groups())
+
+
+class ResumableDownload:
+    """
+    Baixa um arquivo para '<destino>.part' e só o move para o destino final (os.replace,
+    atômico) quando o tamanho confere com o anunciado pelo servidor.
+
+    Se o processo for interrompido, a próxima execução continua de onde parou com
+    'Range' + 'If-Range' (o servidor devolve o arquivo inteiro se ele mudou).
+    Arquivos grandes podem ser baixados em vários segmentos paralelos.
+
+    request(url, headers) deve devolver uma resposta em modo stream (ou None em caso de erro).
+    Com digest=True, um download feito do início em um único fluxo calcula o SHA-256 do
+    conteúdo enquanto grava (atributo 'sha256'; None se retomado ou segmentado).
+
+    Com o tamanho conhecido, o espaço do arquivo é pré-alocado (fallocate) antes da escrita.
+    'space' (DiskSpaceGuard) faz o download esperar, sem manter a conexão aberta, até o
+    volume comportar o que falta baixar; 'throttle(n)' (BandwidthLimiter.job()) é chamado
+    antes de gravar cada bloco de n bytes e limita a banda.
+    """
+
+    def __init__(self, request, url, file_path, headers=None, chunk_size=81920, segments=1, segment_min_size=16 * 1024 * 1024,
+                 digest=False, write_buffer=1024 * 1024, space=None, throttle=None):
+        self.request = request
+        self.url = url
+        self.file_path = file_path
+        self.part_path = file_path + PART_SUFFIX
+        self.state_path = file_path + STATE_SUFFIX
+        # Compressão atrapalha Range e a conferência do tamanho
+        self.headers = dict(headers or {}, **{"Accept-Encoding": "identity"})
+        self.chunk_size = chunk_size
+        self.write_buffer = write_buffer
+        self.space = space
+        self.throttle = throttle
+        self._reserved = 0
+        self.segments = max(1, segments)
+        self.segment_min_size = segment_min_size
+        self._state_lock = threading.Lock()
+        # Bytes gravados e tempo gasto nas escritas em disco (separa disco de rede nas métricas)
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self.digest = digest
+        self.sha256 = None
+
+    # --- Estado do .part ---
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("url") != self.url or not os.path.exists(self.part_path):
+            return None
+        return state
+
+    def _save_state(self, state):
+        with self._state_lock:
+            temp_path = self.state_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+
+    def _discard(self):
+        for path in (self.part_path, self.state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _finalize(self, state, size):
+        os.replace(self.part_path, self.file_path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return DownloadResult("complete", size, state.get("total"), state.get("etag"), state.get("last_modified"),
+                              state.get("resumed_from", 0))
+
+    @staticmethod
+    def _validator(state):
+        # If-Range só aceita ETag forte ou Last-Modified
+        etag = state.get("etag")
+        if etag and not etag.startswith("W/"):
+            return etag
+        return state.get("last_modified")
+
+    # --- Download ---
+
+    def run(self, unchanged=None, known=None):
+        """
+        Executa o download. unchanged(response) é opcional: se retornar True para a
+        primeira resposta, nada é baixado e o status 'unchanged' é devolvido.
+        known(response) também: chamado com a resposta de um download novo (não retomado),
+        se retornar True o conteúdo já existe localmente e o status 'known' é devolvido
+        sem ler o corpo.
+        """
+        while True:
+            # Sem espaço em disco, a tentativa espera e devolve None: recomeça com o estado atualizado
+            result = self._attempt(unchanged, known)
+            if result is not None:
+                return result
+
+    def _attempt(self, unchanged, known):
+        state = self._load_state()
+        if state and state.get("segments"):
+            remaining = state["total"] - sum(end - start + 1 for start, end in state["done"])
+            if not self._reserve_space(remaining):
+                return None
+            try:
+                return self._run_segments(state)
+            finally:
+                self._release_space()
+
+        offset = os.path.getsize(self.part_path) if state else 0
+        headers = dict(self.headers)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            validator = self._validator(state)
+            if validator:
+                headers["If-Range"] = validator
+        elif self.segments > 1:
+            headers["Range"] = "bytes=0-" # Descobre o tamanho total e se o servidor aceita Range
+
+        response = self.request(self.url, headers)
+        if response is None:
+            return DownloadResult("failed", offset, resumed_from=offset)
+        if unchanged and unchanged(response):
+            response.close()
+            return DownloadResult("unchanged", http_status=response.status_code)
+        if known and not offset and response.status_code in (200, 206) and known(response):
+            response.close()
+            return DownloadResult("known", expected_size=self._content_length(response), etag=response.headers.get("ETag"),
+                                  last_modified=response.headers.get("Last-Modified"), http_status=response.status_code)
+
+        if response.status_code == 416 and offset and state:
+            # O .part já tem o arquivo inteiro (interrompido antes do rename)
+            content_range = parse_content_range(response.headers.get("Content-Range"))
+            response.close()
+            if content_range and content_range[2] == offset:
+                return self._finalize(state, offset)
+            self._discard()
+            return DownloadResult("failed", http_status=416)
+
+        if response.status_code == 206:
+            start, _, total = parse_content_range(response.headers.get("Content-Range")) or (None, None, None)
+            if start != offset:
+                response.close()
+                self._discard()
+                return DownloadResult("failed", expected_size=total, http_status=206)
+        elif response.status_code == 200:
+            offset = 0 # Servidor ignorou o Range ou o arquivo mudou: recomeça do zero
+            total = self._content_length(response)
+        else:
+            response.close()
+            return DownloadResult("failed", offset, resumed_from=offset, http_status=response.status_code)
+
+        state = {
+            "url": self.url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "total": total,
+            "resumed_from": offset,
+        }
+        if not self._reserve_space(total - offset if total else 0):
+            # Sem espaço agora: solta a conexão enquanto espera e depois pede o arquivo de novo
+            response.close()
+            return None
+        try:
+            if (response.status_code == 206 and offset == 0 and self.segments > 1
+                    and total and total >= self.segment_min_size):
+                return self._start_segments(response, state)
+
+            self._save_state(state)
+            hasher = hashlib.sha256() if self.digest and not offset else None
+            with open(self.part_path, "ab" if offset else "wb", buffering=self.write_buffer) as f:
+                if total and preallocate(f, offset, total - offset):
+                    self._release_space() # Os blocos já saíram do espaço livre do volume
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    self._write(f, chunk)
+                    if hasher:
+                        hasher.update(chunk)
+        finally:
+            self._release_space()
+        size = os.path.getsize(self.part_path)
+        if total is not None and size != total:
+            return DownloadResult("partial", size, total, state["etag"], state["last_modified"], offset, response.status_code)
+        if hasher:
+            self.sha256 = hasher.hexdigest()
+        return self._finalize(state, size)
+
+    def _reserve_space(self, size):
+        """Reserva o espaço do que falta baixar; se não couber, espera e devolve False (o chamador recomeça)."""
+        if self.space is None:
+            return True
+        if self.space.try_reserve(self.part_path, size):
+            self._reserved = size
+            return True
+        self.space.wait(self.part_path, size)
+        return False
+
+    def _release_space(self):
+        if self._reserved:
+            self.space.release(self.part_path, self._reserved)
+            self._reserved = 0
+
+    def _write(self, f, chunk):
+        if self.throttle:
+            self.throttle(len(chunk))
+        started = time.perf_counter()
+        f.write(chunk)
+        elapsed = time.perf_counter() - started
+        with self._state_lock:
+            self.bytes_written += len(chunk)
+            self.write_seconds += elapsed
+
+    @staticmethod
+    def _content_length(response):
+        if response.headers.get("Content-Encoding", "identity") != "identity":
+            return None
+        content_length = response.headers.get("Content-Length")
+        return int(content_length) if content_length and content_length.isdigit() else None
+
+    # --- Download segmentado ---
+
+    def _start_segments(self, first_response, state):
+        total = state["total"]
+        segment_size = -(-total // self.segments)
+        state["segments"] = [[start, min(total, start + segment_size) - 1] for start in range(0, total, segment_size)]
+        state["done"] = []
+        with open(self.part_path, "wb") as f:
+            # Reserva o tamanho final; cada segmento escreve na sua posição
+            if preallocate(f, 0, total, keep_size=False):
+                self._release_space()
+            else:
+                f.truncate(total)
+        self._save_state(state)
+        # A primeira resposta (bytes=0-) é aproveitada para o primeiro segmento
+        return self._run_segments(state, first_response)
+
+    def _run_segments(self, state, first_response=None):
+        pending = [segment for segment in state["segments"] if segment not in state["done"]]
+        errors = []
+
+        def fetch(segment, response=None):
+            try:
+                self._fetch_segment(segment, state, response)
+                with self._state_lock:
+                    state["done"].append(segment)
+                self._save_state(state)
+            except Exception as e:
+                errors.append(e)
+
+        with ThreadPoolExecutor(self.segments, thread_name_prefix="segmento") as executor:
+            for segment in pending:
+                reuse = first_response if segment[0] == 0 else None
+                executor.submit(fetch, segment, reuse)
+
+        size = sum(end - start + 1 for start, end in state["done"])
+        if errors:
+            if any(isinstance(e, SegmentError) for e in errors):
+                self._discard() # O arquivo mudou no servidor: a próxima execução recomeça do zero
+            return DownloadResult("partial", size, state["total"], state["etag"], state["last_modified"])
+        return self._finalize(state, state["total"])
+
+    def _fetch_segment(self, segment, state, response=None):
+        start, end = segment
+        if response is None:
+            headers = dict(self.headers, Range=f"bytes={start}-{end}")
+            validator = self._validator(state)
+            if validator:
+                headers["If-Range"] = validator
+            response = self.request(self.url, headers)
+            if response is None:
+                raise OSError(f"sem resposta para o segmento {start}-{end}")
+            content_range = parse_content_range(response.headers.get("Content-Range"))
+            if response.status_code != 206 or not content_range or content_range[0] != start:
+                response.close()
+                raise SegmentError(f"segmento {start}-{end} recusado (status {response.status_code})")
+
+        remaining = end - start + 1
+        try:
+            with open(self.part_path, "r+b", buffering=self.write_buffer) as f:
+                f.seek(start)
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    chunk = chunk[:remaining]
+                    self._write(f, chunk)
+                    remaining -= len(chunk)
+                    if remaining <= 0:
+                        break
+        finally:
+            response.close()
+        if remaining > 0:
+            raise OSError(f"segmento {start}-{end} incompleto")
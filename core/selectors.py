@@ -0,0 +1,405 @@
+import hashlib
+import json
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+import soupsieve
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError: # Dependência opcional (backend "selectolax")
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError: # Dependência opcional (backend "lxml")
+    lxml = None
+
+try:
+    from cssselect import HTMLTranslator
+except ImportError: # Necessário apenas para seletores CSS no backend "lxml"
+    HTMLTranslator = None
+
+# --- Backends de parsing ---
+
+class SoupBackend:
+    """BeautifulSoup com o parser indicado ('html.parser' é o padrão histórico do projeto)."""
+
+    def __init__(self, parser="html.parser"):
+        self.name = parser
+        self.parser = parser
+
+    def parse(self, html):
+        return BeautifulSoup(html, self.parser)
+
+    def tag(self, node):
+        return node.name
+
+    def children(self, node):
+        return [child for child in node.children if isinstance(child, Tag)]
+
+    def get(self, node, name):
+        value = node.get(name)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def text(self, node):
+        return node.get_text(strip=True)
+
+    def compile_css(self, css):
+        return soupsieve.compile(css)
+
+    def select(self, root, compiled_css):
+        return compiled_css.select(root)
+
+    def key(self, node):
+        return id(node)
+
+
+class LxmlBackend:
+    """lxml.html direto (sem BeautifulSoup): parsing e travessia em C."""
+    name = "lxml"
+
+    def parse(self, html):
+        return lxml.html.document_fromstring(html or "<html></html>")
+
+    def tag(self, node):
+        return node.tag if isinstance(node.tag, str) else None
+
+    def children(self, node):
+        return [child for child in node if isinstance(child.tag, str)]
+
+    def get(self, node, name):
+        return node.get(name)
+
+    def text(self, node):
+        return "".join(piece.strip() for piece in node.itertext())
+
+    def compile_css(self, css):
+        if HTMLTranslator is None:
+            raise RuntimeError("Seletores CSS no backend 'lxml' requerem o pacote cssselect (pip install cssselect).")
+        return etree.XPath(HTMLTranslator().css_to_xpath(css))
+
+    def select(self, root, compiled_css):
+        return compiled_css(root)
+
+    def key(self, node):
+        return node # Os proxies do lxml são estáveis enquanto houver referência a eles
+
+
+class SelectolaxBackend:
+    """selectolax (lexbor): o parser mais rápido disponível."""
+    name = "selectolax"
+
+    def parse(self, html):
+        return LexborHTMLParser(html or "").root
+
+    def tag(self, node):
+        return None if node.tag.startswith("-") else node.tag # '-text', '-comment'...
+
+    def children(self, node):
+        return [child for child in node.iter(include_text=False) if not child.tag.startswith("-")]
+
+    def get(self, node, name):
+        return node.attributes.get(name)
+
+    def text(self, node):
+        return node.text(deep=True, separator="", strip=True)
+
+    def compile_css(self, css):
+        return css
+
+    def select(self, root, compiled_css):
+        return root.css(compiled_css)
+
+    def key(self, node):
+        return node.mem_id
+
+
+def available_backends():
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    if lxml is not None:
+        backends.append("lxml")
+    backends.append("html.parser")
+    return backends
+
+
+def get_backend(name="auto"):
+    """Cria o backend de parsing pelo nome; 'auto' escolhe o mais rápido instalado."""
+    if name == "auto":
+        name = available_backends()[0]
+    if name == "selectolax":
+        if LexborHTMLParser is None:
+            raise RuntimeError("O backend 'selectolax' requer o pacote selectolax (pip install selectolax).")
+        return SelectolaxBackend()
+    if name == "lxml":
+        if lxml is None:
+            raise RuntimeError("O backend 'lxml' requer o pacote lxml (pip install lxml).")
+        return LxmlBackend()
+    if name == "html.parser":
+        return SoupBackend(name)
+    raise ValueError(f"Parser HTML desconhecido: '{name}'. Opções: auto, {', '.join(available_backends())}")
+
+
+# Versão do formato dos resultados de extração (entra na impressão digital usada pelo cache de páginas)
+EXTRACTION_VERSION = 2
+
+# Atributos de onde sai a URL de um link ou de um carregamento sob demanda, na ordem de preferência
+URL_ATTRIBUTES = ("href", "data-url", "data-href", "data-src")
+
+# --- Seletores compilados ---
+
+class CompiledSelector:
+    """
+    Seletor da config compilado uma única vez. Aceita o formato de dicionário
+    ({"tag": ..., "attrs": {...}}, com os pseudo-atributos src_contains e
+    vimeo_id_from_data_attr) ou uma string CSS.
+    """
+    __slots__ = ("tag", "attrs", "src_contains", "vimeo_id_attr", "css", "css_index")
+
+    def __init__(self, config, backend):
+        self.css = None
+        self.css_index = None
+        self.src_contains = None
+        self.vimeo_id_attr = None
+        if isinstance(config, str):
+            self.tag = None
+            self.attrs = ()
+            self.css = backend.compile_css(config)
+            return
+        self.tag = config.get("tag")
+        attrs = dict(config.get("attrs") or {})
+        self.src_contains = attrs.pop("src_contains", None)
+        self.vimeo_id_attr = attrs.pop("vimeo_id_from_data_attr", None)
+        if "class_" in attrs:
+            attrs["class"] = attrs.pop("class_")
+        self.attrs = tuple(attrs.items())
+
+    def matches(self, backend, node, css_matches):
+        if self.css is not None:
+            return backend.key(node) in css_matches[self.css_index]
+        if self.tag and backend.tag(node) != self.tag:
+            return False
+        for name, expected in self.attrs:
+            if not _attr_matches(name, backend.get(node, name), expected):
+                return False
+        if self.src_contains and self.src_contains not in (backend.get(node, "src") or ""):
+            return False
+        if self.vimeo_id_attr and not backend.get(node, self.vimeo_id_attr):
+            return False
+        return True
+
+
+def _attr_matches(name, value, expected):
+    """Mesma semântica do find_all do BeautifulSoup para valores de atributos."""
+    if expected is True:
+        return value is not None
+    if expected is False or expected is None:
+        return value is None
+    if value is None:
+        return False
+    if isinstance(expected, (list, tuple, set)):
+        return any(_attr_matches(name, value, option) for option in expected)
+    if isinstance(expected, re.Pattern):
+        return bool(expected.search(value))
+    if name == "class":
+        # Casa com uma das classes ou com o atributo class inteiro
+        return expected == value or expected in value.split()
+    return expected == value
+
+
+class SelectorEngine:
+    """
+    Compila na inicialização todos os seletores do adaptador (PLATFORM_ADAPTER_CONFIG)
+    e extrai, em uma única travessia da árvore, tudo o que o motor precisa de cada página.
+    """
+
+    def __init__(self, selectors_config, parser="auto"):
+        self.backend = get_backend(parser)
+        self.config = selectors_config
+        # Identifica a configuração: resultados de extração em cache só valem para os mesmos seletores
+        self.fingerprint = hashlib.sha256(
+            json.dumps([EXTRACTION_VERSION, dict(selectors_config)], sort_keys=True, default=repr).encode("utf-8")
+        ).hexdigest()[:16]
+        self._css = []
+        compile_ = self._compile
+        cfg = selectors_config
+
+        self.module_item = compile_(cfg.get("module_item_selector"))
+        self.module_title = compile_(cfg.get("module_title_selector_from_item"))
+        self.lesson_container = compile_(cfg.get("lesson_list_container_from_module"))
+        self.lesson_item = compile_(cfg.get("lesson_item_selector_from_list"))
+        self.lesson_title = compile_(cfg.get("lesson_title_selector_from_item"))
+        self.lesson_link = compile_(cfg.get("lesson_link_selector_from_item"))
+        # Paginação do índice do curso e módulos cuja lista de aulas é carregada sob demanda
+        self.next_page = compile_(cfg.get("course_next_page_selector"))
+        self.module_lessons_url = compile_(cfg.get("module_lessons_url_selector_from_item"))
+
+        # Materiais: seletor direto ou par (parent_selector, item_selector)
+        self.materials = []
+        for mat_cfg in cfg.get("material_link_selectors_on_lesson_page", []):
+            if isinstance(mat_cfg, dict) and mat_cfg.get("parent_selector") and mat_cfg.get("item_selector"):
+                self.materials.append((compile_(mat_cfg["parent_selector"]), compile_(mat_cfg["item_selector"])))
+            else:
+                self.materials.append((None, compile_(mat_cfg)))
+        self.videos = [compile_(video_cfg) for video_cfg in cfg.get("video_iframe_selectors_on_lesson_page", [])]
+
+    def _compile(self, config):
+        if not config:
+            return None
+        selector = CompiledSelector(config, self.backend)
+        if selector.css is not None:
+            selector.css_index = len(self._css)
+            self._css.append(selector.css)
+        return selector
+
+    def _prepare(self, html):
+        root = self.backend.parse(html)
+        # Seletores CSS são resolvidos uma vez por documento pelo motor nativo do backend
+        css_matches = [{self.backend.key(node) for node in self.backend.select(root, css)} for css in self._css]
+        return root, css_matches
+
+    def _walk(self, root, visit, context=None):
+        """Travessia em pré-ordem (ordem do documento); visit(node, contexto) devolve o contexto dos filhos."""
+        children = self.backend.children
+        stack = [(root, context)]
+        while stack:
+            node, context = stack.pop()
+            child_context = visit(node, context)
+            stack.extend((child, child_context) for child in reversed(children(node)))
+
+    def _new_module(self):
+        return {"title": None, "container_found": self.lesson_container is None, "lessons": [], "lessons_url": None}
+
+    def _course_visitor(self, css, base_url, modules, page):
+        """Visitante que monta módulos e aulas; 'page' recebe a URL da próxima página do índice."""
+        backend = self.backend
+
+        def visit(node, context):
+            if page["next_page"] is None and self.next_page and self.next_page.matches(backend, node, css):
+                page["next_page"] = self._url_of(node, base_url)
+            module, in_container, lesson = context or (None, False, None)
+            if self.module_item and self.module_item.matches(backend, node, css):
+                module = self._new_module()
+                modules.append(module)
+                return (module, self.lesson_container is None, None)
+            if module is None:
+                return context
+            if module["title"] is None and self.module_title and self.module_title.matches(backend, node, css):
+                module["title"] = backend.text(node)
+            if module["lessons_url"] is None and self.module_lessons_url and self.module_lessons_url.matches(backend, node, css):
+                module["lessons_url"] = self._url_of(node, base_url)
+            if not module["container_found"] and self.lesson_container.matches(backend, node, css):
+                module["container_found"] = True # Como o find() original, só o primeiro container conta
+                return (module, True, None)
+            if in_container and self.lesson_item and self.lesson_item.matches(backend, node, css):
+                lesson = {"title": None, "url": None}
+                if self.lesson_title is None:
+                    lesson["title"] = backend.text(node)
+                if self.lesson_link is None:
+                    lesson["url"] = self._absolute(backend.get(node, "href"), base_url)
+                module["lessons"].append(lesson)
+                return (module, in_container, lesson)
+            if lesson is not None:
+                if lesson["title"] is None and self.lesson_title and self.lesson_title.matches(backend, node, css):
+                    lesson["title"] = backend.text(node)
+                if lesson["url"] is None and self.lesson_link and self.lesson_link.matches(backend, node, css):
+                    lesson["url"] = self._absolute(backend.get(node, "href"), base_url)
+            return (module, in_container, lesson)
+
+        return visit
+
+    def extract_course(self, html, base_url):
+        """
+        Devolve uma página do índice do curso: {"modules": [...], "next_page": url ou None}.
+        Cada módulo é {"title", "container_found", "lessons": [{"title", "url"}], "lessons_url"},
+        onde lessons_url é a URL da lista de aulas carregada sob demanda (se configurada).
+        Títulos não encontrados ficam como None.
+        """
+        root, css = self._prepare(html)
+        modules = []
+        page = {"modules": modules, "next_page": None}
+        self._walk(root, self._course_visitor(css, base_url, modules, page))
+        return page
+
+    def extract_module_lessons(self, html, base_url):
+        """Devolve as aulas [{"title", "url"}] de uma lista de aulas carregada sob demanda (fragmento HTML)."""
+        root, css = self._prepare(html)
+        module = self._new_module()
+        # O fragmento inteiro é a lista de aulas: a travessia começa dentro do container
+        # (next_page=False desliga a busca de paginação, que só existe no índice do curso)
+        self._walk(root, self._course_visitor(css, base_url, [], {"next_page": False}), context=(module, True, None))
+        return module["lessons"]
+
+    def extract_lesson(self, html, base_url):
+        """Devolve (materiais, url_do_video) da página da aula; materiais é uma lista de (nome, url) sem URLs repetidas."""
+        backend = self.backend
+        root, css = self._prepare(html)
+        material_hits = [[] for _ in self.materials]
+        video_hits = [None] * len(self.videos)
+
+        def visit(node, active_parents):
+            active_parents = active_parents or frozenset()
+            for index, (parent, item) in enumerate(self.materials):
+                if parent is None or index in active_parents:
+                    if item.matches(backend, node, css):
+                        material_hits[index].append(node)
+                elif parent.matches(backend, node, css):
+                    active_parents = active_parents | {index} # Itens são buscados dentro do pai
+            for index, video in enumerate(self.videos):
+                if video_hits[index] is None and video.matches(backend, node, css):
+                    video_hits[index] = node
+            return active_parents
+
+        self._walk(root, visit)
+
+        materials = []
+        seen_urls = set()
+        for hits in material_hits:
+            for node in hits:
+                url = self._absolute(backend.get(node, "href"), base_url)
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    materials.append((backend.text(node), url))
+        return materials, self._video_url(video_hits, base_url)
+
+    def _video_url(self, video_hits, base_url):
+        for selector, node in zip(self.videos, video_hits):
+            if node is None:
+                continue
+            video_src = self.backend.get(node, "src")
+            if video_src:
+                return urljoin(base_url, video_src)
+            # Checagem especial para data attributes, se presente na config do seletor
+            if selector.vimeo_id_attr and self.backend.get(node, selector.vimeo_id_attr):
+                return f"https://player.vimeo.com/video/{self.backend.get(node, selector.vimeo_id_attr)}"
+        return None
+
+    def exists(self, html, selector_config):
+        """Indica se algum elemento da página casa com o seletor (usado nos indicadores de login)."""
+        selector = CompiledSelector(selector_config, self.backend)
+        root = self.backend.parse(html)
+        if selector.css is not None:
+            return bool(list(self.backend.select(root, selector.css)))
+        found = []
+
+        def visit(node, context):
+            if not found and selector.matches(self.backend, node, None):
+                found.append(node)
+
+        self._walk(root, visit)
+        return bool(found)
+
+    def _url_of(self, node, base_url):
+        for name in URL_ATTRIBUTES:
+            value = self.backend.get(node, name)
+            if value:
+                return urljoin(base_url, value)
+        return None
+
+    @staticmethod
+    def _absolute(href, base_url):
+        return urljoin(base_url, href) if href else None
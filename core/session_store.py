@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+DEFAULT_SESSION_MAX_AGE = 6 * 60 * 60 # Segundos; usado quando os cookies não informam validade
+APP_DIR_NAME = "course_downloader"
+
+
+def default_session_dir():
+    """
+    Pasta do cache de sessões no perfil do usuário, fora da pasta de downloads (que costuma ser
+    compartilhada, sincronizada ou copiada): %LOCALAPPDATA% no Windows, ~/Library/Caches no
+    macOS e $XDG_CACHE_HOME (ou ~/.cache) nos demais.
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, APP_DIR_NAME, "sessions")
+
+
+class SessionCache:
+    """
+    Cookies de sessões autenticadas salvos em disco, um arquivo JSON por plataforma e
+    usuário, com prazo de validade. Permite que as próximas execuções (e os outros
+    cursos de um lote) pulem o login.
+
+    A validade é a do primeiro cookie a expirar ou, se nenhum informar, 'max_age'
+    segundos após o salvamento. Uma sessão ainda válida aqui pode ter sido encerrada
+    pelo servidor: quem a carrega deve confirmá-la antes de usar.
+    """
+
+    def __init__(self, directory, max_age=DEFAULT_SESSION_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+
+    def _path(self, platform, username):
+        # O usuário entra na chave só como hash: o nome do arquivo não expõe o e-mail
+        user_hash = hashlib.sha256((username or "").encode("utf-8")).hexdigest()[:16]
+        platform_name = re.sub(r'[^\w.-]', '_', platform)
+        return os.path.join(self.directory, f"{platform_name}-{user_hash}.json")
+
+    def load(self, platform, username):
+        """Devolve a lista de cookies salva, ou None se não houver, estiver corrompida ou expirada."""
+        path = self._path(platform, username)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            cookies, expires_at = entry["cookies"], entry["expires_at"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if expires_at <= time.time():
+            self.discard(platform, username)
+            return None
+        return cookies
+
+    def save(self, platform, username, cookies, max_age=None):
+        now = time.time()
+        expires_at = now + (max_age or self.max_age)
+        cookie_expiries = [c["expires"] for c in cookies if c.get("expires")]
+        if cookie_expiries:
+            expires_at = min(expires_at, min(cookie_expiries))
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = self._path(platform, username)
+        temp_path = path + ".tmp"
+        # Os cookies equivalem a credenciais: arquivo legível só pelo dono
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"platform": platform, "saved_at": int(now), "expires_at": expires_at, "cookies": cookies},
+                      f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def discard(self, platform, username):
+        try:
+            os.remove(self._path(platform, username))
+        except OSError:
+            pass
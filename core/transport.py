@@ -0,0 +1,62 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.51 Safari/537.36'
+}
+
+
+class TransportError(Exception):
+    """Falha de rede/HTTP levantada por qualquer backend de transporte."""
+
+
+class RequestsTransport:
+    """Transporte padrão: uma requests.Session síncrona com pool de conexões por host."""
+    name = "requests"
+
+    def __init__(self, headers=None, max_connections=10, max_connections_per_host=10):
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        self.headers = self.session.headers
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections_per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.auth_lock = threading.Lock()
+        self.session_generation = 0 # Incrementado a cada login; evita re-logins repetidos entre threads
+
+    def request(self, method, url, headers=None, data=None, stream=False, timeout=30, allow_redirects=True):
+        try:
+            return self.session.request(method.upper(), url, headers=headers, data=data, stream=stream,
+                                        timeout=timeout, allow_redirects=allow_redirects)
+        except requests.exceptions.RequestException as e:
+            raise TransportError(e) from e
+
+    def export_cookies(self):
+        return [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "expires": c.expires, "secure": c.secure}
+            for c in self.session.cookies
+        ]
+
+    def import_cookies(self, cookies):
+        for c in cookies:
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"),
+                                     expires=c.get("expires"), secure=c.get("secure", False))
+
+    def close(self):
+        self.session.close()
+
+
+TRANSPORT_BACKENDS = {
+    "requests": RequestsTransport,
+}
+
+
+def create_transport(backend="requests", **kwargs):
+    """Cria o transporte HTTP pelo nome do backend (ver TRANSPORT_BACKENDS)."""
+    try:
+        transport_class = TRANSPORT_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Backend de transporte desconhecido: '{backend}'. Opções: {', '.join(TRANSPORT_BACKENDS)}")
+    return transport_class(**kwargs)
@@ -0,0 +1,365 @@
+import contextlib
+import json
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from http.cookiejar import Cookie
+
+from .rate_limit import CircuitOpenError
+
+try:
+    import yt_dlp
+except ImportError: # Dependência opcional (backend "library")
+    yt_dlp = None
+
+VideoJob = namedtuple("VideoJob", "url output_template referer title rate_limit", defaults=(None,))
+VideoProgress = namedtuple("VideoProgress", "title status downloaded_bytes total_bytes speed eta attempt")
+VideoJobResult = namedtuple("VideoJobResult", "ok returncode attempts error path")
+
+PROGRESS_PREFIX = "[progresso]"
+# Linha de progresso estruturada emitida pelo yt-dlp (uma por atualização, graças ao --newline)
+PROGRESS_TEMPLATE = (
+    "download:" + PROGRESS_PREFIX + " %(progress.status)s|%(progress.downloaded_bytes)s|%(progress.total_bytes)s"
+    "|%(progress.total_bytes_estimate)s|%(progress.speed)s|%(progress.eta)s"
+)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None # yt-dlp escreve 'NA' quando o valor não é conhecido
+
+
+def parse_progress_line(line, title="", attempt=1):
+    """Converte uma linha do --progress-template em VideoProgress (ou None se não for de progresso)."""
+    line = line.strip()
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    fields = line[len(PROGRESS_PREFIX):].strip().split("|")
+    if len(fields) != 6:
+        return None
+    status, downloaded, total, total_estimate, speed, eta = fields
+    return VideoProgress(
+        title=title,
+        status=status,
+        downloaded_bytes=_number(downloaded),
+        total_bytes=_number(total) or _number(total_estimate),
+        speed=_number(speed),
+        eta=_number(eta),
+        attempt=attempt,
+    )
+
+
+def _format_bytes(value):
+    if value is None:
+        return "?"
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+class ProgressReporter:
+    """Imprime o progresso estruturado dos vídeos, no máximo uma linha a cada 'interval' segundos por job."""
+
+    def __init__(self, interval=5.0, stream=None):
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self._last_report = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        now = time.monotonic()
+        with self._lock:
+            finished = event.status == "finished"
+            if not finished and now - self._last_report.get(event.title, 0.0) < self.interval:
+                return
+            self._last_report[event.title] = now
+        percent = ""
+        if event.downloaded_bytes is not None and event.total_bytes:
+            percent = f"{100 * event.downloaded_bytes / event.total_bytes:.1f}% de "
+        speed = f" a {_format_bytes(event.speed)}/s" if event.speed else ""
+        eta = f", ETA {int(event.eta) // 60:02d}:{int(event.eta) % 60:02d}" if event.eta is not None and not finished else ""
+        print(f"        [vídeo] {event.title}: {percent}{_format_bytes(event.total_bytes)}{speed}{eta}", file=self.stream)
+
+
+class SubprocessRunner:
+    """Executa cada job em um novo processo do executável yt-dlp."""
+
+    def __init__(self, yt_dlp_path, extra_args=None):
+        self.yt_dlp_path = yt_dlp_path
+        self.extra_args = list(extra_args or [])
+
+    def build_command(self, job):
+        return [
+            self.yt_dlp_path,
+            '--referer', job.referer,
+            '-o', job.output_template,
+            '--no-playlist',
+            '--force-overwrites', # Se um download parcial falhou, tenta de novo
+            '--retries', '3',
+            '--fragment-retries', '3',
+            '--socket-timeout', '60',
+            '--progress',
+            '--newline',
+            '--progress-template', PROGRESS_TEMPLATE,
+            '--no-warnings',
+            *(['--limit-rate', str(int(job.rate_limit))] if job.rate_limit else []),
+            # Sem -f, deixa yt-dlp escolher o melhor.
+            # Para forçar qualidade e formato (ex: melhor mp4 até 1080p):
+            # '-f', 'bestvideo[height<=?1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=?1080][ext=mp4]/best[height<=?1080]',
+            *self.extra_args,
+            job.url
+        ]
+
+    def describe(self, job):
+        return " ".join(self.build_command(job))
+
+    def probe(self, job):
+        """Metadados do vídeo sem baixá-lo (yt-dlp -J). Devolve (info, erro)."""
+        command = [self.yt_dlp_path, '--referer', job.referer, '--dump-single-json', '--no-playlist',
+                   '--socket-timeout', '60', '--no-warnings', *self.extra_args, job.url]
+        try:
+            completed = subprocess.run(command, capture_output=True, text=True, encoding="utf-8", errors="replace", timeout=300)
+        except FileNotFoundError:
+            return None, f"'{self.yt_dlp_path}' não encontrado"
+        except subprocess.TimeoutExpired:
+            return None, "tempo esgotado"
+        if completed.returncode != 0:
+            return None, " | ".join(completed.stderr.strip().splitlines()[-3:]) or f"código {completed.returncode}"
+        try:
+            return json.loads(completed.stdout), None
+        except ValueError:
+            return None, "resposta do yt-dlp não é JSON"
+
+    def run_once(self, job, attempt, on_progress):
+        """
+        Executa o yt-dlp uma vez. Devolve (código de saída, últimas linhas de erro, caminho final);
+        código None se o executável não existe.
+        """
+        try:
+            process = subprocess.Popen(self.build_command(job), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       text=True, encoding="utf-8", errors="replace")
+        except FileNotFoundError:
+            return None, f"'{self.yt_dlp_path}' não encontrado", None
+        other_lines = deque(maxlen=5)
+        for line in process.stdout:
+            event = parse_progress_line(line, job.title, attempt)
+            if event is None:
+                if line.strip():
+                    other_lines.append(line.strip())
+            elif on_progress:
+                on_progress(event)
+        returncode = process.wait()
+        return returncode, " | ".join(other_lines) or None, None
+
+
+class LibraryRunner:
+    """
+    Usa o yt-dlp como biblioteca, dentro do processo do motor: sem custo de iniciar
+    um interpretador e importar os extratores a cada vídeo. As instâncias de YoutubeDL
+    ficam em um pool (uma por vaga do agendador) e são reaproveitadas entre aulas;
+    antes de cada job recebem o Referer da aula e os cookies atuais da sessão autenticada.
+    Erros inesperados da biblioteca caem no runner de fallback (subprocesso).
+    """
+
+    def __init__(self, cookies_provider=None, user_agent=None, fallback=None):
+        if yt_dlp is None:
+            raise RuntimeError("O backend de vídeo 'library' requer o pacote yt-dlp (pip install yt-dlp).")
+        self.cookies_provider = cookies_provider
+        self.user_agent = user_agent
+        self.fallback = fallback
+        self._instances = queue.LifoQueue()
+
+    def describe(self, job):
+        return f"yt-dlp (em processo) --referer {job.referer} -o {job.output_template} {job.url}"
+
+    def _create_instance(self):
+        """Cria um YoutubeDL e a 'vaga' mutável com o job em execução nele, lida pelo hook de progresso."""
+        current = [None]
+        params = {
+            'outtmpl': {'default': '%(title)s.%(ext)s'},
+            'noplaylist': True,
+            'overwrites': True, # Se um download parcial falhou, tenta de novo
+            'retries': 3,
+            'fragment_retries': 3,
+            'socket_timeout': 60,
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+            'progress_hooks': [lambda d: self._progress_hook(d, current[0])],
+        }
+        if self.user_agent:
+            params['http_headers'] = {'User-Agent': self.user_agent}
+        return yt_dlp.YoutubeDL(params), current
+
+    @staticmethod
+    def _progress_hook(d, current):
+        if current is None:
+            return
+        job, attempt, on_progress = current
+        if not on_progress or d.get('status') not in ('downloading', 'finished'):
+            return
+        on_progress(VideoProgress(
+            title=job.title,
+            status=d['status'],
+            downloaded_bytes=d.get('downloaded_bytes'),
+            total_bytes=d.get('total_bytes') or d.get('total_bytes_estimate'),
+            speed=d.get('speed'),
+            eta=d.get('eta'),
+            attempt=attempt,
+        ))
+
+    def _inject_cookies(self, ydl):
+        if not self.cookies_provider:
+            return
+        for c in self.cookies_provider():
+            domain = c.get("domain") or ""
+            ydl.cookiejar.set_cookie(Cookie(
+                0, c["name"], c["value"], None, False, domain, bool(domain), domain.startswith("."),
+                c.get("path") or "/", True, bool(c.get("secure")), c.get("expires"), False, None, None, {}
+            ))
+
+    def _acquire_instance(self):
+        try:
+            return self._instances.get_nowait()
+        except queue.Empty:
+            return self._create_instance()
+
+    def probe(self, job):
+        """Metadados do vídeo sem baixá-lo (extract_info com download=False). Devolve (info, erro)."""
+        ydl, current = self._acquire_instance()
+        try:
+            ydl.params['http_headers']['Referer'] = job.referer
+            self._inject_cookies(ydl)
+            return ydl.sanitize_info(ydl.extract_info(job.url, download=False)), None
+        except yt_dlp.utils.DownloadError as e:
+            return None, str(e)
+        except Exception as e:
+            if self.fallback is None:
+                return None, f"{type(e).__name__}: {e}"
+            return self.fallback.probe(job)
+        finally:
+            self._instances.put((ydl, current))
+
+    def run_once(self, job, attempt, on_progress):
+        ydl, current = self._acquire_instance()
+        current[0] = (job, attempt, on_progress)
+        try:
+            ydl.params['outtmpl']['default'] = job.output_template
+            ydl.params['http_headers']['Referer'] = job.referer
+            ydl.params['ratelimit'] = job.rate_limit # Instâncias são reaproveitadas: None desfaz o limite anterior
+            self._inject_cookies(ydl)
+            info = ydl.extract_info(job.url, download=True)
+            downloads = (info or {}).get('requested_downloads') or [{}]
+            return 0, None, downloads[0].get('filepath')
+        except yt_dlp.utils.DownloadError as e:
+            return 1, str(e), None
+        except Exception as e:
+            if self.fallback is None:
+                return 1, f"{type(e).__name__}: {e}", None
+            return self.fallback.run_once(job, attempt, on_progress)
+        finally:
+            current[0] = None
+            self._instances.put((ydl, current))
+
+
+class VideoJobScheduler:
+    """
+    Executa jobs do yt-dlp com no máximo 'max_parallel' downloads simultâneos.
+
+    run(job) é chamado pelas threads do estágio de vídeo do pipeline: cada chamada
+    espera uma vaga, executa o job no runner (subprocesso ou biblioteca), transforma
+    o progresso em eventos estruturados e, em caso de falha, libera a vaga durante o
+    backoff exponencial antes de tentar de novo. Com 'limiter' (HostRateLimiter), cada
+    tentativa consome um token do host do vídeo e seu resultado alimenta o circuit
+    breaker desse host. 'slots' permite que vários agendadores
+    (um por curso, no modo em lote) dividam o mesmo limite global de downloads.
+    Com 'metrics' (Metrics), registra a espera por vaga e a duração de cada execução.
+    Com 'bandwidth' (BandwidthLimiter), cada execução recebe a sua taxa máxima (--limit-rate),
+    descontada do limite global de banda enquanto o vídeo baixa.
+    """
+
+    def __init__(self, runner, max_parallel=1, max_retries=2, retry_backoff=5.0, on_progress=None, slots=None,
+                 limiter=None, metrics=None, bandwidth=None):
+        self.runner = runner
+        self.max_parallel = max(1, max_parallel)
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.on_progress = on_progress
+        self._slots = slots or threading.BoundedSemaphore(self.max_parallel)
+        self.limiter = limiter
+        self.metrics = metrics
+        self.bandwidth = bandwidth
+
+    def describe(self, job):
+        return self.runner.describe(job)
+
+    def _acquire(self, job, attempts):
+        """Passa pelo limitador do host, esperando até 'attempts' vezes o fim de um circuito aberto; False se continuar bloqueado."""
+        for attempt in range(attempts):
+            try:
+                self.limiter.acquire(job.url)
+                return True
+            except CircuitOpenError as e:
+                if attempt + 1 < attempts:
+                    time.sleep(e.retry_in)
+        return False
+
+    def probe(self, job):
+        """Obtém os metadados do vídeo (formato, tamanho) sem baixá-lo, dentro das mesmas vagas. Devolve (info, erro)."""
+        if self.limiter and not self._acquire(job, self.max_retries + 1):
+            return None, f"host do vídeo bloqueado por falhas seguidas: {job.url}"
+        with self._slots:
+            started = time.perf_counter()
+            info, error = self.runner.probe(job)
+        if self.metrics:
+            self.metrics.observe("yt_dlp_probe", time.perf_counter() - started, outcome="ok" if info is not None else "failed")
+        if self.limiter:
+            if info is not None:
+                self.limiter.record_success(job.url)
+            else:
+                self.limiter.record_failure(job.url)
+        return info, error
+
+    def run(self, job):
+        """Executa o job (com novas tentativas) e devolve um VideoJobResult."""
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.limiter:
+                try:
+                    self.limiter.acquire(job.url)
+                except CircuitOpenError as e:
+                    # Circuito aberto (o host do vídeo vem falhando seguidamente): espera o bloqueio acabar,
+                    # gastando uma das tentativas, em vez de dar o vídeo como perdido
+                    if attempt > self.max_retries:
+                        return VideoJobResult(False, 1, attempt, str(e), None)
+                    time.sleep(e.retry_in)
+                    continue
+            waiting = time.perf_counter()
+            with self._slots, self.bandwidth.lease(self.max_parallel) if self.bandwidth else contextlib.nullcontext() as rate:
+                started = time.perf_counter()
+                returncode, error, path = self.runner.run_once(job._replace(rate_limit=rate), attempt, self.on_progress)
+            if self.metrics:
+                self.metrics.observe("video_slot_wait", started - waiting)
+                self.metrics.observe("yt_dlp", time.perf_counter() - started, outcome="ok" if returncode == 0 else "failed")
+            if self.limiter and returncode is not None:
+                if returncode == 0:
+                    self.limiter.record_success(job.url)
+                else:
+                    self.limiter.record_failure(job.url)
+            if returncode == 0:
+                return VideoJobResult(True, 0, attempt, None, path)
+            if returncode is None or attempt > self.max_retries:
+                return VideoJobResult(False, returncode, attempt, error, None)
+            if self.metrics:
+                self.metrics.increment("video_retries")
+            # Backoff exponencial com jitter, fora da vaga: outro vídeo pode usar o processo enquanto isso
+            time.sleep(self.retry_backoff * 2 ** (attempt - 1) + random.uniform(0, 1))
@@ -1,31 +1,23 @@
-import importlib 
 import argparse  
+import contextlib
 import os
-import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), 'core'))
-from downloader_engine import CoreDownloader
+from core.adapters import AdapterError, registry
+from core.bandwidth import BandwidthLimiter, parse_rate
+from core.content_store import ContentStore, LINK_MODES
+from core.course_index import CourseIndex, INDEX_FILE_NAME
+from core.disk import DiskSpaceGuard
+from core.downloader_engine import DownloaderEngine
+from core.metrics import Metrics
+from core.page_cache import PageCache
+from core.parse_pool import ParsePool
+from core.plan import CoursePlanner, save_plan, load_plan
+from core.profiling import RunProfiler
+from core.session_store import SessionCache, default_session_dir
+from core.transport import TRANSPORT_BACKENDS
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Framework Genérico para Baixar Materiais de Cursos Online.",
-        epilog="Exemplo de uso: python main.py meu_adapter_plataforma https://site.com/curso/meu-curso 'Nome do Curso Para Pasta' 'meuemail@example.com' 'minhasenha123' -o G:/Meu Drive/Cursos"
-    )
-    parser.add_argument(
-        "platform_adapter_module_name", 
-        help="Nome do arquivo do adaptador da plataforma na pasta 'platforms' (ex: 'template_platform' ou 'minha_escola_adapter', sem o '.py')"
-    )
-    parser.add_argument(
-        "target_course_page_url", 
-        help="URL da página principal do curso específico que você quer baixar (onde os módulos/aulas são listados)."
-    )
-    parser.add_argument(
-        "course_name_for_folder", 
-        help="Nome que será usado para criar a pasta principal deste curso."
-    )
-    parser.add_argument("username", help="Seu nome de usuário ou e-mail para login na plataforma.")
-    parser.add_argument("password", help="Sua senha para login na plataforma.")
-    
+def add_engine_arguments(parser):
+    """Opções do motor comuns ao modo de curso único (main.py) e ao modo em lote (batch.py)."""
     parser.add_argument(
         "-o", "--output_base_directory", 
         default=".", 
@@ -46,42 +38,326 @@ def main():
         action="store_true",
         help="Pular o download de materiais de apoio, baixando apenas vídeos."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de aulas processadas em paralelo (padrão: 1, processamento sequencial)."
+    )
+    parser.add_argument(
+        "--material_workers",
+        type=int,
+        default=None,
+        help="Limite de downloads de materiais simultâneos (padrão: igual a --workers)."
+    )
+    parser.add_argument(
+        "--video_workers",
+        type=int,
+        default=None,
+        help="Limite de processos yt-dlp simultâneos (padrão: igual a --workers)."
+    )
+    parser.add_argument(
+        "--video_retries",
+        type=int,
+        default=2,
+        help="Novas tentativas para vídeos cujo yt-dlp falhar, com backoff exponencial (padrão: 2)."
+    )
+    parser.add_argument(
+        "--video_backend",
+        choices=["subprocess", "library"],
+        default="subprocess",
+        help="Como executar o yt-dlp: 'subprocess' (padrão, executável externo) ou 'library' (em processo, reaproveitando instâncias e os cookies da sessão)."
+    )
 
+    parser.add_argument(
+        "--http_backend",
+        choices=list(TRANSPORT_BACKENDS),
+        default="requests",
+        help="Transporte HTTP (padrão: 'requests', uma requests.Session com pool de conexões por host compartilhada pelas threads)."
+    )
+    parser.add_argument(
+        "--http_retries",
+        type=int,
+        default=3,
+        help="Novas tentativas, com backoff exponencial, para GETs que falharem por erro de rede, 429 ou 5xx (padrão: 3)."
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Re-sincroniza o curso: revalida no servidor os itens já registrados no manifesto e baixa apenas os novos ou alterados."
+    )
+    parser.add_argument(
+        "--download_segments",
+        type=int,
+        default=1,
+        help="Divide materiais grandes (16 MB ou mais) em N segmentos baixados em paralelo via HTTP Range (padrão: 1)."
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=256,
+        help="Tamanho, em KB, dos blocos lidos da rede em cada download de material (padrão: 256)."
+    )
+    parser.add_argument(
+        "--write_buffer",
+        type=int,
+        default=1024,
+        help="Buffer de escrita de cada arquivo, em KB: menos escritas pequenas em volumes de rede (padrão: 1024)."
+    )
+    parser.add_argument(
+        "--min_free_space",
+        type=int,
+        default=0,
+        help="Espaço livre mínimo, em MB, no volume de destino: downloads que não cabem esperam até liberar espaço (padrão: 0, desativado)."
+    )
+    parser.add_argument(
+        "--max_disk_wait",
+        type=int,
+        default=30,
+        help="Tempo máximo, em minutos, que um download espera por espaço com --min_free_space antes de falhar; 0 espera sem limite (padrão: 30)."
+    )
+    parser.add_argument(
+        "--max_bandwidth",
+        type=parse_rate,
+        default=None,
+        help="Limite de banda total dos downloads, em bytes/s (ex.: 800K, 20M), somando materiais e vídeos (padrão: sem limite)."
+    )
+    parser.add_argument(
+        "--max_job_bandwidth",
+        type=parse_rate,
+        default=None,
+        help="Limite de banda de cada download (material ou vídeo, via --limit-rate do yt-dlp), em bytes/s (padrão: sem limite)."
+    )
+    parser.add_argument(
+        "--parser",
+        choices=["auto", "selectolax", "lxml", "html.parser"],
+        default=None,
+        help="Backend de parsing HTML (padrão: 'html_parser' do adaptador ou 'auto', que escolhe o mais rápido instalado)."
+    )
+    parser.add_argument(
+        "--parse_processes",
+        type=int,
+        default=0,
+        help="Analisa o HTML das páginas em N processos separados, fora do GIL; útil com páginas grandes e muitos núcleos "
+             "(use --workers >= N para haver páginas suficientes em paralelo). 0 analisa nas próprias threads (padrão)."
+    )
+    parser.add_argument(
+        "--session_dir",
+        default=None,
+        help="Pasta do cache de sessões: os cookies de cada plataforma/usuário são reaproveitados até expirarem (padrão: pasta de cache do usuário, ex.: ~/.cache/course_downloader/sessions)."
+    )
+    parser.add_argument(
+        "--no_session_cache",
+        action="store_true",
+        help="Não reaproveita nem salva sessões: sempre faz o login completo."
+    )
+    parser.add_argument(
+        "--page_cache_size",
+        type=int,
+        default=100,
+        help="Tamanho máximo, em MB, do cache das páginas de curso/aula em <saída>/.cache/pages; 0 desativa (padrão: 100)."
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=list(LINK_MODES),
+        nargs="?",
+        const="auto",
+        default=None,
+        help="Guarda cada material uma única vez em <saída>/.store (por hash do conteúdo) e cria nas aulas reflinks, "
+             "hardlinks ou cópias; materiais já conhecidos pelo ETag/tamanho não são baixados de novo (padrão do modo: auto)."
+    )
+    parser.add_argument(
+        "--no_index",
+        action="store_true",
+        help=f"Não registra os cursos no índice de busca local (<saída>/{INDEX_FILE_NAME}, consultado com search.py)."
+    )
+    parser.add_argument(
+        "--metrics_json",
+        metavar="ARQUIVO",
+        default=None,
+        help="Grava ao fim da execução o resumo das métricas (latência por host, parsing, bytes, novas tentativas, itens pulados, yt-dlp) em JSON."
+    )
+    parser.add_argument(
+        "--metrics_prometheus",
+        metavar="ARQUIVO",
+        default=None,
+        help="Grava as métricas no formato de texto do Prometheus (ex.: para o textfile collector do node_exporter)."
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="ARQUIVO",
+        nargs="?",
+        const="perfil.prof",
+        default=None,
+        help="Executa sob cProfile e tracemalloc, imprime as funções e alocações mais custosas e grava as estatísticas (padrão: perfil.prof)."
+    )
+
+
+def engine_options(args):
+    """Converte as opções de add_engine_arguments nos argumentos nomeados do DownloaderEngine."""
+    session_cache = None
+    if not args.no_session_cache:
+        session_cache = SessionCache(args.session_dir or default_session_dir())
+    page_cache = None
+    if args.page_cache_size > 0:
+        page_cache = PageCache(os.path.join(os.path.abspath(args.output_base_directory), ".cache", "pages"),
+                               max_size=args.page_cache_size * 1024 * 1024)
+    content_store = None
+    if args.dedup:
+        content_store = ContentStore(os.path.join(os.path.abspath(args.output_base_directory), ".store"), mode=args.dedup)
+    metrics = Metrics()
+    bandwidth = None
+    if args.max_bandwidth or args.max_job_bandwidth:
+        bandwidth = BandwidthLimiter(args.max_bandwidth, args.max_job_bandwidth)
+    return dict(
+        yt_dlp_path=args.yt_dlp_path,
+        workers=args.workers,
+        material_workers=args.material_workers,
+        video_workers=args.video_workers,
+        http_backend=args.http_backend,
+        sync=args.sync,
+        download_segments=args.download_segments,
+        html_parser=args.parser,
+        video_retries=args.video_retries,
+        http_retries=args.http_retries,
+        video_backend=args.video_backend,
+        session_cache=session_cache,
+        page_cache=page_cache,
+        content_store=content_store,
+        parse_pool=ParsePool(args.parse_processes) if args.parse_processes > 0 else None,
+        chunk_size=max(1, args.chunk_size) * 1024,
+        write_buffer=max(0, args.write_buffer) * 1024,
+        disk_guard=DiskSpaceGuard(args.min_free_space * 1024 * 1024, max_wait=args.max_disk_wait * 60 or None,
+                                  metrics=metrics) if args.min_free_space > 0 else None,
+        bandwidth=bandwidth,
+        course_index=None if args.no_index else CourseIndex(os.path.join(os.path.abspath(args.output_base_directory), INDEX_FILE_NAME)),
+        metrics=metrics
+    )
 
-    args = parser.parse_args()
 
+def profiled(args):
+    """Contexto da execução: sob RunProfiler com --profile, sem efeito caso contrário."""
+    return RunProfiler(args.profile) if args.profile else contextlib.nullcontext()
+
+
+def report_metrics(metrics, args):
+    """Imprime onde o tempo foi gasto e exporta as métricas pedidas (--metrics_json/--metrics_prometheus)."""
+    print("\n=== Métricas da execução ===")
+    print("\n".join(metrics.report_lines()))
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+        print(f"Métricas gravadas em {os.path.abspath(args.metrics_json)}")
+    if args.metrics_prometheus:
+        metrics.write_prometheus(args.metrics_prometheus)
+        print(f"Métricas (Prometheus) gravadas em {os.path.abspath(args.metrics_prometheus)}")
+
+
+def load_platform_config(adapter_module_name, course_url=None):
+    """
+    Carrega e valida PLATFORM_ADAPTER_CONFIG de platforms/<adapter_module_name>.py ('auto': o
+    adaptador que atende course_url); devolve a PlatformConfig, ou imprime o erro e devolve None.
+    """
     try:
-        adapter_module = importlib.import_module(f"platforms.{args.platform_adapter_module_name}")
-        platform_config = adapter_module.PLATFORM_ADAPTER_CONFIG
-    except ImportError as e:
-        print(f"Erro: Não foi possível carregar o adaptador de plataforma '{args.platform_adapter_module_name}'.")
-        print(f"Verifique se o arquivo 'platforms/{args.platform_adapter_module_name}.py' existe e não contém erros de importação.")
-        print(f"Detalhe do erro: {e}")
+        return registry.resolve(adapter_module_name, course_url)
+    except AdapterError as e:
+        print(f"Erro: {e}")
+        return None
+
+
+def write_plan(engine, plan_path):
+    """Gera o plano de download do curso (modo --plan) e imprime os totais por módulo."""
+    plan = CoursePlanner(engine).build()
+    if plan is None:
         return
-    except AttributeError:
-        print(f"Erro: O arquivo adaptador 'platforms/{args.platform_adapter_module_name}.py' não define corretamente a variável 'PLATFORM_ADAPTER_CONFIG'.")
+    save_plan(plan, plan_path)
+    print(f"\n=== Plano do curso '{plan['course_name']}' ===")
+    for module in plan["modules"] + [{"title": "TOTAL", "totals": plan["totals"]}]:
+        totals = module["totals"]
+        unknown = f", {totals['unknown_sizes']} sem tamanho conhecido" if totals["unknown_sizes"] else ""
+        print(f"  {module['title']}: {totals['lessons']} aulas, {totals['materials']} materiais, {totals['videos']} vídeos, "
+              f"{totals['total_bytes'] / 1024 ** 2:.1f} MB{unknown}")
+    print(f"Plano gravado em {os.path.abspath(plan_path)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Framework Genérico para Baixar Materiais de Cursos Online.",
+        epilog="Exemplo de uso: python main.py meu_adapter_plataforma https://site.com/curso/meu-curso 'Nome do Curso Para Pasta' 'meuemail@example.com' 'minhasenha123' -o G:/Meu Drive/Cursos"
+    )
+    parser.add_argument(
+        "platform_adapter_module_name", 
+        help="Nome do arquivo do adaptador da plataforma na pasta 'platforms' (ex: 'template_platform' ou 'minha_escola_adapter', sem o '.py'), "
+             "ou 'auto' para escolher pelo endereço do curso."
+    )
+    parser.add_argument(
+        "target_course_page_url", 
+        help="URL da página principal do curso específico que você quer baixar (onde os módulos/aulas são listados)."
+    )
+    parser.add_argument(
+        "course_name_for_folder", 
+        help="Nome que será usado para criar a pasta principal deste curso."
+    )
+    parser.add_argument("username", help="Seu nome de usuário ou e-mail para login na plataforma.")
+    parser.add_argument("password", help="Sua senha para login na plataforma.")
+    
+    add_engine_arguments(parser)
+    plan_group = parser.add_mutually_exclusive_group()
+    plan_group.add_argument(
+        "--plan",
+        metavar="ARQUIVO_JSON",
+        default=None,
+        help="Não baixa nada: percorre o curso, consulta tamanhos (HEAD) e formatos dos vídeos (yt-dlp) e grava o plano em JSON, com totais por módulo."
+    )
+    plan_group.add_argument(
+        "--from_plan",
+        metavar="ARQUIVO_JSON",
+        default=None,
+        help="Baixa o curso a partir de um plano gravado com --plan, sem analisar as páginas do site de novo."
+    )
+
+    args = parser.parse_args()
+
+    platform_config = load_platform_config(args.platform_adapter_module_name, args.target_course_page_url)
+    if platform_config is None:
         return
 
-    print(f"Usando adaptador para: {platform_config.get('platform_name', args.platform_adapter_module_name)}")
+    print(f"Usando adaptador para: {platform_config.platform_name} ({platform_config.name})")
 
     absolute_output_base_dir = os.path.abspath(args.output_base_directory)
     print(f"Diretório base para downloads: {absolute_output_base_dir}")
 
 
-    engine = CoreDownloader(
+    engine = DownloaderEngine(
         platform_config=platform_config,
         base_output_path=absolute_output_base_dir,
         course_url=args.target_course_page_url, 
         course_name_for_folder=args.course_name_for_folder,
-        yt_dlp_path=args.yt_dlp_path
+        platform_key=platform_config.name,
+        **engine_options(args)
     )
 
 
-    if engine.login(args.username, args.password):
-        print(f"Login realizado com sucesso para {platform_config.get('platform_name')}.")
-        engine.process_course() 
-    else:
-        print(f"Falha no login para {platform_config.get('platform_name')}. Verifique as credenciais e a configuração do adaptador.")
+    try:
+        with profiled(args):
+            # Reaproveita a sessão salva quando ainda é válida; senão faz o login completo
+            if engine.authenticate(args.username, args.password):
+                print(f"Sessão autenticada para {platform_config.platform_name}.")
+                if args.plan:
+                    write_plan(engine, args.plan)
+                elif args.from_plan:
+                    engine.process_course(plan=load_plan(args.from_plan))
+                else:
+                    engine.process_course() 
+                engine.save_session() # Cookies renovados durante a execução
+            else:
+                print(f"Falha no login para {platform_config.platform_name}. Verifique as credenciais e a configuração do adaptador.")
+    finally:
+        engine.transport.close()
+        if engine.parse_pool:
+            engine.parse_pool.close()
+        if engine.course_index:
+            engine.course_index.close()
+    report_metrics(engine.metrics, args)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+ADAPTADOR DA PLATAFORMA SINTÉTICA DE BENCHMARK
+----------------------------------------------
+
+Corresponde ao HTML servido por `benchmarks/mock_platform.py`. O endereço do servidor vem
+da variável de ambiente BENCHMARK_PLATFORM_URL (o `benchmark.py` a define ao subir o
+servidor); o padrão é o do servidor iniciado isoladamente com `python -m benchmarks.mock_platform`.
+
+O ritmo por host começa e fica no teto alto: o benchmark mede o motor, não o rate limiter.
+"""
+import os
+
+BASE_URL = os.environ.get("BENCHMARK_PLATFORM_URL", "http://127.0.0.1:8765").rstrip("/")
+
+PLATFORM_ADAPTER_CONFIG = {
+    "platform_name": "Plataforma sintética (benchmark)",
+
+    "login_page_url": BASE_URL + "/login",
+    "login_form_action_url": BASE_URL + "/entrar",
+
+    "login_payload_fields": {
+        "username": "email",
+        "password": "senha",
+    },
+
+    "login_success_indicators": [
+        {"type": "url_contains", "value": "/painel"},
+    ],
+
+    "session_check_url": BASE_URL + "/curso",
+
+    "delay_between_lesson_pages": 0,
+    "max_requests_per_second": 1000,
+
+    "module_item_selector": {"tag": "section", "attrs": {"class_": "modulo"}},
+    "module_title_selector_from_item": {"tag": "h2", "attrs": {"class_": "modulo-titulo"}},
+
+    "lesson_list_container_from_module": {"tag": "ul", "attrs": {"class_": "aulas"}},
+    "lesson_item_selector_from_list": {"tag": "li", "attrs": {"class_": "aula"}},
+
+    "lesson_title_selector_from_item": {"tag": "span", "attrs": {"class_": "aula-titulo"}},
+    "lesson_link_selector_from_item": {"tag": "a", "attrs": {"class_": "aula-link"}},
+
+    "video_iframe_selectors_on_lesson_page": [
+        {"tag": "iframe", "attrs": {"class_": "player"}},
+    ],
+
+    "material_link_selectors_on_lesson_page": [
+        {"tag": "a", "attrs": {"class_": "material"}},
+    ],
+}
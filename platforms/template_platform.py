@@ -13,9 +13,23 @@ Instruções para criar um novo adaptador para uma plataforma de curso:
    - Para seletores, a estrutura esperada é um dicionário:
      `{"tag": "nome_da_tag_html", "attrs": {"atributo1": "valor1", "id": "id_do_elemento", "class_": "classe_css"}}`
      Onde "attrs" é opcional. "class_" é usado em vez de "class" por ser uma palavra reservada em Python.
-     Se um seletor CSS mais complexo for necessário (ex: `div.content > p.important`), você pode
-     precisar adaptar a lógica no `downloader_engine.py` ou usar uma função customizada.
-     Por enquanto, o motor espera seletores mais diretos para tag e atributos.
+     Se um seletor CSS mais complexo for necessário, use diretamente a string CSS no lugar do
+     dicionário (ex: `"div.content > p.important"`).
+     Todos os seletores são compilados uma única vez ao iniciar o motor.
+   - "html_parser" (opcional) escolhe o backend de parsing: "auto" (padrão, o mais rápido
+     instalado), "selectolax", "lxml" ou "html.parser".
+   - "session_check_url" (opcional) é uma página leve que só abre para usuários logados,
+     usada para validar uma sessão salva antes de refazer o login (padrão: a página do curso).
+     "session_max_age" (opcional) é por quantos segundos uma sessão salva é reaproveitada
+     quando os cookies não informam validade (padrão: 6 horas).
+   - "delay_between_lesson_pages" (opcional, padrão 0.5) define o ritmo inicial de requisições
+     por host (1 / intervalo). O ritmo sobe enquanto o servidor responde bem, até
+     "max_requests_per_second" (opcional, padrão 10), e cai pela metade a cada 429/503.
+   - "course_url_patterns" (opcional) são expressões regulares das URLs de curso desta
+     plataforma, usadas quando o adaptador é escolhido com 'auto'. Sem elas, o adaptador
+     atende as URLs do mesmo host (ou subdomínio) das páginas de login e de teste da sessão.
+   - A configuração é validada ao carregar o adaptador: chaves desconhecidas (ex.: erros de
+     digitação), URLs incompletas e seletores CSS inválidos interrompem a execução logo no início.
 
 Exemplos de Seletores (baseados no que vimos para o CEI, APENAS COMO EXEMPLO ILUSTRATIVO):
 - Para o container de módulos: `{"tag": "div", "attrs": {"id": "ef-modules"}}`
@@ -51,6 +65,13 @@ PLATFORM_ADAPTER_CONFIG = {
         {"type": "page_text_contains", "value": "Falha na autenticação"},
     ],
 
+    "session_check_url": "https://site.exemplo.com/painel", # Opcional
+    "session_max_age": 6 * 60 * 60, # Opcional, em segundos
+
+    "delay_between_lesson_pages": 0.5, # Opcional: ritmo inicial de 2 requisições/s por host
+    "max_requests_per_second": 10,     # Opcional: teto do ritmo adaptativo
+    # "course_url_patterns": [r"^https://site\.exemplo\.com/curso/"], # Opcional: escolha com 'auto'
+
 
     "module_item_selector": {"tag": "div", "attrs": {"class_": "nome-da-classe-para-cada-modulo"}},
     "module_title_selector_from_item": {"tag": "h2", "attrs": {"class_": "titulo-do-modulo"}},
@@ -61,6 +82,11 @@ PLATFORM_ADAPTER_CONFIG = {
     "lesson_title_selector_from_item": {"tag": "span", "attrs": {"class_": "nome-da-aula"}},
     "lesson_link_selector_from_item": {"tag": "a", "attrs": {"class_": "link-para-pagina-da-aula"}},
 
+    # Opcionais: índice do curso dividido em páginas (link para a próxima) e módulos cuja lista
+    # de aulas é carregada sob demanda (elemento dentro do item do módulo com href/data-url do fragmento)
+    # "course_next_page_selector": {"tag": "a", "attrs": {"rel": "next"}},
+    # "module_lessons_url_selector_from_item": "button[data-url]",
+
     "video_iframe_selectors_on_lesson_page": [
         {"tag": "iframe", "attrs": {"id": "id_do_player_de_video"}},
         {"tag": "iframe", "attrs": {"class_": "classe_do_iframe_vimeo"}},
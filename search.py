@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from core.course_index import CourseIndex, INDEX_FILE_NAME
+
+
+def print_results(results):
+    for result in results:
+        lesson = f"Aula {result['lesson_index']:03d}: {result['lesson']}" if result["lesson_index"] else result["lesson"]
+        print(f"{result['course']} / {result['module'] or '-'} / {lesson}")
+        if result["kind"] == "material":
+            print(f"    Material: {result['material']}")
+            print(f"    Arquivo:  {result['file']}")
+        else:
+            print(f"    Pasta:    {result['folder']}")
+            if result["video_name"]:
+                print(f"    Vídeo:    {result['video_name']}")
+
+
+def print_courses(rows):
+    for name, platform, folder, lessons, materials, updated_at in rows:
+        updated = datetime.fromtimestamp(updated_at).strftime("%Y-%m-%d %H:%M")
+        print(f"{name} ({platform}): {lessons} aulas, {materials} materiais, atualizado em {updated} — {folder}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Busca aulas e materiais nos cursos já baixados, sem acessar a rede (índice gravado pelo main.py/batch.py).",
+        epilog="Exemplo de uso: python search.py \"slides regressão\" -o 'G:/Meu Drive/Cursos' --course Estatística"
+    )
+    parser.add_argument(
+        "query",
+        nargs="?",
+        help="Termos buscados nos títulos das aulas, nomes dos materiais, módulos e cursos; todos devem aparecer, "
+             "sem diferenciar acentos e maiúsculas, e cada termo vale como prefixo ('slid' encontra 'slides')."
+    )
+    parser.add_argument("-o", "--output_base_directory", default=".", help="Diretório base dos downloads, onde fica o índice (padrão: atual).")
+    parser.add_argument("--index", default=None, help=f"Caminho do índice (padrão: <diretório base>/{INDEX_FILE_NAME}).")
+    parser.add_argument("--course", default=None, help="Restringe a busca aos cursos cujo nome contém este texto.")
+    parser.add_argument("--limit", type=int, default=20, help="Número máximo de resultados (padrão: 20).")
+    parser.add_argument("--courses", action="store_true", help="Lista os cursos do índice em vez de buscar.")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados em JSON.")
+    args = parser.parse_args()
+    if not args.query and not args.courses:
+        parser.error("informe os termos da busca ou --courses")
+
+    index_path = args.index or os.path.join(os.path.abspath(args.output_base_directory), INDEX_FILE_NAME)
+    try:
+        index = CourseIndex.open_existing(index_path)
+    except FileNotFoundError:
+        print(f"ERRO: Índice não encontrado em {index_path}. Baixe um curso com main.py ou batch.py para criá-lo.")
+        sys.exit(1)
+
+    try:
+        if args.courses:
+            rows = index.courses()
+            if args.json:
+                keys = ("course", "platform", "folder", "lessons", "materials", "updated_at")
+                print(json.dumps([dict(zip(keys, row)) for row in rows], ensure_ascii=False, indent=2))
+            else:
+                print_courses(rows)
+            return
+        started = time.perf_counter()
+        results = index.search(args.query, course=args.course, limit=args.limit)
+        elapsed = time.perf_counter() - started
+    finally:
+        index.close()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    if not results:
+        print("Nenhuma aula ou material encontrado.")
+        return
+    print_results(results)
+    print(f"\n{len(results)} resultados em {elapsed * 1000:.1f} ms.")
+
+
+if __name__ == '__main__':
+    main()